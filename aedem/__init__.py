@@ -3,7 +3,6 @@ from flask_restplus import Api
 
 def create_app() -> Flask:
     app = Flask(__name__)
-    app.app_context().push()
 
     # set up config from object
     if app.config["ENV"] == "production":
@@ -13,8 +12,28 @@ def create_app() -> Flask:
     else:
         app.config.from_object("config.development.Config")
 
-    # ensure all database tables are created
-    from aedem.models import initialize_database, engine
+    # set up database settings; connections are only opened by the process
+    # which serves requests (tables are created with `flask init-db`)
+    from aedem.models import configure_database
+    configure_database(app.config)
+
+    # wait for the database cooperatively when served by gevent workers
+    from aedem.green import init_green
+    init_green()
+
+    # answer read-only requests from the read replicas, if configured
+    from aedem.replicas import init_replicas
+    init_replicas(app)
+
+    # set up response cache
+    from aedem.cache import init_cache
+    init_cache(app)
+
+    # set up publish/subscribe backend of the notification streams
+    from aedem.pubsub import init_pubsub
+    init_pubsub(app)
+
+    # load all models
     from aedem.models.privileges import Privilege
     from aedem.models.flags import Flag
     from aedem.models.users import User
@@ -23,7 +42,13 @@ def create_app() -> Flask:
     from aedem.models.notifications import Notification
     from aedem.models.replies import Reply
     from aedem.models.news import News
-    initialize_database(engine)
+    from aedem.models.stats import ReportStats
+    from aedem.models.broadcasts import Broadcast
+
+    # compile row serializers of every model
+    from aedem.models import Base
+    from aedem.serializers import compile_serializers
+    compile_serializers(Base)
     
     # create Flask blueprint
     blueprint = Blueprint(
@@ -49,6 +74,7 @@ def create_app() -> Flask:
     from aedem.controllers.notifications import namespace as notifcontroller
     from aedem.controllers.replies import namespace as replycontroller
     from aedem.controllers.news import namespace as newscontroller
+    from aedem.controllers.status import namespace as statuscontroller
     api.add_namespace(usercontroller)
     api.add_namespace(privilegecontroller)
     api.add_namespace(flagcontroller)
@@ -56,9 +82,32 @@ def create_app() -> Flask:
     api.add_namespace(notifcontroller)
     api.add_namespace(replycontroller)
     api.add_namespace(newscontroller)
+    api.add_namespace(statuscontroller)
 
     # register blueprint
     app.register_blueprint(blueprint)
 
-    app.run(debug = app.config['DEBUG'])
+    # record latency and database usage of each route
+    from aedem.metrics import init_metrics
+    init_metrics(app)
+
+    # discard the database session of each request once it is handled
+    from aedem.models import Session
+
+    @app.teardown_request
+    def remove_session(exception = None):
+        Session.remove()
+
+    # compress responses, streamed ones included, for clients accepting it
+    from aedem.compression import init_compression
+    init_compression(app)
+
+    # register command line commands
+    from aedem.commands import init_db_command, rebuild_stats_command, \
+        resume_broadcasts_command, db_command
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(resume_broadcasts_command)
+    app.cli.add_command(db_command)
+
     return app
\ No newline at end of file
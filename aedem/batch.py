@@ -0,0 +1,95 @@
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from aedem.serializers import serializer_for
+from aedem.stats import report_key, update_report_stats
+from aedem.models.reports import Report
+from aedem.models.attachments import Attachment
+
+# report columns given by clients, the remaining ones are generated
+_REPORT_FIELDS = ('user_id', 'status', 'state_abbr', 'city_name', 'area',
+    'geolatitude', 'geolongitude', 'geohash', 'description')
+
+def insert_reports(session, reports) -> list:
+    """Insert reports along with their attachments in a constant number of statements
+
+    reports is a list of (report, attachment addresses) pairs, where report
+    is a transient Report whose user_id is set. Report statistics are updated
+    in the same transaction. Returns the serialized reports, in order, with
+    the same layout as the other report endpoints.
+    """
+    if session.get_bind(Report.__mapper__).dialect.name != 'postgresql':
+        return _insert_reports_orm(session, reports)
+
+    report_table = Report.__table__
+    attachment_table = Attachment.__table__
+
+    # reserve the identifiers of every report at once
+    identifiers = [row[0] for row in session.execute(
+        select([func.nextval('reports_id_seq')])
+        .select_from(func.generate_series(1, len(reports))))]
+
+    # insert all reports in a single statement
+    report_values = []
+    attachment_values = []
+    for report_id, (report, addresses) in zip(identifiers, reports):
+        values = dict((datafield, getattr(report, datafield))
+            for datafield in _REPORT_FIELDS)
+        if values['status'] is None:
+            values['status'] = True
+        values['id'] = report_id
+        report_values.append(values)
+
+        for address in addresses:
+            attachment_values.append({
+                "report_id": report_id,
+                "user_id": report.user_id,
+                "attachment_addr": address
+            })
+
+    inserted = {}
+    for row in session.execute(report_table.insert()
+            .values(report_values)
+            .returning(*report_table.columns)):
+        inserted[row.id] = row
+
+    # insert all attachments in a single statement
+    attachments = {}
+    if attachment_values:
+        for row in session.execute(attachment_table.insert()
+                .values(attachment_values)
+                .returning(*attachment_table.columns)):
+            attachments.setdefault(row.report_id, []).append(row)
+
+    update_report_stats(session,
+        Counter(report_key(row) for row in inserted.values()))
+
+    report_serializer = serializer_for(Report)
+    attachment_serializer = serializer_for(Attachment)
+    return [{
+        "report": report_serializer.dump_row(inserted[report_id]),
+        "attachments": [attachment_serializer.dump_row(row)
+            for row in sorted(attachments.get(report_id, []), key = lambda row: row.id)]
+    } for report_id in identifiers]
+
+def _insert_reports_orm(session, reports) -> list:
+    """Insert reports through the ORM, for databases without RETURNING"""
+    for report, addresses in reports:
+        for address in addresses:
+            attach = Attachment(attachment_addr = address)
+            attach.user_id = report.user_id
+            report.attachments.append(attach)
+        session.add(report)
+    session.flush()
+
+    update_report_stats(session,
+        Counter(report_key(report) for report, _ in reports))
+
+    report_serializer = serializer_for(Report)
+    attachment_serializer = serializer_for(Attachment)
+    return [{
+        "report": report_serializer.dump(report),
+        "attachments": [attachment_serializer.dump(attach)
+            for attach in report.attachments]
+    } for report, _ in reports]
@@ -0,0 +1,231 @@
+import collections
+import functools
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+
+from aedem.compression import add_vary, available_encodings, compress, negotiate
+from aedem.replicas import read_from_primary
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class LocalCache(object):
+    """In-process LRU cache whose entries expire after ttl seconds
+
+    Generation counters (see incr) are kept apart from the entries, so they
+    are never evicted.
+    """
+    def __init__(self, maxsize = 1024, ttl = 300) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl = None) -> None:
+        expires = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+class MemoryStore(object):
+    """In-memory stand-in for the subset of the redis client used by StoreCache"""
+    def __init__(self) -> None:
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name, value, ex = None) -> None:
+        expires = time.monotonic() + ex if ex else None
+        if isinstance(value, int):
+            value = str(value).encode()
+        with self._lock:
+            self._values[name] = (value, expires)
+
+    def delete(self, *names) -> None:
+        with self._lock:
+            for name in names:
+                self._values.pop(name, None)
+
+    def incr(self, name) -> int:
+        with self._lock:
+            value, expires = self._values.get(name, (b'0', None))
+            value = int(value) + 1
+            self._values[name] = (str(value).encode(), expires)
+            return value
+
+    def flushdb(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+class StoreCache(object):
+    """Cache kept in a key-value store shared by every process, such as redis"""
+    def __init__(self, client, ttl = 300, prefix = "aedem:") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl = None) -> None:
+        self.client.set(self.prefix + key, value, ex = ttl or self.ttl)
+
+    def delete(self, key) -> None:
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def clear(self) -> None:
+        self.client.flushdb()
+
+def create_cache(config):
+    """Create the cache backend chosen by config"""
+    backend = config['CACHE_BACKEND']
+    if backend == 'local':
+        return LocalCache(maxsize = config['CACHE_MAXSIZE'],
+            ttl = config['CACHE_TTL'])
+    if backend == 'memory':
+        return StoreCache(MemoryStore(), ttl = config['CACHE_TTL'])
+    if backend == 'redis':
+        if redis is None:
+            raise RuntimeError("The redis cache backend requires the redis package")
+        return StoreCache(redis.Redis.from_url(config['CACHE_REDIS_URL']),
+            ttl = config['CACHE_TTL'])
+    raise ValueError("Unknown cache backend '{}'".format(backend))
+
+def init_cache(app) -> None:
+    """Attach the cache backend configured for app"""
+    app.extensions['aedem_cache'] = create_cache(app.config)
+
+def get_cache():
+    """Cache backend of the current application"""
+    return current_app.extensions['aedem_cache']
+
+def _generation(cache, group) -> int:
+    return int(cache.get('generation:' + group) or 0)
+
+def invalidate(*groups) -> None:
+    """Discard every cached response of the given groups"""
+    cache = get_cache()
+    for group in groups:
+        cache.incr('generation:' + group)
+
+def cached(group):
+    """Cache the body of a GET handler until group is invalidated
+
+    Cached bodies are kept along with their ETag, so repeated requests are
+    answered, or short-circuited to 304 Not Modified, without touching the
+    database. Only successful responses are cached. Bodies compressed for
+    clients accepting a compressed coding are cached as well, next to the
+    body they were compressed from.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            key = 'response:{}:{}:{}'.format(
+                group, _generation(cache, group), request.full_path)
+
+            entry = cache.get(key)
+            if entry is None:
+                # a lagging replica would cache stale bodies under the
+                # generation of the latest writes
+                read_from_primary()
+                response = handler(*args, **kwargs)
+                if response.status_code != 200 or response.is_streamed or \
+                        (response.is_json and response.get_json().get('error')):
+                    return response
+
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                cache.set(key, etag.encode() + b'\n' + body)
+            else:
+                etag, body = entry.split(b'\n', 1)
+                etag = etag.decode()
+
+            encoding = None
+            config = current_app.config
+            if len(body) >= config['COMPRESSION_MIN_SIZE']:
+                encoding = negotiate(request.headers.get('Accept-Encoding', ''),
+                    available_encodings(config))
+            if encoding is not None:
+                variant_key = '{}:{}:{}'.format(key, etag, encoding)
+                variant = cache.get(variant_key)
+                if variant is None:
+                    variant = compress(body, encoding,
+                        config['COMPRESSION_LEVELS'][encoding])
+                    cache.set(variant_key, variant)
+                body = variant
+
+            response = current_app.response_class(body,
+                mimetype = 'application/json')
+            add_vary(response.headers)
+            if encoding is not None:
+                response.headers['Content-Encoding'] = encoding
+            response.set_etag(etag, weak = encoding is not None)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+def invalidates(*groups):
+    """Invalidate the cached responses of groups once a write handler returns"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            response = handler(*args, **kwargs)
+            invalidate(*groups)
+            return response
+        return wrapper
+    return decorator
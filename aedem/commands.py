@@ -0,0 +1,82 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+
+from aedem.models import Session, get_engine, initialize_database
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create the database tables."""
+    initialize_database(get_engine())
+    click.echo("Database initialized.")
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """Recompute the report statistics from the reports table."""
+    from aedem.stats import rebuild_report_stats
+
+    session = Session()
+    rebuild_report_stats(session)
+    session.commit()
+    Session.remove()
+    click.echo("Report statistics rebuilt.")
+
+@click.command('resume-broadcasts')
+@click.option('--stale-after', type = int, default = None,
+    help = "Seconds without progress after which running broadcasts are resumed.")
+@with_appcontext
+def resume_broadcasts_command(stale_after):
+    """Send the broadcasts left pending or interrupted, from where they stopped."""
+    from flask import current_app
+    from aedem.inbox import resume_broadcasts, send_broadcast
+
+    config = current_app.config
+    if stale_after is None:
+        stale_after = config['BROADCAST_STALE_AFTER']
+
+    session = Session()
+    identifiers = resume_broadcasts(session, stale_after)
+    Session.remove()
+    for broadcast_id in identifiers:
+        click.echo("Sending broadcast {}".format(broadcast_id))
+        send_broadcast(broadcast_id, config['BROADCAST_BATCH_SIZE'], stale_after)
+        Session.remove()
+    click.echo("{} broadcast(s) sent.".format(len(identifiers)))
+
+db_command = AppGroup('db', help = "Manage the database schema.")
+
+@db_command.command('upgrade')
+def db_upgrade_command():
+    """Apply the pending schema migrations."""
+    from aedem.migrations import upgrade
+
+    applied = upgrade(get_engine(), echo = lambda migration:
+        click.echo("Applying {} {}".format(migration.version, migration.description)))
+    click.echo("{} migration(s) applied.".format(len(applied)))
+
+@db_command.command('status')
+def db_status_command():
+    """List the schema migrations and whether they are applied."""
+    from aedem.migrations import migrations, applied_versions
+
+    with get_engine().connect() as connection:
+        applied = applied_versions(connection)
+    for migration in migrations():
+        click.echo("[{}] {} {}".format(
+            'x' if migration.version in applied else ' ',
+            migration.version, migration.description))
+
+@db_command.command('check-indexes')
+def db_check_indexes_command():
+    """Check that every hot query is planned with its index."""
+    from aedem.migrations.checks import HOT_QUERIES, check_indexes
+
+    with get_engine().connect() as connection:
+        failures = check_indexes(connection)
+    for index, query, used in failures:
+        click.echo("{} is not used by: {} (uses: {})".format(
+            index, query, ', '.join(sorted(used)) or 'no index'), err = True)
+    if failures:
+        raise click.exceptions.Exit(1)
+    click.echo("All {} hot queries use their indexes.".format(len(HOT_QUERIES)))
@@ -0,0 +1,157 @@
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_set_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class GzipEncoder(object):
+    """Incremental gzip encoder"""
+    def __init__(self, level) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class BrotliEncoder(object):
+    """Incremental brotli encoder"""
+    def __init__(self, level) -> None:
+        self._compressor = brotli.Compressor(quality = level)
+
+    def compress(self, data) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class ZstdEncoder(object):
+    """Incremental zstandard encoder"""
+    def __init__(self, level) -> None:
+        self._compressor = zstandard.ZstdCompressor(level = level).compressobj()
+
+    def compress(self, data) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+# encoders by content coding, brotli and zstandard only when installed
+ENCODERS = {'gzip': GzipEncoder}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = ZstdEncoder
+
+def available_encodings(config) -> list:
+    """Content codings enabled by config which can be produced, in order of preference"""
+    return [encoding for encoding in config['COMPRESSION_ALGORITHMS']
+        if encoding in ENCODERS]
+
+def negotiate(accept_encoding, encodings):
+    """Content coding of encodings preferred by the client, or None
+
+    accept_encoding is the value of the Accept-Encoding request header;
+    ties between codings of the same quality go to the first in encodings.
+    """
+    accepted = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepted.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data, encoding, level) -> bytes:
+    """Compress a whole body with encoding"""
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(data) + encoder.finish()
+
+def add_vary(headers) -> None:
+    """Mark headers as varying on the Accept-Encoding request header"""
+    vary = parse_set_header(headers.get('Vary'))
+    vary.add('Accept-Encoding')
+    headers['Vary'] = vary.to_header()
+
+class CompressionMiddleware(object):
+    """WSGI middleware compressing responses with the coding negotiated with the client
+
+    Bodies are compressed as they are sent, chunk by chunk, so streamed
+    responses are never held in memory. Responses which are smaller than
+    min_size bytes, not of one of mimetypes or already encoded, such as
+    the precompressed responses of the cache, are sent as they are.
+    """
+    def __init__(self, app, encodings, levels, min_size, mimetypes) -> None:
+        self.app = app
+        self.encodings = encodings
+        self.levels = levels
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        encoders = []
+
+        def start(status, headers, exc_info = None):
+            headers = Headers(headers)
+            if self._compressible(environ, status, headers):
+                add_vary(headers)
+                if encoding is not None and self._large(headers):
+                    encoders.append(ENCODERS[encoding](self.levels[encoding]))
+                    headers['Content-Encoding'] = encoding
+                    headers.remove('Content-Length')
+
+                    # compressed bodies differ byte by byte, not in meaning
+                    etag = headers.get('ETag')
+                    if etag is not None and not etag.startswith('W/'):
+                        headers['ETag'] = 'W/' + etag
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        app_iter = self.app(environ, start)
+        if not encoders:
+            return app_iter
+        return self._encode(app_iter, encoders[0])
+
+    def _compressible(self, environ, status, headers) -> bool:
+        code = int(status.split(None, 1)[0])
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip()
+        return environ.get('REQUEST_METHOD') != 'HEAD' and \
+            code >= 200 and code not in (204, 206, 304) and \
+            mimetype in self.mimetypes and \
+            'Content-Encoding' not in headers and \
+            'no-transform' not in headers.get('Cache-Control', '')
+
+    def _large(self, headers) -> bool:
+        # the length of streamed bodies is unknown, and usually large
+        length = headers.get('Content-Length')
+        return length is None or int(length) >= self.min_size
+
+    @staticmethod
+    def _encode(app_iter, encoder):
+        try:
+            for chunk in app_iter:
+                data = encoder.compress(chunk)
+                if data:
+                    yield data
+            yield encoder.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+def init_compression(app) -> None:
+    """Compress the responses of app as configured"""
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app,
+        encodings = available_encodings(app.config),
+        levels = app.config['COMPRESSION_LEVELS'],
+        min_size = app.config['COMPRESSION_MIN_SIZE'],
+        mimetypes = app.config['COMPRESSION_MIMETYPES'])
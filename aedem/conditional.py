@@ -0,0 +1,98 @@
+import functools
+import hashlib
+
+from flask import current_app, g, request
+from sqlalchemy.orm import load_only
+
+from aedem.fieldsets import fieldset
+from aedem.models import Session
+from aedem.pagination import paginate
+from aedem.repository import Repository
+
+def _validators(rows) -> tuple:
+    """ETag and Last-Modified of (primary key, last_updated) rows"""
+    digest = hashlib.sha1(request.full_path.encode())
+    last_modified = None
+    for key, last_updated in rows:
+        digest.update('{}@{}\n'.format(key, last_updated).encode())
+        if last_updated is not None and \
+                (last_modified is None or last_updated > last_modified):
+            last_modified = last_updated
+    return digest.hexdigest(), last_modified
+
+def page_validators(model, scope = None):
+    """Validators of the page a list handler of model responds with
+
+    Only the primary keys and last_updated columns of the page are selected,
+    ordered and limited the way paginate does, so they are computed without
+    building ORM objects or serializing the page. scope, when given, is
+    called with the query and the arguments of the handler and returns the
+    query filtered the way the handler filters it.
+
+    Pages are given an ETag only: rows leaving a page, when deleted or
+    updated out of its filters, change the keys of the page but not the
+    latest of its modification dates, so If-Modified-Since cannot tell
+    whether a page is fresh.
+    """
+    key = model.__mapper__.primary_key[0]
+
+    def validators(*args, **kwargs):
+        query = Session().query(key, model.created_at, model.last_updated)
+        if scope is not None:
+            query = scope(query, *args, **kwargs)
+        rows, _ = paginate(query, model)
+        etag, _ = _validators((row[0], row.last_updated) for row in rows)
+        return etag, None
+    return validators
+
+def row_validators(model, *options):
+    """Validators of the row a detail handler of model responds with
+
+    The row is loaded through the repository of model, with the loader
+    options given, so that the handler finds it in the identity map of the
+    session and answers without another query. Only the columns of the
+    fieldset of the request, and last_updated, are loaded.
+    """
+    repository = Repository(model)
+
+    def validators(*args, id, **kwargs):
+        keys = fieldset(model).keys + ('last_updated',)
+        row = repository.get_or_404(id, load_only(*keys), *options)
+        # the identity map holds rows weakly, keep it until the handler runs
+        g.validated_row = row
+        return _validators([(id, row.last_updated)])
+    return validators
+
+def conditional(validators):
+    """Answer GET handlers with 304 Not Modified when the client copy is fresh
+
+    validators is called with the arguments of the handler and returns the
+    (ETag, Last-Modified) pair of the response, or None to skip the check.
+    Fresh requests are answered before the handler runs, so no ORM objects
+    are built for them.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            validator = validators(*args, **kwargs)
+            if validator is None:
+                return handler(*args, **kwargs)
+            etag, last_modified = validator
+
+            # check If-None-Match and If-Modified-Since headers
+            probe = current_app.response_class(mimetype = 'application/json')
+            probe.set_etag(etag, weak = True)
+            if last_modified is not None:
+                probe.last_modified = last_modified
+            probe.make_conditional(request)
+            if probe.status_code == 304:
+                return probe
+
+            response = handler(*args, **kwargs)
+            if response.status_code == 200:
+                response.set_etag(etag, weak = True)
+                if last_modified is not None:
+                    response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
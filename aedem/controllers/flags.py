@@ -1,7 +1,13 @@
 from flask import jsonify, request
 from flask_restplus import Namespace, Resource, fields
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from aedem.utils import dictionarize
+from aedem.fieldsets import fieldset
+from aedem.cache import cached, invalidates
+from aedem.pagination import paginate
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
 
 from aedem.models import Session
 from aedem.models.flags import Flag
@@ -25,23 +31,34 @@ create_flag_model = namespace.model("create_flag", {
         required = True)
 })
 
+patch_flag_model = patch_model(namespace, Flag, "patch_flag")
+
 @namespace.route('')
 class FlagList(Resource):
     @namespace.doc('list_flags')
+    @namespace.param('limit', 'Quantidade máxima de flags na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @cached('flags')
     def get(self):
         '''Lista todas as flags'''
         session = Session()
 
-        # get list of flags
+        # get page of flags, loading the requested columns only, along with
+        # their privileges
+        serializer = fieldset(Flag, listing = True)
+        page, next_cursor = paginate(session.query(Flag)
+            .options(load_only(*serializer.keys), selectinload(Flag.privileges)), Flag)
+
         flags = []
-        for flag in session.query(Flag).all():
+        for flag in page:
             # generate list of flag privileges
             privileges = []
             for privilege in flag.privileges:
                 privileges.append(privilege.identifier)
             
             flags.append({
-                "flag": dictionarize(flag),
+                "flag": serializer.dump(flag),
                 "privileges": privileges
             })
         
@@ -50,12 +67,14 @@ class FlagList(Resource):
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": flags
+            "response": flags,
+            "next_cursor": next_cursor
         }
         return jsonify(response)
     
     @namespace.doc('create_flag')
     @namespace.expect(create_flag_model)
+    @invalidates('flags')
     def post(self):
         '''Cria uma nova flag'''
         session = Session()
@@ -65,8 +84,7 @@ class FlagList(Resource):
 
         # check if flag already exists
         flag_id = flag_data['identifier']
-        flag_scalar = session.query(Flag).filter_by(identifier = flag_id).scalar()
-        if flag_scalar is not None:
+        if Repository(Flag).exists(flag_id):
             response = {
                 "status": 409,
                 "message": "Conflict",
@@ -83,17 +101,16 @@ class FlagList(Resource):
 		)
 
         if 'privileges' in flag_data:
-            # get list of privileges
+            # get the requested privileges which exist, all at once
             req_privileges = flag_data['privileges']
+            found = Repository(Privilege).get_many(req_privileges)
             grantable = []
             for priv in req_privileges:
-                # check if requested privilege exists
-                item = session.query(Privilege).filter_by(identifier = priv)
-                if item.scalar() is not None:
-                    # check if privilege can be granted to users
-                    privilege = item.one()
-                    if privilege.assignable is not False:
-                        grantable.append(privilege)
+                # check if privilege can be granted to users
+                privilege = found.get(priv)
+                if privilege is not None and privilege.assignable is not False \
+                        and privilege not in grantable:
+                    grantable.append(privilege)
             
             # assign grantable privileges to flag
             new_flag.privileges = grantable
@@ -124,13 +141,13 @@ class FlagList(Resource):
 @namespace.response(404, 'Flag não encontrado')
 class SpecificFlag(Resource):
     @namespace.doc('get_flag')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @cached('flags')
     def get(self, id):
         '''Mostra uma flag específica'''
-        session = Session()
-
-        flag = session.query(Flag).filter_by(identifier = id).first()
-        if flag is None:
-            namespace.abort(404)
+        serializer = fieldset(Flag)
+        flag = Repository(Flag).get_or_404(id,
+            load_only(*serializer.keys), joinedload(Flag.privileges))
         
         # generate a list of granted privileges
         privileges = []
@@ -143,26 +160,22 @@ class SpecificFlag(Resource):
             "message": "Success",
             "error": False,
             "response": {
-                "flag": dictionarize(flag),
+                "flag": serializer.dump(flag),
                 "privileges": privileges
             }
         }
         return jsonify(response)
 
     @namespace.doc('delete_privilege')
+    @invalidates('flags')
     def delete(self, id):
         '''Deleta uma flag'''
         session = Session()
 
-        # look up given flag
-        given_flag = session.query(Flag).filter_by(identifier = id)
-
-        # check if given flag exists
-        if given_flag.scalar() is None:
-            namespace.abort(404)
+        # look up given flag along with its privileges
+        flag = Repository(Flag).get_or_404(id, joinedload(Flag.privileges))
 
         # delete flag entry from database
-        flag = given_flag.one()
         records = dictionarize(flag)
 
         # generate a list of granted privileges
@@ -186,40 +199,32 @@ class SpecificFlag(Resource):
         return jsonify(response)
 
     @namespace.doc('update_flag')
+    @invalidates('flags')
     def put(self, id):
         '''Atualiza os dados de uma flag'''
         session = Session()
 
         # look up given flag
-        given_flag = session.query(Flag).filter_by(identifier = id)
-
-        # check if given flag exists
-        if given_flag.scalar() is None:
-            namespace.abort(404)
+        flag = Repository(Flag).get_or_404(id)
 
         # update flag entry with given values
-        flag = given_flag.one()
-
         for datafield in request.args:
             if datafield.lower() != 'privileges':
                 setattr(flag, datafield, request.args[datafield])
 
-        flag = session.query(Flag).filter_by(identifier = id).one()
-
         granted = []
 
         if 'privileges' in request.args:
-            # get list of privileges
+            # get the requested privileges which exist, all at once
             req_privileges = request.args['privileges'].split(",")
+            found = Repository(Privilege).get_many(req_privileges)
             grantable = []
             for priv in req_privileges:
-                # check if requested privilege exists
-                item = session.query(Privilege).filter_by(identifier = priv)
-                if item.scalar() is not None:
-                    # check if privilege can be granted to users
-                    privilege = item.one()
-                    if privilege.assignable is not False:
-                        grantable.append(privilege)
+                # check if privilege can be granted to users
+                privilege = found.get(priv)
+                if privilege is not None and privilege.assignable is not False \
+                        and privilege not in grantable:
+                    grantable.append(privilege)
             
             # assign grantable privileges to flag
             flag.privileges = grantable
@@ -241,3 +246,30 @@ class SpecificFlag(Resource):
             }
         }
         return jsonify(response)
+
+    @namespace.doc('patch_flag')
+    @namespace.expect(patch_flag_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @invalidates('flags')
+    def patch(self, id):
+        '''Atualiza os campos de uma flag dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(Flag)
+        serializer = fieldset(Flag)
+        flag = Repository(Flag).update(id, values, *serializer.columns)
+        if flag is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": {
+                "flag": serializer.dump_row(flag)
+            }
+        }
+        return jsonify(response)
@@ -1,6 +1,12 @@
 from flask import jsonify, request
 from flask_restplus import Namespace, Resource, fields
 from aedem.utils import dictionarize
+from aedem.pagination import paginate, page_size
+from aedem.search import search_news, encode_position, decode_position
+from aedem.conditional import conditional, page_validators, row_validators
+from aedem.fieldsets import fieldset
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
 from aedem.models import Session
 from aedem.models.news import News
 
@@ -32,24 +38,34 @@ create_news_model = namespace.model("create_news", {
         description = "Cidade", 
         required = True),
 })
+
+patch_news_model = patch_model(namespace, News, "patch_news")
 @namespace.route('')
 class list_news(Resource):
 	@namespace.doc('list_news')
+	@namespace.param('limit', 'Quantidade máxima de notícias na página')
+	@namespace.param('cursor', 'Cursor da página seguinte')
+	@namespace.param('fields', 'Campos retornados, separados por vírgula')
+	@conditional(page_validators(News))
 	def get(self):
 		'''Listagem de todas as notícias'''
 		session = Session()
 
-		# get list of all news 
+		# get page of news as plain rows, without building ORM objects
+		serializer = fieldset(News, listing = True)
+		page, next_cursor = paginate(session.query(*serializer.columns), News)
+
 		news_list = []
-		for news in session.query(News).all():
-			news_list.append(dictionarize(news))
+		for row in page:
+			news_list.append(serializer.dump_row(row))
 
 		# respond request
 		response = {
 			"status" : 200,
 			"message" : "Success",
 			"error" : False,
-			"response" : news_list 
+			"response" : news_list,
+			"next_cursor" : next_cursor
 		}
 
 		return jsonify(response)
@@ -85,28 +101,66 @@ class list_news(Resource):
 		}
 		return jsonify(response)
 
+@namespace.route('/search')
+class search_news_list(Resource):
+	@namespace.doc('search_news')
+	@namespace.param('q', 'Termos buscados no título e no conteúdo das notícias')
+	@namespace.param('state_abbr', 'Estado das notícias')
+	@namespace.param('city_name', 'Cidade das notícias')
+	@namespace.param('limit', 'Quantidade máxima de notícias na página')
+	@namespace.param('cursor', 'Cursor da página seguinte')
+	@namespace.param('fields', 'Campos retornados, separados por vírgula')
+	def get(self):
+		'''Busca notícias pelo título e conteúdo, das mais relevantes às menos relevantes'''
+		session = Session()
+
+		text = request.args.get('q', '').strip()
+		if not text:
+			namespace.abort(400, 'Missing search terms')
+
+		# seek past the last result of the previous page
+		after = None
+		if 'cursor' in request.args:
+			try:
+				after = decode_position(request.args['cursor'])
+			except (ValueError, TypeError):
+				namespace.abort(400, 'Invalid pagination cursor')
+
+		news_list, next_position = search_news(session, text, page_size(), after,
+			state_abbr = request.args.get('state_abbr'),
+			city_name = request.args.get('city_name'),
+			serializer = fieldset(News, listing = True))
+
+		# respond request
+		response = {
+			"status" : 200,
+			"message" : "Success",
+			"error" : False,
+			"response" : news_list,
+			"next_cursor" : encode_position(next_position) if next_position else None
+		}
+
+		return jsonify(response)
+
 @namespace.route('/<id>')
 @namespace.param('id','identificador da notícia')
 @namespace.response(404, 'Notícia não encontrada')
 class SpecificNews(Resource):
 	@namespace.doc('get_news')
+	@namespace.param('fields', 'Campos retornados, separados por vírgula')
+	@conditional(row_validators(News))
 	def get(self, id):
 		'''Mostrar uma notícia especifica'''
-		session = Session()
-		
-		# get news by id 
-		news = session.query(News).filter_by(id = id).first()
-		
-		# check if the news exists
-		if news is None:
-			namespace.abort(404)
+		# loaded by the validators of the request, from the identity map
+		serializer = fieldset(News)
+		news = Repository(News).get_or_404(id)
 		
 		# respond request
 		response = {
 			"status": 200,
 			"message": "Success",
 			"error": False,
-			"response": dictionarize(news)
+			"response": serializer.dump(news)
 		}
 		return jsonify(response)
 
@@ -116,14 +170,9 @@ class SpecificNews(Resource):
 		session = Session()
 		
 		# look up given determined news
-		determined_news = session.query(News).filter_by(id = id)
-		
-		# check if determined news exists 
-		if determined_news.scalar() is None:
-			namespace.abort(404)
+		news = Repository(News).get_or_404(id)
 		
 		# delete news from database
-		news = determined_news.one()
 		records = dictionarize(news)
 		session.delete(news)
 		session.commit()
@@ -142,14 +191,9 @@ class SpecificNews(Resource):
 		session = Session()
 		
 		# get news
-		determined_news = session.query(News).filter_by(id = id)
-		
-		#check if news exists
-		if determined_news.scalar() is None:
-			namespace.abort(404)
+		news = Repository(News).get_or_404(id)
 		
 		# update news data with given values
-		news = determined_news.one()
 		for datafield in request.args:
 			setattr(news, datafield, request.args[datafield])
 		session.add(news)
@@ -162,4 +206,28 @@ class SpecificNews(Resource):
 			"error": False,
 			"response": dictionarize(news)
 		}
+		return jsonify(response)
+
+	@namespace.doc('patch_news')
+	@namespace.expect(patch_news_model)
+	@namespace.param('fields', 'Campos retornados, separados por vírgula')
+	def patch(self, id):
+		'''Atualiza os campos de uma notícia dados em JSON, em uma única instrução'''
+		session = Session()
+
+		# write the given columns and read the requested ones back at once
+		values = patch_values(News)
+		serializer = fieldset(News)
+		news = Repository(News).update(id, values, *serializer.columns)
+		if news is None:
+			namespace.abort(404)
+		session.commit()
+
+		# respond request
+		response = {
+			"status": 200,
+			"message": "Success",
+			"error": False,
+			"response": serializer.dump_row(news)
+		}
 		return jsonify(response)
\ No newline at end of file
@@ -1,9 +1,19 @@
-from flask import jsonify, request
+from collections import Counter
+
+from flask import current_app, jsonify, request
 from flask_restplus import Namespace, Resource, fields
 from aedem.utils import dictionarize
+from aedem.pagination import paginate
+from aedem.conditional import conditional, page_validators, row_validators
+from aedem.fieldsets import fieldset
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
+from aedem.inbox import BROADCAST_TARGETS, publish_notification, send_broadcast, update_unread_count
+from aedem.jobs import submit
 from aedem.models import Session
 from aedem.models.notifications import Notification
 from aedem.models.users import User
+from aedem.models.broadcasts import Broadcast
 
 namespace = Namespace(
     'notifications',
@@ -20,24 +30,56 @@ create_notification_model = namespace.model("create_notification", {
         required = True)
 })
 
+create_broadcast_model = namespace.model("create_broadcast", {
+    "notiftype": fields.String(
+        description = "Tipo de notificação",
+        required = True),
+    "content": fields.String(
+        description = "Conteúdo da notificação",
+        required = True),
+    "state_abbr": fields.String(
+        description = "Estado dos usuários notificados",
+        required = False),
+    "city_name": fields.String(
+        description = "Nome da cidade dos usuários notificados",
+        required = False),
+    "area": fields.String(
+        description = "Bairro dos usuários notificados",
+        required = False),
+    "flag_id": fields.String(
+        description = "Flag dos usuários notificados",
+        required = False)
+})
+
+patch_notification_model = patch_model(namespace, Notification, "patch_notification")
+
 @namespace.route('')
 class NotificationList(Resource):
     @namespace.doc('list_notification')
+    @namespace.param('limit', 'Quantidade máxima de notificações na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(page_validators(Notification))
     def get(self):
         '''Lista todas as notificações'''
         session = Session()
 
-        # get list of notifications
+        # get page of notifications as plain rows, without building ORM objects
+        serializer = fieldset(Notification, listing = True)
+        page, next_cursor = paginate(
+            session.query(*serializer.columns), Notification)
+
         notifications = []
-        for notification in session.query(Notification).all():
-            notifications.append(dictionarize(notification))
+        for row in page:
+            notifications.append(serializer.dump_row(row))
         
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": notifications
+            "response": notifications,
+            "next_cursor": next_cursor
         }
         return jsonify(response)
     
@@ -51,9 +93,8 @@ class NotificationList(Resource):
         notif_data = request.get_json(force = True)
 
         # check if given user exists
-        user_id = notif_data['user_id']
-        user = session.query(User).filter_by(id = user_id)
-        if user.scalar() is None:
+        user = Repository(User).get(notif_data['user_id'])
+        if user is None:
             response = {
                 "status": 404,
                 "message": "Not Found",
@@ -67,10 +108,13 @@ class NotificationList(Resource):
 			content = notif_data['content'],
 			notiftype = notif_data['notiftype'])
         
-        new_notification.user = user.one()
+        new_notification.user = user
 
         # add new notification entity to database
         session.add(new_notification)
+        update_unread_count(session, {new_notification.user.id: 1})
+        session.flush()
+        publish_notification(session, new_notification)
         session.commit()
 
         # respond request
@@ -82,25 +126,85 @@ class NotificationList(Resource):
         }
         return jsonify(response)
 
+@namespace.route('/broadcasts')
+class BroadcastList(Resource):
+    @namespace.doc('create_broadcast')
+    @namespace.expect(create_broadcast_model)
+    def post(self):
+        '''Envia uma notificação a todos os usuários de uma região ou flag, em segundo plano'''
+        session = Session()
+
+        # get broadcast information provided in the request
+        broadcast_data = request.get_json(force = True)
+
+        targets = dict((datafield, broadcast_data[datafield])
+            for datafield in BROADCAST_TARGETS if broadcast_data.get(datafield))
+        if not targets:
+            namespace.abort(400, 'At least one of {} must be given'.format(
+                ', '.join(BROADCAST_TARGETS)))
+
+        # record broadcast, so that its progress can be followed
+        new_broadcast = Broadcast(
+            notiftype = broadcast_data['notiftype'],
+            content = broadcast_data['content'],
+            **targets)
+        session.add(new_broadcast)
+        session.commit()
+
+        # notify the targeted users outside of this request
+        submit(send_broadcast, new_broadcast.id,
+            current_app.config['BROADCAST_BATCH_SIZE'],
+            current_app.config['BROADCAST_STALE_AFTER'])
+
+        # respond request
+        response = {
+            "status": 202,
+            "message": "Accepted",
+            "error": False,
+            "response": dictionarize(new_broadcast)
+        }
+        return jsonify(response)
+
+@namespace.route('/broadcasts/<id>')
+@namespace.param('id', 'Identificador do envio')
+@namespace.response(404, 'Envio não encontrado')
+class SpecificBroadcast(Resource):
+    @namespace.doc('get_broadcast')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def get(self, id):
+        '''Mostra o progresso de um envio de notificações'''
+        # select the requested columns only, without building an ORM object
+        serializer = fieldset(Broadcast)
+        broadcast = Repository(Broadcast).columns_or_404(id, *serializer.columns)
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": serializer.dump_row(broadcast)
+        }
+        return jsonify(response)
+
 @namespace.route('/<id>')
 @namespace.param('id', 'Identificador da notificação')
 @namespace.response(404, 'Notificação não encontrado')
 class SpecificNotification(Resource):
     @namespace.doc('get_notification')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(row_validators(Notification))
     def get(self, id):
         '''Mostra uma notificação específica'''
-        session = Session()
-
-        notification = session.query(Notification).filter_by(id = id).first()
-        if notification is None:
-            namespace.abort(404)
+        # loaded by the validators of the request, from the identity map
+        serializer = fieldset(Notification)
+        notification = Repository(Notification).get_or_404(id)
     
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": dictionarize(notification)
+            "response": serializer.dump(notification)
         }
         return jsonify(response)
 
@@ -110,16 +214,14 @@ class SpecificNotification(Resource):
         session = Session()
 
         # look up given flag
-        given_notification = session.query(Notification).filter_by(id = id)
-
-        # check if given notification exists
-        if given_notification.scalar() is None:
-            namespace.abort(404)
+        notification = Repository(Notification).get_or_404(id)
 
         # delete notification entry from database
-        notification = given_notification.one()
         records = dictionarize(notification)
 
+        if notification.read_at is None and notification.user_id is not None:
+            update_unread_count(session, {notification.user_id: -1})
+
         session.delete(notification)
         session.commit()
 
@@ -138,14 +240,12 @@ class SpecificNotification(Resource):
         session = Session()
 
         # look up given flag
-        given_notification = session.query(Notification).filter_by(id = id)
-
-        # check if given notification exists
-        if given_notification.scalar() is None:
-            namespace.abort(404)
+        notification = Repository(Notification).get_or_404(id)
 
         # update notification entry with given values
-        notification = given_notification.one()
+        deltas = Counter()
+        if notification.read_at is None and notification.user_id is not None:
+            deltas[notification.user_id] -= 1
 
         for datafield in request.args:
             if datafield != 'user_id':
@@ -153,8 +253,8 @@ class SpecificNotification(Resource):
 
         if 'user_id' in request.args:
             # check if given user exists
-            user = session.query(User).filter_by(id = request.args['user_id'])
-            if user.scalar() is None:
+            user = Repository(User).get(request.args['user_id'])
+            if user is None:
                 response = {
                     "status": 404,
                     "message": "Not Found",
@@ -163,7 +263,12 @@ class SpecificNotification(Resource):
                 }
                 return jsonify(response)
             
-            notification.user = user.one()
+            notification.user = user
+
+        # move the notification between unread counters if needed
+        if notification.read_at is None and notification.user is not None:
+            deltas[notification.user.id] += 1
+        update_unread_count(session, deltas)
 
         session.add(notification)
         session.commit()
@@ -176,3 +281,27 @@ class SpecificNotification(Resource):
             "response": dictionarize(notification)
         }
         return jsonify(response)
+
+    @namespace.doc('patch_notification')
+    @namespace.expect(patch_notification_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def patch(self, id):
+        '''Atualiza os campos de uma notificação dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(Notification)
+        serializer = fieldset(Notification)
+        notification = Repository(Notification).update(id, values, *serializer.columns)
+        if notification is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": serializer.dump_row(notification)
+        }
+        return jsonify(response)
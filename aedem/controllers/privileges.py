@@ -2,6 +2,11 @@ from flask import jsonify, request
 from flask_restplus import Namespace, Resource, fields
 
 from aedem.utils import dictionarize
+from aedem.cache import cached, invalidates
+from aedem.pagination import paginate
+from aedem.fieldsets import fieldset
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
 
 from aedem.models import Session
 from aedem.models.privileges import Privilege
@@ -21,29 +26,41 @@ create_privilege_model = namespace.model("create_privilege", {
         required = False)
 })
 
+patch_privilege_model = patch_model(namespace, Privilege, "patch_privilege")
+
 @namespace.route('')
 class PrivilegeList(Resource):
     @namespace.doc('list_privileges')
+    @namespace.param('limit', 'Quantidade máxima de privilégios na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @cached('privileges')
     def get(self):
         '''Lista todos os privilégios'''
         session = Session()
 
-        # get list of privileges
+        # get page of privileges as plain rows, without building ORM objects
+        serializer = fieldset(Privilege, listing = True)
+        page, next_cursor = paginate(
+            session.query(*serializer.columns), Privilege)
+
         privileges = []
-        for privilege in session.query(Privilege).all():
-            privileges.append(dictionarize(privilege))
+        for row in page:
+            privileges.append(serializer.dump_row(row))
         
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": privileges
+            "response": privileges,
+            "next_cursor": next_cursor
         }
         return jsonify(response)
     
     @namespace.doc('create_privilege')
     @namespace.expect(create_privilege_model)
+    @invalidates('privileges')
     def post(self):
         '''Cria um novo privilégio'''
         session = Session()
@@ -75,37 +92,33 @@ class PrivilegeList(Resource):
 @namespace.response(404, 'Privilégio não encontrado')
 class SpecificPrivilege(Resource):
     @namespace.doc('get_privilege')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @cached('privileges')
     def get(self, id):
         '''Mostra um privilégio específico'''
-        session = Session()
-
-        privilege = session.query(Privilege).filter_by(identifier = id).first()
-        if privilege is None:
-            namespace.abort(404)
+        # select the requested columns only, without building an ORM object
+        serializer = fieldset(Privilege)
+        privilege = Repository(Privilege).columns_or_404(id, *serializer.columns)
         
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": dictionarize(privilege)
+            "response": serializer.dump_row(privilege)
         }
         return jsonify(response)
 
     @namespace.doc('delete_privilege')
+    @invalidates('privileges', 'flags')
     def delete(self, id):
         '''Deleta um privilégio'''
         session = Session()
 
         # look up given privilege
-        given_privilege = session.query(Privilege).filter_by(identifier = id)
-
-        # check if given privilege exists
-        if given_privilege.scalar() is None:
-            namespace.abort(404)
+        privilege = Repository(Privilege).get_or_404(id)
 
         # delete privilege entry from database
-        privilege = given_privilege.one()
         records = dictionarize(privilege)
         session.delete(privilege)
         session.commit()
@@ -120,20 +133,15 @@ class SpecificPrivilege(Resource):
         return jsonify(response)
 
     @namespace.doc('update_privilege')
+    @invalidates('privileges', 'flags')
     def put(self, id):
         '''Atualiza os dados de um privilégio'''
         session = Session()
 
         # look up given privilege
-        given_privilege = session.query(Privilege).filter_by(identifier = id)
-
-        # check if given privilege exists
-        if given_privilege.scalar() is None:
-            namespace.abort(404)
+        privilege = Repository(Privilege).get_or_404(id)
 
         # update privilege entry with given values
-        privilege = given_privilege.one()
-
         for datafield in request.args:
             setattr(privilege, datafield, request.args[datafield])
 
@@ -148,3 +156,28 @@ class SpecificPrivilege(Resource):
             "response": dictionarize(privilege)
         }
         return jsonify(response)
+
+    @namespace.doc('patch_privilege')
+    @namespace.expect(patch_privilege_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @invalidates('privileges', 'flags')
+    def patch(self, id):
+        '''Atualiza os campos de um privilégio dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(Privilege)
+        serializer = fieldset(Privilege)
+        privilege = Repository(Privilege).update(id, values, *serializer.columns)
+        if privilege is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": serializer.dump_row(privilege)
+        }
+        return jsonify(response)
@@ -2,6 +2,11 @@ from flask import jsonify, request
 from flask_restplus import Namespace, Resource, fields
 
 from aedem.utils import dictionarize
+from aedem.pagination import paginate
+from aedem.conditional import conditional, page_validators, row_validators
+from aedem.fieldsets import fieldset
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
 
 from aedem.models import Session
 from aedem.models.users import User
@@ -26,23 +31,34 @@ create_reply_model = namespace.model("create_reply", {
         required = True)
 })
 
+patch_reply_model = patch_model(namespace, Reply, "patch_reply")
+
 @namespace.route('')
 class ReplyList(Resource):
     @namespace.doc('list_replies')
+    @namespace.param('limit', 'Quantidade máxima de respostas na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(page_validators(Reply))
     def get(self):
         '''Listagem de todas as respostas'''
         session = Session()
 
+        # get page of replies as plain rows, without building ORM objects
+        serializer = fieldset(Reply, listing = True)
+        replies, next_cursor = paginate(session.query(*serializer.columns), Reply)
+
         res = []
-        for reply in session.query(Reply).all():
-            res.append(dictionarize(reply))
+        for row in replies:
+            res.append(serializer.dump_row(row))
 
         #respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": res
+            "response": res,
+            "next_cursor": next_cursor
         }
 
         return jsonify(response)
@@ -62,13 +78,10 @@ class ReplyList(Resource):
         )
 
         # check if given user and report exists
-        user_id = replydata['user']
-        given_user = session.query(User).filter_by(id = user_id)
-        
-        report_id = replydata['report']
-        given_report = session.query(Report).filter_by(id = report_id)
+        user = Repository(User).get(replydata['user'])
+        report = Repository(Report).get(replydata['report'])
 
-        if (given_user.scalar() is None) or (given_report.scalar() is None):
+        if (user is None) or (report is None):
             response = {
                 "status": 404,
                 "message": "Not Found",
@@ -78,8 +91,8 @@ class ReplyList(Resource):
             return jsonify(response)
 
         # attach user and report to reply
-        new_reply.user = given_user.one()
-        new_reply.report = given_report.one()
+        new_reply.user = user
+        new_reply.report = report
 
         # add new reply to database
         session.add(new_reply)
@@ -99,20 +112,20 @@ class ReplyList(Resource):
 @namespace.response(404, 'Reply não encontrado')
 class SpecificReply(Resource):
     @namespace.doc('get_reply')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(row_validators(Reply))
     def get(self, id):
         '''Mostra uma resposta específica'''
-        session = Session()
-
-        reply = session.query(Reply).filter_by(id = id).first()
-        if reply is None:
-            namespace.abort(404)
+        # loaded by the validators of the request, from the identity map
+        serializer = fieldset(Reply)
+        reply = Repository(Reply).get_or_404(id)
 
         #respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": dictionarize(reply)
+            "response": serializer.dump(reply)
         }
 
         return jsonify(response)
@@ -122,15 +135,11 @@ class SpecificReply(Resource):
         '''Deleta uma resposta específica'''
         session = Session()
 
-        given_reply = session.query(Reply).filter_by(id = id)
-
-        if given_reply.scalar() is None:
-            namespace.abort(404)
+        reply = Repository(Reply).get_or_404(id)
 
         # delete reply from database
-        report = given_reply.one()
-        records = dictionarize(report)
-        session.delete(report)
+        records = dictionarize(reply)
+        session.delete(reply)
         session.commit()
 
         # respond request
@@ -147,12 +156,7 @@ class SpecificReply(Resource):
         '''Altera uma resposta específica'''
         session = Session()
 
-        given_reply = session.query(Reply).filter_by(id = id)
-
-        if given_reply.scalar() is None:
-            namespace.abort(404)
-
-        reply = given_reply.one()
+        reply = Repository(Reply).get_or_404(id)
 
         # user and report cant be changed
         for datafield in request.args:
@@ -169,4 +173,28 @@ class SpecificReply(Resource):
             "error": False,
             "response": dictionarize(reply)
         }
+        return jsonify(response)
+
+    @namespace.doc('patch_reply')
+    @namespace.expect(patch_reply_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def patch(self, id):
+        '''Atualiza os campos de uma resposta dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(Reply)
+        serializer = fieldset(Reply)
+        reply = Repository(Reply).update(id, values, *serializer.columns)
+        if reply is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": serializer.dump_row(reply)
+        }
         return jsonify(response)
\ No newline at end of file
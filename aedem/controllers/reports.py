@@ -1,12 +1,29 @@
-from flask import jsonify, request
-from flask_restplus import Namespace, Resource, fields
+import datetime
+import math
+import uuid
 
+from flask import Response, current_app, jsonify, request, stream_with_context
+from flask_restplus import Namespace, Resource, fields, inputs
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from aedem import geo
 from aedem.utils import dictionarize
+from aedem.pagination import paginate, page_size
+from aedem.conditional import conditional, page_validators, row_validators
+from aedem.serializers import serializer_for
+from aedem.fieldsets import fieldset
+from aedem.export import iter_report_batches, export_ndjson, export_csv
+from aedem.stats import delete_reports, report_key, update_report, update_report_stats
+from aedem.batch import insert_reports
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
 
 from aedem.models import Session
 from aedem.models.users import User
 from aedem.models.reports import Report
 from aedem.models.attachments import Attachment
+from aedem.models.stats import ReportStats
 
 namespace = Namespace(
     'reports',
@@ -24,10 +41,10 @@ create_report_model = namespace.model("create_report", {
     "area": fields.String(
         description = "Bairro da denúncia",
         required = True),
-    "geolatitude": fields.String(
+    "geolatitude": fields.Float(
         description = "Coordenada de Latitude da denúncia",
         required = True),
-    "geolongitude": fields.String(
+    "geolongitude": fields.Float(
         description = "Coordenada de Longitude da denúncia",
         required = True),
     "description": fields.String(
@@ -41,22 +58,121 @@ create_report_model = namespace.model("create_report", {
         required = True)
 })
 
+patch_report_model = patch_model(namespace, Report, "patch_report")
+
+delete_report_batch_model = namespace.model("delete_report_batch", {
+    "reports": fields.List(fields.Integer,
+        description = "Identificadores das denúncias",
+        required = True)
+})
+
+def filter_reports(query):
+    """Apply the status, location and date range filters given in the request"""
+    for datafield in ('state_abbr', 'city_name', 'area'):
+        if datafield in request.args:
+            query = query.filter(
+                getattr(Report, datafield) == request.args[datafield])
+
+    try:
+        if 'status' in request.args:
+            status = inputs.boolean(request.args['status'])
+            query = query.filter(Report.status == status)
+        if 'since' in request.args:
+            since = datetime.datetime.fromisoformat(request.args['since'])
+            query = query.filter(Report.created_at >= since)
+        if 'until' in request.args:
+            until = datetime.datetime.fromisoformat(request.args['until'])
+            query = query.filter(Report.created_at < until)
+    except ValueError:
+        namespace.abort(400, 'Invalid status or date, dates use the ISO 8601 format')
+
+    return query
+
+def within_box(query, south, west, north, east):
+    """Restrict query to the reports inside a (south, west, north, east) box"""
+    query = query.filter(Report.geolatitude.between(south, north))
+    if west <= east:
+        return query.filter(Report.geolongitude.between(west, east))
+
+    # box crossing the antimeridian
+    return query.filter(or_(Report.geolongitude >= west,
+        Report.geolongitude <= east))
+
+def nearby_geohash(query, latitude, longitude, radius, limit) -> list:
+    """Find the (distance, id) of the closest reports using the geohash grid
+
+    Candidates are looked up through the geohash and coordinate indexes,
+    and ranked by the database on their equirectangular distance, so only
+    the closest limit reports are fetched; their exact distances are then
+    computed in-process.
+    """
+    # squared equirectangular distance, in degrees of latitude, which ranks
+    # points within the largest search radius as their great-circle distance
+    parallel = math.cos(math.radians(latitude))
+    dlatitude = Report.geolatitude - latitude
+    dlongitude = func.abs(Report.geolongitude - longitude)
+    dlongitude = case([(dlongitude > 180.0, 360.0 - dlongitude)], else_ = dlongitude)
+    distance = dlatitude * dlatitude + dlongitude * dlongitude * (parallel * parallel)
+
+    query = within_box(
+        query.with_entities(Report.id, Report.geolatitude, Report.geolongitude),
+        *geo.bounding_box(latitude, longitude, radius))
+
+    # restrict candidates to the cells covering the search circle
+    precision = geo.precision_for_radius(latitude, radius)
+    if precision:
+        cells = geo.neighbours(geo.encode(latitude, longitude, precision))
+        query = query.filter(
+            or_(*[Report.geohash.like(cell + '%') for cell in cells]))
+
+    distances = []
+    for report_id, report_latitude, report_longitude in \
+            query.order_by(distance, Report.id).limit(limit):
+        meters = geo.haversine(latitude, longitude,
+            report_latitude, report_longitude)
+        if meters <= radius:
+            distances.append((meters, report_id))
+
+    return sorted(distances)
+
+def nearby_postgis(query, latitude, longitude, radius, limit) -> list:
+    """Find the (distance, id) of the closest reports using PostGIS"""
+    location = func.geography(
+        func.ST_MakePoint(Report.geolongitude, Report.geolatitude))
+    center = func.geography(func.ST_MakePoint(longitude, latitude))
+    distance = func.ST_Distance(location, center)
+
+    return query.with_entities(distance, Report.id) \
+        .filter(func.ST_DWithin(location, center, radius)) \
+        .order_by(distance) \
+        .limit(limit).all()
+
 @namespace.route('')
 class ReportList(Resource):
     @namespace.doc('list_reports')
+    @namespace.param('limit', 'Quantidade máxima de denúncias na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(page_validators(Report))
     def get(self):
         '''Listagem de todas as denúncias'''
         session = Session()
 
-        # get list of reports
+        # get page of reports, loading the requested columns only, along
+        # with their attachments
+        serializer = fieldset(Report, listing = True)
+        reports, next_cursor = paginate(session.query(Report)
+            .options(load_only(*serializer.keys), selectinload(Report.attachments)),
+            Report)
+
         res = []
-        for report in session.query(Report).all():
+        for report in reports:
             attachs = []
             for attach in report.attachments:
                 attachs.append(dictionarize(attach))
             
             resp = {
-                "report": dictionarize(report),
+                "report": serializer.dump(report),
                 "attachments": attachs
             }
             res.append(resp)
@@ -67,7 +183,8 @@ class ReportList(Resource):
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": res
+            "response": res,
+            "next_cursor": next_cursor
         }
         return jsonify(response)
 
@@ -81,20 +198,22 @@ class ReportList(Resource):
         reportdata = request.get_json(force = True)
 
         # create database model
-        new_report = Report(
-            state_abbr = reportdata['state_abbr'],
-            city_name = reportdata['city_name'],
-            area = reportdata['area'],
-            geolatitude = reportdata['geolatitude'],
-            geolongitude = reportdata['geolongitude'],
-            description = reportdata['description']
-        )
+        try:
+            new_report = Report(
+                state_abbr = reportdata['state_abbr'],
+                city_name = reportdata['city_name'],
+                area = reportdata['area'],
+                geolatitude = reportdata['geolatitude'],
+                geolongitude = reportdata['geolongitude'],
+                description = reportdata['description']
+            )
+        except (TypeError, ValueError):
+            namespace.abort(400, 'Invalid coordinates, latitude and longitude must be numbers in range')
 
         # check if given user exists
-        user_id = reportdata['user']
-        given_user = session.query(User).filter_by(id = user_id)
+        user = Repository(User).get(reportdata['user'])
 
-        if given_user.scalar() is None:
+        if user is None:
             response = {
                 "status": 404,
                 "message": "Not Found",
@@ -109,14 +228,16 @@ class ReportList(Resource):
                 attachment_addr = attachment
             )
             attach.report = new_report
-            attach.user = given_user.one()
+            attach.user = user
             session.add(attach)
 
         # attach given user
-        new_report.user = given_user.one()
+        new_report.user = user
 
-        # add new report to database
+        # add new report to database, counting it in the statistics
         session.add(new_report)
+        session.flush()
+        update_report_stats(session, {report_key(new_report): 1})
         session.commit()
 
         attachs = []
@@ -136,18 +257,419 @@ class ReportList(Resource):
         }
         return jsonify(response)
 
+@namespace.route('/batch')
+class ReportBatch(Resource):
+    @namespace.doc('create_report_batch')
+    @namespace.expect([create_report_model])
+    def post(self):
+        '''Cria várias denúncias de uma vez, em uma única transação'''
+        session = Session()
+
+        # get list of reports provided in the request
+        batch = request.get_json(force = True)
+        if not isinstance(batch, list) or not batch:
+            response = {
+                "status": 400,
+                "message": "Bad Request",
+                "error": True,
+                "response": "Expected a list of reports"
+            }
+            return jsonify(response)
+
+        if len(batch) > current_app.config['BATCH_MAX_SIZE']:
+            response = {
+                "status": 413,
+                "message": "Payload Too Large",
+                "error": True,
+                "response": "Too many reports in a single batch"
+            }
+            return jsonify(response)
+
+        # check which of the given users exist, with a single query
+        user_ids = set()
+        for reportdata in batch:
+            try:
+                user_ids.add(uuid.UUID(str(reportdata['user'])))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        existing_users = set()
+        if user_ids:
+            for row in session.query(User.id).filter(User.id.in_(user_ids)):
+                existing_users.add(row.id)
+
+        # validate each report, keeping the results in the given order
+        results = [None] * len(batch)
+        valid_reports = []
+        positions = []
+        for index, reportdata in enumerate(batch):
+            try:
+                user_id = uuid.UUID(str(reportdata['user']))
+                new_report = Report(
+                    state_abbr = reportdata['state_abbr'],
+                    city_name = reportdata['city_name'],
+                    area = reportdata.get('area'),
+                    geolatitude = reportdata.get('geolatitude'),
+                    geolongitude = reportdata.get('geolongitude'),
+                    description = reportdata.get('description')
+                )
+                if 'status' in reportdata:
+                    new_report.status = reportdata['status']
+
+                attachments = reportdata.get('attachments', [])
+                if not all(isinstance(attach, str) for attach in attachments):
+                    raise ValueError("Invalid attachment")
+            except (KeyError, TypeError, ValueError, AttributeError):
+                results[index] = {
+                    "status": 400,
+                    "message": "Bad Request",
+                    "error": True,
+                    "response": "Invalid report"
+                }
+                continue
+
+            if user_id not in existing_users:
+                results[index] = {
+                    "status": 404,
+                    "message": "Not Found",
+                    "error": True,
+                    "response": "User not found"
+                }
+                continue
+
+            new_report.user_id = user_id
+            valid_reports.append((new_report, attachments))
+            positions.append(index)
+
+        # add valid reports to database
+        if valid_reports:
+            created = insert_reports(session, valid_reports)
+            session.commit()
+
+            for index, item in zip(positions, created):
+                results[index] = {
+                    "status": 200,
+                    "message": "Success",
+                    "error": False,
+                    "response": item
+                }
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": results
+        }
+        return jsonify(response)
+
+    @namespace.doc('delete_report_batch')
+    @namespace.expect(delete_report_batch_model)
+    def delete(self):
+        '''Deleta várias denúncias de uma vez, junto com os seus anexos e respostas'''
+        session = Session()
+
+        # get list of reports provided in the request
+        data = request.get_json(force = True)
+        identifiers = data.get('reports') if isinstance(data, dict) else None
+        if not isinstance(identifiers, list) or not identifiers:
+            response = {
+                "status": 400,
+                "message": "Bad Request",
+                "error": True,
+                "response": "Expected a list of report identifiers"
+            }
+            return jsonify(response)
+
+        if len(identifiers) > current_app.config['BATCH_MAX_SIZE']:
+            response = {
+                "status": 413,
+                "message": "Payload Too Large",
+                "error": True,
+                "response": "Too many reports in a single batch"
+            }
+            return jsonify(response)
+
+        keys = []
+        for identifier in identifiers:
+            try:
+                keys.append(Repository(Report).coerce(identifier))
+            except ValueError:
+                keys.append(None)
+
+        # delete the reports which exist with a single statement, their
+        # attachments and replies are deleted by the database
+        serializer = serializer_for(Report)
+        deleted = delete_reports(session, Report.id,
+            set(key for key in keys if key is not None), serializer.columns)
+        session.commit()
+        deleted = dict((report.id, report) for report in deleted)
+
+        # report the result of each identifier, in the given order
+        results = []
+        for key in keys:
+            if key in deleted:
+                results.append({
+                    "status": 200,
+                    "message": "Success",
+                    "error": False,
+                    "response": serializer.dump_row(deleted[key])
+                })
+            else:
+                results.append({
+                    "status": 404,
+                    "message": "Not Found",
+                    "error": True,
+                    "response": "Report not found"
+                })
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": results
+        }
+        return jsonify(response)
+
+@namespace.route('/export')
+class ReportExport(Resource):
+    @namespace.doc('export_reports')
+    @namespace.param('format', 'Formato do arquivo: ndjson (padrão) ou csv')
+    @namespace.param('state_abbr', 'Filtra pela abreviação do Estado')
+    @namespace.param('city_name', 'Filtra pelo nome da Cidade')
+    @namespace.param('area', 'Filtra pelo bairro')
+    @namespace.param('since', 'Data inicial de criação (ISO 8601)')
+    @namespace.param('until', 'Data final de criação, exclusiva (ISO 8601)')
+    def get(self):
+        '''Exporta as denúncias e seus anexos em NDJSON ou CSV'''
+        session = Session()
+
+        export_format = request.args.get('format', 'ndjson')
+        if export_format == 'ndjson':
+            encode, mimetype = export_ndjson, 'application/x-ndjson'
+        elif export_format == 'csv':
+            encode, mimetype = export_csv, 'text/csv'
+        else:
+            namespace.abort(400, 'Unsupported export format')
+
+        # select plain report rows, streamed through a server-side cursor
+        query = filter_reports(
+            session.query(*serializer_for(Report).columns)).order_by(Report.id)
+        batches = iter_report_batches(session, query,
+            current_app.config['EXPORT_BATCH_SIZE'])
+
+        # respond request as the rows are read
+        response = Response(stream_with_context(encode(batches)),
+            mimetype = mimetype)
+        response.headers['Content-Disposition'] = \
+            'attachment; filename=reports.{}'.format(export_format)
+        return response
+
+@namespace.route('/nearby')
+class NearbyReports(Resource):
+    @namespace.doc('nearby_reports')
+    @namespace.param('lat', 'Latitude do centro da busca')
+    @namespace.param('lon', 'Longitude do centro da busca')
+    @namespace.param('radius', 'Raio da busca em quilômetros (padrão 1)')
+    @namespace.param('status', 'Filtra pelo estado da denúncia (true para abertas)')
+    @namespace.param('limit', 'Quantidade máxima de denúncias')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def get(self):
+        '''Lista as denúncias mais próximas de um ponto'''
+        session = Session()
+
+        # get search circle provided in the request
+        try:
+            latitude = float(request.args['lat'])
+            longitude = float(request.args['lon'])
+            radius = float(request.args.get('radius', 1)) * 1000
+        except (KeyError, ValueError):
+            namespace.abort(400, 'lat, lon and radius must be numbers')
+
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0) or \
+                not 0 < radius <= current_app.config['GEO_MAX_RADIUS'] * 1000:
+            namespace.abort(400, 'Search circle out of range')
+
+        # find closest reports
+        if current_app.config['GEO_BACKEND'] == 'postgis':
+            nearby = nearby_postgis
+        else:
+            nearby = nearby_geohash
+        distances = nearby(filter_reports(session.query(Report)),
+            latitude, longitude, radius, page_size())
+
+        # load closest reports along with their attachments
+        serializer = fieldset(Report, listing = True)
+        reports = {}
+        if distances:
+            for report in session.query(Report) \
+                    .options(load_only(*serializer.keys), selectinload(Report.attachments)) \
+                    .filter(Report.id.in_([report_id for _, report_id in distances])):
+                reports[report.id] = report
+
+        res = []
+        for distance, report_id in distances:
+            # deleted since its distance was computed
+            report = reports.get(report_id)
+            if report is None:
+                continue
+            attachs = []
+            for attach in report.attachments:
+                attachs.append(dictionarize(attach))
+
+            res.append({
+                "report": serializer.dump(report),
+                "attachments": attachs,
+                "distance": round(distance, 1)
+            })
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": res
+        }
+        return jsonify(response)
+
+@namespace.route('/bbox')
+class BoundingBoxReports(Resource):
+    @namespace.doc('bbox_reports')
+    @namespace.param('south', 'Latitude do limite sul')
+    @namespace.param('west', 'Longitude do limite oeste')
+    @namespace.param('north', 'Latitude do limite norte')
+    @namespace.param('east', 'Longitude do limite leste')
+    @namespace.param('status', 'Filtra pelo estado da denúncia (true para abertas)')
+    @namespace.param('limit', 'Quantidade máxima de denúncias na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def get(self):
+        '''Lista as denúncias dentro de uma área do mapa'''
+        session = Session()
+
+        # get map viewport provided in the request
+        try:
+            box = [float(request.args[datafield])
+                for datafield in ('south', 'west', 'north', 'east')]
+        except (KeyError, ValueError):
+            namespace.abort(400, 'south, west, north and east must be numbers')
+
+        # get page of reports inside the viewport
+        serializer = fieldset(Report, listing = True)
+        query = within_box(filter_reports(session.query(Report)), *box)
+        reports, next_cursor = paginate(query.options(
+            load_only(*serializer.keys), selectinload(Report.attachments)), Report)
+
+        res = []
+        for report in reports:
+            attachs = []
+            for attach in report.attachments:
+                attachs.append(dictionarize(attach))
+
+            res.append({
+                "report": serializer.dump(report),
+                "attachments": attachs
+            })
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": res,
+            "next_cursor": next_cursor
+        }
+        return jsonify(response)
+
+@namespace.route('/stats')
+class ReportStatistics(Resource):
+    @namespace.doc('report_stats')
+    @namespace.param('group_by', 'Agrupamento: state, city ou area (padrão)')
+    @namespace.param('daily', 'Separa as contagens por dia (true ou false)')
+    @namespace.param('state_abbr', 'Filtra pela abreviação do Estado')
+    @namespace.param('city_name', 'Filtra pelo nome da Cidade')
+    @namespace.param('area', 'Filtra pelo bairro')
+    @namespace.param('since', 'Dia inicial (ISO 8601)')
+    @namespace.param('until', 'Dia final, exclusivo (ISO 8601)')
+    def get(self):
+        '''Contagem de denúncias abertas e fechadas por região'''
+        session = Session()
+
+        # get grouping provided in the request
+        groupings = {
+            'state': ('state_abbr',),
+            'city': ('state_abbr', 'city_name'),
+            'area': ('state_abbr', 'city_name', 'area')
+        }
+        group_by = request.args.get('group_by', 'area')
+        if group_by not in groupings:
+            namespace.abort(400, 'Invalid grouping')
+
+        try:
+            daily = inputs.boolean(request.args.get('daily', False))
+        except ValueError:
+            namespace.abort(400, 'Invalid daily flag')
+
+        columns = [getattr(ReportStats, datafield)
+            for datafield in groupings[group_by]]
+        if daily:
+            columns.append(ReportStats.day)
+
+        # sum precomputed statistics of each group
+        query = session.query(*columns,
+                func.sum(ReportStats.open_count).label('open'),
+                func.sum(ReportStats.closed_count).label('closed')) \
+            .group_by(*columns) \
+            .order_by(*columns)
+
+        for datafield in ('state_abbr', 'city_name', 'area'):
+            if datafield in request.args:
+                query = query.filter(
+                    getattr(ReportStats, datafield) == request.args[datafield])
+
+        try:
+            if 'since' in request.args:
+                since = datetime.date.fromisoformat(request.args['since'])
+                query = query.filter(ReportStats.day >= since)
+            if 'until' in request.args:
+                until = datetime.date.fromisoformat(request.args['until'])
+                query = query.filter(ReportStats.day < until)
+        except ValueError:
+            namespace.abort(400, 'Invalid date, use the ISO 8601 format')
+
+        res = []
+        for row in query:
+            group = row._asdict()
+            if 'area' in group:
+                group['area'] = group['area'] or None
+            if 'day' in group:
+                group['day'] = group['day'].isoformat()
+            group['open'] = int(group['open'])
+            group['closed'] = int(group['closed'])
+            res.append(group)
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": res
+        }
+        return jsonify(response)
+
 @namespace.route('/<id>')
 @namespace.param('id', 'Identificador da denúncia')
 @namespace.response(404, 'Denúncia não encontrada')
 class SpecificReport(Resource):
     @namespace.doc('get_report')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(row_validators(Report, joinedload(Report.attachments)))
     def get(self, id):
         '''Mostrar uma denúncia específica'''
-        session = Session()
-
-        report = session.query(Report).filter_by(id = id).first()
-        if report is None:
-            namespace.abort(404)
+        # loaded by the validators of the request, from the identity map
+        serializer = fieldset(Report)
+        report = Repository(Report).get_or_404(id, joinedload(Report.attachments))
 
         attachs = []
 
@@ -160,7 +682,7 @@ class SpecificReport(Resource):
             "message": "Success",
             "error": False,
             "response": {
-                "report": dictionarize(report),
+                "report": serializer.dump(report),
                 "attachments": attachs
             }
         }
@@ -168,25 +690,23 @@ class SpecificReport(Resource):
 
     @namespace.doc('delete_report')
     def delete(self, id):
-        '''Deleta uma denúncia existente'''
+        '''Deleta uma denúncia existente, junto com os seus anexos e respostas'''
         session = Session()
 
-        # look up given report
-        given_report = session.query(Report).filter_by(id = id)
-
-        # check if given report exists
-        if given_report.scalar() is None:
+        try:
+            report_id = Repository(Report).coerce(id)
+        except ValueError:
             namespace.abort(404)
 
-        # delete report from database
-        report = given_report.one()
-        # delete the attachments of the report
-        attachs = []
-        for attach in report.attachments:
-            attachs.append(dictionarize(attach))
-            session.delete(attach)
-        records = dictionarize(report)
-        session.delete(report)
+        # delete the attachments, then the report, with a statement each and
+        # without loading them; replies are deleted by the database
+        attachment_serializer = serializer_for(Attachment)
+        attachs = Repository(Attachment).delete_where(Attachment.report_id == report_id,
+            *attachment_serializer.columns)
+        serializer = serializer_for(Report)
+        reports = delete_reports(session, Report.id, [report_id], serializer.columns)
+        if not reports:
+            namespace.abort(404)
         session.commit()
 
         # respond request
@@ -195,8 +715,8 @@ class SpecificReport(Resource):
             "message": "Success",
             "error": False,
             "response": {
-                "report": records,
-                "attachments": attachs
+                "report": serializer.dump_row(reports[0]),
+                "attachments": [attachment_serializer.dump_row(attach) for attach in attachs]
             }
         }
         return jsonify(response)
@@ -206,18 +726,22 @@ class SpecificReport(Resource):
         '''Atualiza os dados de uma denúncia'''
         session = Session()
 
-        # look up given report
-        given_report = session.query(Report).filter_by(id = id)
-
-        # check if given report exists
-        if given_report.scalar() is None:
-            namespace.abort(404)
+        # look up given report along with its attachments
+        report = Repository(Report).get_or_404(id, joinedload(Report.attachments))
 
         # update report data with given values
-        report = given_report.one()
+        old_key = report_key(report)
 
-        for datafield in request.args:
-            setattr(report, datafield, request.args[datafield])
+        try:
+            for datafield in request.args:
+                setattr(report, datafield, request.args[datafield])
+        except (TypeError, ValueError):
+            namespace.abort(400, 'Invalid coordinates, latitude and longitude must be numbers in range')
+
+        # move report between statistics if needed
+        new_key = report_key(report)
+        if new_key != old_key:
+            update_report_stats(session, {old_key: -1, new_key: 1})
 
         session.add(report)
         session.commit()
@@ -238,4 +762,30 @@ class SpecificReport(Resource):
             }
         }
 
+        return jsonify(response)
+
+    @namespace.doc('patch_report')
+    @namespace.expect(patch_report_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def patch(self, id):
+        '''Atualiza os campos de uma denúncia dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(Report)
+        serializer = fieldset(Report)
+        report = update_report(session, id, values, serializer.columns)
+        if report is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": {
+                "report": serializer.dump_row(report)
+            }
+        }
         return jsonify(response)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from flask import jsonify
+from flask_restplus import Namespace, Resource
+
+from aedem.models import get_engine
+
+namespace = Namespace(
+    'status',
+    path = "/status",
+    description = 'Operações de monitoramento da API'
+)
+
+@namespace.route('/pool')
+class PoolStatus(Resource):
+    @namespace.doc('pool_status')
+    def get(self):
+        '''Mostra o uso do pool de conexões deste processo'''
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": get_engine().pool.stats()
+        }
+        return jsonify(response)
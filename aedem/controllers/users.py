@@ -1,10 +1,20 @@
-from flask import jsonify, request
-from flask_restplus import Namespace, Resource, fields
+from flask import Response, current_app, g, jsonify, request
+from flask_restplus import Namespace, Resource, fields, inputs
 
 from aedem.utils import dictionarize
+from aedem.pagination import paginate
+from aedem.conditional import conditional, page_validators, row_validators
+from aedem.fieldsets import fieldset
+from aedem.repository import Repository
+from aedem.patches import patch_model, patch_values
+from aedem.inbox import mark_read, stream_notifications
+from aedem.serializers import serializer_for
+from aedem.stats import delete_reports
 
 from aedem.models import Session
 from aedem.models.users import User
+from aedem.models.notifications import Notification
+from aedem.models.reports import Report
 
 namespace = Namespace(
     'users',
@@ -48,24 +58,61 @@ create_user_model = namespace.model("create_user", {
         required = True)
 })
 
+mark_read_model = namespace.model("mark_read", {
+    "ids": fields.List(fields.Integer,
+        description = "Identificadores das notificações lidas; todas, se omitido",
+        required = False)
+})
+
+patch_user_model = patch_model(namespace, User, "patch_user")
+
+def user_notifications(query, id):
+    """Restrict query to the notifications of a user, unread ones only if asked"""
+    query = query.filter(Notification.user_id == id)
+    try:
+        if inputs.boolean(request.args.get('unread', False)):
+            query = query.filter(Notification.read_at.is_(None))
+    except ValueError:
+        namespace.abort(400, 'Invalid unread flag')
+    return query
+
+def notifications_scope(query, *args, id):
+    """Restrict the page validators query to the notifications of a user
+
+    The user is looked up first, so unknown or malformed ids are answered
+    with 404 before any notification is queried.
+    """
+    user = Repository(User).get_or_404(id)
+    # the identity map holds rows weakly, keep it until the handler runs
+    g.validated_row = user
+    return user_notifications(query, user.id)
+
 @namespace.route('')
 class UserList(Resource):
     @namespace.doc('list_users')
+    @namespace.param('limit', 'Quantidade máxima de usuários na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(page_validators(User))
     def get(self):
         '''Listagem de todos os usuários'''
         session = Session()
 
-        # get list of users
+        # get page of users as plain rows, without building ORM objects
+        serializer = fieldset(User, listing = True)
+        page, next_cursor = paginate(session.query(*serializer.columns), User)
+
         users = []
-        for user in session.query(User).all():
-            users.append(dictionarize(user))
+        for row in page:
+            users.append(serializer.dump_row(row))
         
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": users
+            "response": users,
+            "next_cursor": next_cursor
         }
         return jsonify(response)
     
@@ -78,6 +125,11 @@ class UserList(Resource):
         # get user data provided in the request
         userdata = request.get_json(force = True)
 
+        try:
+            birthday = inputs.date_from_iso8601(userdata['birthday'])
+        except ValueError:
+            namespace.abort(400, 'Invalid birthday, expected YYYY-MM-DD')
+
         # create database model
         new_user = User(
             name = userdata['name'],
@@ -85,7 +137,7 @@ class UserList(Resource):
             phone = userdata['phone'],
             passhash = userdata['passhash'],
             salt = userdata['salt'],
-            birthday = userdata['birthday'],
+            birthday = birthday,
             zip_code = userdata['zip_code'],
             state_abbr = userdata['state_abbr'],
             city_name = userdata['city_name'],
@@ -111,39 +163,41 @@ class UserList(Resource):
 @namespace.response(404, 'Usuário não encontrado')
 class SpecificUser(Resource):
     @namespace.doc('get_user')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(row_validators(User))
     def get(self, id):
         '''Mostrar um usuário específico'''
-        session = Session()
-
-        user = session.query(User).filter_by(id = id).first()
-        if user is None:
-            namespace.abort(404)
+        # loaded by the validators of the request, from the identity map
+        serializer = fieldset(User)
+        user = Repository(User).get_or_404(id)
         
         # respond request
         response = {
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": dictionarize(user)
+            "response": serializer.dump(user)
         }
         return jsonify(response)
 
     @namespace.doc('delete_user')
     def delete(self, id):
-        '''Deleta um usuário existente'''
+        '''Deleta um usuário existente, junto com as suas denúncias, respostas e notificações'''
         session = Session()
 
-        # look up given user
-        given_user = session.query(User).filter_by(id = id)
-
-        # check if given user exists
-        if given_user.scalar() is None:
+        try:
+            user_id = Repository(User).coerce(id)
+        except ValueError:
             namespace.abort(404)
 
-        # delete user from database
-        user = given_user.one()
-        records = dictionarize(user)
-        session.delete(user)
+        # delete the reports of the user first, counting them out of the
+        # statistics, then the user; attachments, replies and notifications
+        # are deleted by the database, without being loaded
+        delete_reports(session, Report.user_id, [user_id], (Report.id,))
+        serializer = serializer_for(User)
+        user = Repository(User).delete(user_id, *serializer.columns)
+        if user is None:
+            namespace.abort(404)
         session.commit()
 
         # respond request
@@ -151,7 +205,7 @@ class SpecificUser(Resource):
             "status": 200,
             "message": "Success",
             "error": False,
-            "response": records
+            "response": serializer.dump_row(user)
         }
         return jsonify(response)
 
@@ -161,15 +215,9 @@ class SpecificUser(Resource):
         session = Session()
 
         # look up given user
-        given_user = session.query(User).filter_by(id = id)
-
-        # check if given user exists
-        if given_user.scalar() is None:
-            namespace.abort(404)
+        user = Repository(User).get_or_404(id)
 
         # update user data with given values
-        user = given_user.one()
-
         for datafield in request.args:
             setattr(user, datafield, request.args[datafield])
 
@@ -184,3 +232,160 @@ class SpecificUser(Resource):
             "response": dictionarize(user)
         }
         return jsonify(response)
+
+    @namespace.doc('patch_user')
+    @namespace.expect(patch_user_model)
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    def patch(self, id):
+        '''Atualiza os campos de um usuário dados em JSON, em uma única instrução'''
+        session = Session()
+
+        # write the given columns and read the requested ones back at once
+        values = patch_values(User)
+        serializer = fieldset(User)
+        user = Repository(User).update(id, values, *serializer.columns)
+        if user is None:
+            namespace.abort(404)
+        session.commit()
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": serializer.dump_row(user)
+        }
+        return jsonify(response)
+
+@namespace.route('/<id>/notifications')
+@namespace.param('id', 'Identificador do usuário')
+@namespace.response(404, 'Usuário não encontrado')
+class UserNotificationList(Resource):
+    @namespace.doc('list_user_notifications')
+    @namespace.param('unread', 'Listar apenas as notificações não lidas')
+    @namespace.param('limit', 'Quantidade máxima de notificações na página')
+    @namespace.param('cursor', 'Cursor da página seguinte')
+    @namespace.param('fields', 'Campos retornados, separados por vírgula')
+    @conditional(page_validators(Notification, scope = notifications_scope))
+    def get(self, id):
+        '''Lista as notificações de um usuário'''
+        session = Session()
+
+        # check if given user exists
+        try:
+            user_id = Repository(User).coerce(id)
+        except ValueError:
+            namespace.abort(404)
+        if not Repository(User).exists(user_id):
+            namespace.abort(404)
+
+        # get page of notifications of the user as plain rows
+        serializer = fieldset(Notification, listing = True)
+        page, next_cursor = paginate(
+            user_notifications(session.query(*serializer.columns), user_id), Notification)
+
+        notifications = []
+        for row in page:
+            notifications.append(serializer.dump_row(row))
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": notifications,
+            "next_cursor": next_cursor
+        }
+        return jsonify(response)
+
+@namespace.route('/<id>/notifications/stream')
+@namespace.param('id', 'Identificador do usuário')
+@namespace.response(404, 'Usuário não encontrado')
+class UserNotificationStream(Resource):
+    @namespace.doc('stream_user_notifications')
+    @namespace.param('Last-Event-ID', 'Identificador da última notificação recebida',
+        _in = 'header')
+    def get(self, id):
+        '''Envia as novas notificações de um usuário assim que são criadas (Server-Sent Events)'''
+        # check if given user exists
+        if not Repository(User).exists(id):
+            namespace.abort(404)
+
+        # resume after the last notification received by a reconnecting client
+        last_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+        if last_id is not None:
+            try:
+                last_id = int(last_id)
+            except ValueError:
+                namespace.abort(400, 'Invalid last event id')
+
+        # stream notifications; the database session of this request is
+        # released once it returns, so idle streams hold no connection
+        events = stream_notifications(id, last_id,
+            keepalive = current_app.config['STREAM_KEEPALIVE'],
+            timeout = current_app.config['STREAM_TIMEOUT'])
+        return Response(events, mimetype = 'text/event-stream', headers = {
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+
+@namespace.route('/<id>/notifications/unread')
+@namespace.param('id', 'Identificador do usuário')
+@namespace.response(404, 'Usuário não encontrado')
+class UserUnreadCount(Resource):
+    @namespace.doc('count_user_unread_notifications')
+    def get(self, id):
+        '''Mostra a quantidade de notificações não lidas de um usuário'''
+        # read the counter kept along with the notifications of the user
+        user = Repository(User).columns_or_404(id, User.unread_notifications)
+        unread = user.unread_notifications
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": {"unread": unread}
+        }
+        return jsonify(response)
+
+@namespace.route('/<id>/notifications/read')
+@namespace.param('id', 'Identificador do usuário')
+@namespace.response(404, 'Usuário não encontrado')
+class UserNotificationsRead(Resource):
+    @namespace.doc('mark_user_notifications_read')
+    @namespace.expect(mark_read_model)
+    def post(self, id):
+        '''Marca notificações de um usuário como lidas'''
+        session = Session()
+
+        # check if given user exists
+        try:
+            user_id = Repository(User).coerce(id)
+        except ValueError:
+            namespace.abort(404)
+        if not Repository(User).exists(user_id):
+            namespace.abort(404)
+
+        # mark the given notifications, or all of them, in a single update
+        data = request.get_json(silent = True) or {}
+        if not isinstance(data, dict):
+            namespace.abort(400, 'Request body must be a JSON object')
+        identifiers = data.get('ids')
+        if identifiers is not None and (not isinstance(identifiers, list) or
+                not all(isinstance(identifier, int) for identifier in identifiers)):
+            namespace.abort(400, 'ids must be a list of notification identifiers')
+
+        marked = mark_read(session, user_id, identifiers)
+        session.commit()
+
+        unread = Repository(User).columns(user_id, User.unread_notifications).unread_notifications
+
+        # respond request
+        response = {
+            "status": 200,
+            "message": "Success",
+            "error": False,
+            "response": {"marked": marked, "unread": unread}
+        }
+        return jsonify(response)
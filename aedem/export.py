@@ -0,0 +1,78 @@
+import csv
+import io
+import itertools
+import json
+
+from aedem.serializers import serializer_for
+from aedem.models.reports import Report
+from aedem.models.attachments import Attachment
+
+_encoder = json.JSONEncoder(separators = (',', ':'))
+
+def iter_report_batches(session, query, batch_size):
+    """Read reports through a server-side cursor, in batches
+
+    query must select the columns of serializer_for(Report). Yields lists
+    of (report row, attachment rows) pairs; the attachments of a batch are
+    fetched with a single query, so memory usage is bounded by batch_size
+    whatever the number of exported reports.
+    """
+    attachment_columns = serializer_for(Attachment).columns
+    reports = iter(query
+        .execution_options(stream_results = True)
+        .yield_per(batch_size))
+
+    while True:
+        batch = list(itertools.islice(reports, batch_size))
+        if not batch:
+            return
+
+        # group attachments of the batch by report
+        attachments = {}
+        for row in session.query(*attachment_columns) \
+                .filter(Attachment.report_id.in_([report.id for report in batch])) \
+                .order_by(Attachment.id):
+            attachments.setdefault(row.report_id, []).append(row)
+
+        yield [(report, attachments.get(report.id, [])) for report in batch]
+
+def export_ndjson(batches):
+    """Encode report batches as newline delimited JSON"""
+    report_serializer = serializer_for(Report)
+    attachment_serializer = serializer_for(Attachment)
+
+    for batch in batches:
+        lines = []
+        for report, attachments in batch:
+            lines.append(_encoder.encode({
+                "report": report_serializer.dump_row(report),
+                "attachments": [attachment_serializer.dump_row(attachment)
+                    for attachment in attachments]
+            }))
+        lines.append('')
+        yield '\n'.join(lines).encode()
+
+def export_csv(batches):
+    """Encode report batches as CSV, one line per report
+
+    Attachment addresses of a report are joined by spaces in the
+    `attachments` column.
+    """
+    report_serializer = serializer_for(Report)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(report_serializer.keys + ('attachments',))
+    for batch in batches:
+        for report, attachments in batch:
+            record = report_serializer.dump_row(report)
+            writer.writerow([record[key] for key in report_serializer.keys] +
+                [' '.join(attachment.attachment_addr for attachment in attachments)])
+
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,29 @@
+from flask import request
+from flask_restplus import abort
+
+from aedem.serializers import serializer_for
+
+def fieldset(model, listing = False):
+    """Serializer of the columns of model asked for in the `fields` query parameter
+
+    `fields` is a comma separated list of column names. When it is not
+    given, every column is serialized, except on listings, which leave out
+    the large columns listed in the `__deferred_columns__` of the model.
+    Handlers select or load the columns of the returned serializer only, so
+    the other ones are never fetched from the database.
+    """
+    serializer = serializer_for(model)
+
+    fields = request.args.get('fields')
+    if fields is None:
+        deferred = getattr(model, '__deferred_columns__', ()) if listing else ()
+        if not deferred:
+            return serializer
+        return serializer.project(key for key in serializer.keys if key not in deferred)
+
+    keys = [key.strip() for key in fields.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in serializer.keys]
+    if unknown:
+        abort(400, 'Unknown fields: {}; available fields are {}'.format(
+            ', '.join(unknown), ', '.join(serializer.keys)))
+    return serializer.project(keys)
@@ -0,0 +1,127 @@
+import math
+
+# mean Earth radius, in meters
+EARTH_RADIUS = 6371008.8
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def encode(latitude, longitude, precision = 12) -> str:
+    """Encode a coordinate as a geohash of the given precision"""
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+
+    geohash = []
+    bits, bit_count, even = 0, 0, True
+    while len(geohash) < precision:
+        # even bits split longitude, odd bits split latitude
+        if even:
+            interval, value = longitude_range, longitude
+        else:
+            interval, value = latitude_range, latitude
+
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            interval[0] = middle
+        else:
+            bits = bits * 2
+            interval[1] = middle
+
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+
+    return ''.join(geohash)
+
+def cell_size(precision) -> tuple:
+    """Height and width, in degrees, of the geohash cells of a precision"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+def decode(geohash) -> tuple:
+    """Decode a geohash into the coordinate of the center of its cell"""
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+
+    even = True
+    for char in geohash:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = longitude_range if even else latitude_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+
+    return (sum(latitude_range) / 2, sum(longitude_range) / 2)
+
+def neighbours(geohash) -> list:
+    """List the cell of geohash along with its (up to) eight neighbours"""
+    latitude, longitude = decode(geohash)
+    height, width = cell_size(len(geohash))
+
+    cells = []
+    for dlat in (-1, 0, 1):
+        cell_latitude = latitude + dlat * height
+        if not -90.0 <= cell_latitude <= 90.0:
+            continue
+        for dlon in (-1, 0, 1):
+            # wrap around the antimeridian
+            cell_longitude = (longitude + dlon * width + 180.0) % 360.0 - 180.0
+            cell = encode(cell_latitude, cell_longitude, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+def precision_for_radius(latitude, radius) -> int:
+    """Longest geohash precision whose cells are at least radius meters wide
+
+    A circle of that radius is then covered by the cell of its center and
+    the neighbours of that cell. Returns 0 when even the largest cells are
+    too small.
+    """
+    meters_per_degree = math.pi * EARTH_RADIUS / 180.0
+    parallel = math.cos(math.radians(latitude))
+
+    for precision in range(12, 0, -1):
+        height, width = cell_size(precision)
+        if height * meters_per_degree >= radius and \
+                width * meters_per_degree * parallel >= radius:
+            return precision
+    return 0
+
+def haversine(latitude1, longitude1, latitude2, longitude2) -> float:
+    """Great-circle distance between two coordinates, in meters"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(longitude2 - longitude1)
+
+    a = math.sin(dphi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(latitude, longitude, radius) -> tuple:
+    """Smallest (south, west, north, east) box containing a circle
+
+    When the box crosses the antimeridian, west is greater than east.
+    """
+    dlat = math.degrees(radius / EARTH_RADIUS)
+    south, north = latitude - dlat, latitude + dlat
+
+    # boxes which contain a pole span every longitude
+    if south <= -90.0 or north >= 90.0:
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+
+    dlon = math.degrees(math.asin(
+        min(1.0, math.sin(radius / EARTH_RADIUS) / math.cos(math.radians(latitude)))))
+    west, east = longitude - dlon, longitude + dlon
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+
+    return south, west, north, east
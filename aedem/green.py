@@ -0,0 +1,46 @@
+import threading
+
+try:
+    import gevent.monkey
+    import gevent.socket
+except ImportError:
+    gevent = None
+
+def is_green() -> bool:
+    """Whether the process runs on gevent, with the standard library patched"""
+    return gevent is not None and gevent.monkey.is_module_patched('socket')
+
+def thread_local():
+    """Storage local to the OS thread, shared by its greenlets when gevent patched threading"""
+    if gevent is not None:
+        return gevent.monkey.get_original('threading', 'local')()
+    return threading.local()
+
+def wait_callback(connection, timeout = None) -> None:
+    """Wait for psycopg2 connection without blocking the other greenlets"""
+    import psycopg2
+    from psycopg2 import extensions
+
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            gevent.socket.wait_read(connection.fileno(), timeout = timeout)
+        elif state == extensions.POLL_WRITE:
+            gevent.socket.wait_write(connection.fileno(), timeout = timeout)
+        else:
+            raise psycopg2.OperationalError("Bad result from poll: {!r}".format(state))
+
+def init_green() -> None:
+    """Make PostgreSQL queries cooperative when the process runs on gevent
+
+    psycopg2 is switched to its asynchronous mode, so that a greenlet
+    waiting for the database lets the others handle their requests, and
+    idle notification streams cost a greenlet rather than a thread. Does
+    nothing otherwise.
+    """
+    if not is_green():
+        return
+    from psycopg2 import extensions
+    extensions.set_wait_callback(wait_callback)
@@ -0,0 +1,255 @@
+import datetime
+import json
+import queue
+import time
+
+from sqlalchemy import and_, func, literal, or_, select
+
+from aedem.pubsub import get_broker
+from aedem.repository import Repository
+from aedem.serializers import serializer_for
+from aedem.models import Session
+from aedem.models.users import User
+from aedem.models.notifications import Notification
+from aedem.models.broadcasts import Broadcast
+
+# user columns a broadcast may target users by
+BROADCAST_TARGETS = ('state_abbr', 'city_name', 'area', 'flag_id')
+
+def update_unread_count(session, deltas) -> None:
+    """Add deltas, a mapping of user id to unread notification counts, to the counters
+
+    Counters are incremented in place by the database, so concurrent
+    updates never overwrite each other, and are committed together with
+    the notifications that changed them.
+    """
+    for user_id, delta in deltas.items():
+        if delta == 0:
+            continue
+
+        session.query(User).filter(User.id == user_id).update(
+            {User.unread_notifications: User.unread_notifications + delta},
+            synchronize_session = False)
+
+def mark_read(session, user_id, identifiers = None) -> int:
+    """Mark unread notifications of a user as read, returning how many were
+
+    Every notification is marked when identifiers is None. Notifications
+    are marked in a single UPDATE whose row count is taken off the counter.
+    """
+    query = session.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.read_at.is_(None))
+    if identifiers is not None:
+        query = query.filter(Notification.id.in_(identifiers))
+
+    count = query.update({Notification.read_at: func.now()},
+        synchronize_session = False)
+    update_unread_count(session, {user_id: -count})
+    return count
+
+def publish_notification(session, notification) -> None:
+    """Push notification to the streams of its user once session commits"""
+    get_broker().publish(session, {
+        "user_id": str(notification.user_id),
+        "notification": serializer_for(Notification).dump(notification)
+    })
+
+def stream_notifications(user_id, last_id = None, keepalive = 15, timeout = 300):
+    """Server-Sent Events carrying the notifications of a user as they are created
+
+    Notifications created after last_id, the id of the last event a
+    reconnecting client received, are sent first. Afterwards, the stream
+    waits for published notifications without holding a database
+    connection, sending a comment every keepalive seconds, and ends after
+    timeout seconds, after which clients reconnect. user_id may be given
+    in any of the spellings of a UUID, such as the one of a URL.
+    """
+    # messages are published under the canonical spelling of the user id
+    user_id = Repository(User).coerce(user_id)
+    broker = get_broker()
+    serializer = serializer_for(Notification)
+
+    def missed(since):
+        # fetch notifications which were not pushed along with their message
+        rows = [serializer.dump_row(row) for row in Session()
+            .query(*serializer.columns)
+            .filter(Notification.user_id == user_id, Notification.id > since)
+            .order_by(Notification.id)]
+        Session.remove()
+        return rows
+
+    def event(notification) -> str:
+        return "id: {}\nevent: notification\ndata: {}\n\n".format(
+            notification['id'], json.dumps(notification, separators = (',', ':')))
+
+    def generate(newest):
+        # subscribe before looking for missed notifications, so none is lost
+        subscriber = broker.subscribe(user_id)
+        try:
+            if newest is None:
+                # only notifications created from now on are sent
+                newest = Session().query(func.max(Notification.id)).filter(
+                    Notification.user_id == user_id).scalar() or 0
+                Session.remove()
+                pending = []
+            else:
+                pending = missed(newest)
+
+            sent = set()
+            deadline = time.monotonic() + timeout
+            yield "retry: 1000\n\n"
+            while True:
+                for notification in pending:
+                    if notification['id'] not in sent:
+                        sent.add(notification['id'])
+                        newest = max(newest, notification['id'])
+                        yield event(notification)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    message = subscriber.get(timeout = min(keepalive, remaining))
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    pending = []
+                    continue
+
+                if 'notification' in message:
+                    pending = [message['notification']]
+                else:
+                    pending = missed(newest)
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+
+    return generate(last_id)
+
+def broadcast_targets(broadcast) -> list:
+    """Conditions selecting the users targeted by broadcast"""
+    return [getattr(User, datafield) == getattr(broadcast, datafield)
+        for datafield in BROADCAST_TARGETS
+        if getattr(broadcast, datafield) is not None]
+
+def claim_broadcast(session, broadcast_id, stale_after) -> bool:
+    """Mark a broadcast as running, returning whether it was ready to be sent
+
+    Pending broadcasts are ready, and so are running ones whose progress
+    was not committed for stale_after seconds, such as those of a process
+    which stopped. The broadcast is claimed by a single UPDATE, so that
+    processes resuming broadcasts together never send the same one.
+    """
+    now = datetime.datetime.now()
+    claimed = session.query(Broadcast) \
+        .filter(Broadcast.id == broadcast_id, or_(
+            Broadcast.status == 'pending',
+            and_(Broadcast.status == 'running',
+                Broadcast.last_updated < now - datetime.timedelta(seconds = stale_after)))) \
+        .update({Broadcast.status: 'running', Broadcast.last_updated: now},
+            synchronize_session = False)
+    session.commit()
+    return claimed == 1
+
+def resume_broadcasts(session, stale_after) -> list:
+    """Ids of the broadcasts pending, or left running by a process which stopped"""
+    stale = datetime.datetime.now() - datetime.timedelta(seconds = stale_after)
+    return [row.id for row in session.query(Broadcast.id)
+        .filter(or_(
+            Broadcast.status == 'pending',
+            and_(Broadcast.status == 'running', Broadcast.last_updated < stale)))
+        .order_by(Broadcast.id)]
+
+def send_broadcast(broadcast_id, batch_size, stale_after) -> None:
+    """Notify every user targeted by a broadcast, batch_size users at a time
+
+    Each batch is committed along with the progress of the broadcast and
+    the id of the last user notified, so users are never notified twice,
+    the progress can be followed from any process, and a broadcast
+    interrupted by a restart resumes after its last batch. Does nothing
+    when the broadcast is not ready to be sent, see claim_broadcast. Meant
+    to run as a background job.
+    """
+    session = Session()
+    if not claim_broadcast(session, broadcast_id, stale_after):
+        return
+    broadcast = session.query(Broadcast).get(broadcast_id)
+
+    targets = broadcast_targets(broadcast)
+    if broadcast.total is None:
+        broadcast.total = session.query(func.count(User.id)).filter(*targets).scalar()
+        session.commit()
+
+    if session.get_bind(User.__mapper__).dialect.name == 'postgresql':
+        notify_batch = _notify_batch
+    else:
+        notify_batch = _notify_batch_orm
+
+    sent = broadcast.sent
+    last_user_id = broadcast.last_user_id
+    try:
+        while True:
+            # walk the targeted users in primary key order
+            query = select([User.id]).where(and_(*targets))
+            if last_user_id is not None:
+                query = query.where(User.id > last_user_id)
+            query = query.order_by(User.id).limit(batch_size)
+
+            identifiers = notify_batch(session, query,
+                broadcast.notiftype, broadcast.content)
+            if not identifiers:
+                break
+
+            # push the new notifications to the streams of their users only
+            get_broker().publish(session, {"user_ids": [
+                str(identifier) for identifier in identifiers]})
+
+            sent += len(identifiers)
+            last_user_id = max(identifiers)
+            broadcast.sent = sent
+            broadcast.last_user_id = last_user_id
+            session.commit()
+
+        broadcast.status = 'done'
+        session.commit()
+    except Exception as error:
+        session.rollback()
+        broadcast.status = 'failed'
+        broadcast.error = str(error)
+        session.commit()
+        raise
+
+def _notify_batch(session, users, notiftype, content) -> list:
+    """Notify the users selected by users in a single statement, returning their ids
+
+    The notifications are inserted with INSERT ... SELECT and the counters
+    of the users they were inserted for are incremented by the same
+    statement, which sees a single snapshot of the users table.
+    """
+    batch = users.cte('batch')
+    notifications = Notification.__table__
+    inserted = notifications.insert().from_select(
+        ['user_id', 'notiftype', 'content'],
+        select([batch.c.id, literal(notiftype), literal(content)])
+    ).returning(notifications.c.user_id).cte('inserted')
+
+    table = User.__table__
+    return [row.id for row in session.execute(table.update()
+        .values(
+            unread_notifications = table.c.unread_notifications + 1,
+            last_updated = func.now())
+        .where(table.c.id == inserted.c.user_id)
+        .returning(table.c.id))]
+
+def _notify_batch_orm(session, users, notiftype, content) -> list:
+    """Notify the users selected by users, for databases without RETURNING"""
+    identifiers = [row.id for row in session.execute(users)]
+    if not identifiers:
+        return identifiers
+
+    table = User.__table__
+    session.execute(Notification.__table__.insert().from_select(
+        ['user_id', 'notiftype', 'content'],
+        select([table.c.id, literal(notiftype), literal(content)])
+        .where(table.c.id.in_(identifiers))))
+    update_unread_count(session, dict((identifier, 1) for identifier in identifiers))
+    return identifiers
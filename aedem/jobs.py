@@ -0,0 +1,42 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from aedem.models import Session
+
+logger = logging.getLogger(__name__)
+
+# executor of the current process, created on first use like the engine
+_executor = None
+_executor_pid = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """Thread pool running the background jobs of the current process"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers = current_app.config['JOB_WORKERS'],
+            thread_name_prefix = 'aedem-job')
+        _executor_pid = os.getpid()
+    return _executor
+
+def submit(function, *args, **kwargs):
+    """Run function in the background, outside of the current request
+
+    The job runs in an application context of its own and with its own
+    database session, which is removed once it returns.
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                logger.exception("Background job %r failed", function)
+                raise
+            finally:
+                Session.remove()
+    return get_executor().submit(run)
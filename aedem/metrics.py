@@ -0,0 +1,225 @@
+import bisect
+import os
+import threading
+import time
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+
+from aedem.green import thread_local
+
+# statements, database time and rows of the request handled by each thread
+_requests = threading.local()
+
+class RequestMetrics(object):
+    """Measures of a single request, recorded by the thread handling it"""
+    __slots__ = ('started', 'statements', 'db_time', 'rows', 'statement_started')
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.statement_started = None
+
+def instrument_engine(engine) -> None:
+    """Count the statements, database time and rows of each request on engine"""
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    event.listen(engine, 'after_cursor_execute', _after_execute)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(_requests, 'current', None)
+    if current is not None:
+        current.statement_started = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    current = getattr(_requests, 'current', None)
+    if current is None or current.statement_started is None:
+        return
+    current.statements += 1
+    current.db_time += time.perf_counter() - current.statement_started
+    current.statement_started = None
+    # statements returning rows, RETURNING clauses included
+    if cursor.description is not None and cursor.rowcount > 0:
+        current.rows += cursor.rowcount
+
+class _Series(object):
+    __slots__ = ('buckets', 'duration', 'statements', 'db_time', 'rows', 'size', 'statuses')
+
+    def __init__(self, buckets) -> None:
+        self.buckets = [0] * (buckets + 1)
+        self.duration = 0.0
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.size = 0
+        self.statuses = {}
+
+class Metrics(object):
+    """Request metrics of the current process, by route and method
+
+    Each thread records its requests into a shard of its own, so that
+    recording never waits for a lock; shards are only added up when the
+    metrics are exposed. Greenlets share the shard of their thread, so
+    gevent workers keep a single one.
+    """
+    def __init__(self, buckets) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._local = thread_local()
+        self._shards = []
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append(shard)
+        return shard
+
+    def observe(self, route, method, status, measures, size) -> None:
+        """Record a request answered with status once its response is sent"""
+        duration = time.perf_counter() - measures.started
+
+        shard = self._shard()
+        series = shard.get((route, method))
+        if series is None:
+            series = shard[(route, method)] = _Series(len(self.buckets))
+
+        series.buckets[bisect.bisect_left(self.buckets, duration)] += 1
+        series.duration += duration
+        series.statements += measures.statements
+        series.db_time += measures.db_time
+        series.rows += measures.rows
+        series.size += size
+        series.statuses[status] = series.statuses.get(status, 0) + 1
+
+    def collect(self) -> dict:
+        """Series of every thread, added up by (route, method)"""
+        totals = {}
+        for shard in list(self._shards):
+            for key, series in shard.copy().items():
+                total = totals.get(key)
+                if total is None:
+                    total = totals[key] = _Series(len(self.buckets))
+                total.buckets = [a + b for a, b in zip(total.buckets, series.buckets)]
+                total.duration += series.duration
+                total.statements += series.statements
+                total.db_time += series.db_time
+                total.rows += series.rows
+                total.size += series.size
+                for status, count in series.statuses.copy().items():
+                    total.statuses[status] = total.statuses.get(status, 0) + count
+        return totals
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        totals = sorted(self.collect().items())
+        pid = str(os.getpid())
+        lines = []
+
+        def labels(route, method, **extra) -> str:
+            pairs = [('route', route), ('method', method), ('pid', pid)] + sorted(extra.items())
+            return '{' + ','.join('{}="{}"'.format(name, _escape(value))
+                for name, value in pairs) + '}'
+
+        lines.append('# HELP aedem_http_request_duration_seconds Time spent answering requests, '
+            'until their body is sent')
+        lines.append('# TYPE aedem_http_request_duration_seconds histogram')
+        for (route, method), series in totals:
+            count = 0
+            for bound, observed in zip(self.buckets + (float('inf'),), series.buckets):
+                count += observed
+                lines.append('aedem_http_request_duration_seconds_bucket{} {}'.format(
+                    labels(route, method, le = _format(bound)), count))
+            lines.append('aedem_http_request_duration_seconds_sum{} {}'.format(
+                labels(route, method), _format(series.duration)))
+            lines.append('aedem_http_request_duration_seconds_count{} {}'.format(
+                labels(route, method), count))
+
+        lines.append('# HELP aedem_http_requests_total Requests answered, by status')
+        lines.append('# TYPE aedem_http_requests_total counter')
+        for (route, method), series in totals:
+            for status, count in sorted(series.statuses.items()):
+                lines.append('aedem_http_requests_total{} {}'.format(
+                    labels(route, method, status = str(status)), count))
+
+        counters = (
+            ('aedem_db_statements_total', 'SQL statements executed by requests', 'statements'),
+            ('aedem_db_time_seconds_total', 'Time spent executing SQL statements of requests', 'db_time'),
+            ('aedem_db_rows_total', 'Rows returned by SQL statements of requests', 'rows'),
+            ('aedem_http_response_bytes_total', 'Bytes of response bodies, before compression', 'size'),
+        )
+        for name, description, attribute in counters:
+            lines.append('# HELP {} {}'.format(name, description))
+            lines.append('# TYPE {} counter'.format(name))
+            for (route, method), series in totals:
+                lines.append('{}{} {}'.format(name, labels(route, method),
+                    _format(getattr(series, attribute))))
+        return '\n'.join(lines) + '\n'
+
+def _escape(value) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+class _CountingIterable(object):
+    """Body of a streamed response, recording the request once it is sent"""
+    def __init__(self, iterable, measures, record) -> None:
+        self._iterable = iterable
+        self._measures = measures
+        self._record = record
+        self._size = 0
+
+    def __iter__(self):
+        for chunk in self._iterable:
+            self._size += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        if self._record is None:
+            return
+        try:
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+        finally:
+            if getattr(_requests, 'current', None) is self._measures:
+                _requests.current = None
+            record, self._record = self._record, None
+            record(self._measures, self._size)
+
+def _begin_request() -> None:
+    _requests.current = RequestMetrics()
+
+def _finish_request(response):
+    measures = getattr(_requests, 'current', None)
+    if measures is None:
+        return response
+
+    # streamed bodies are sent once the request context is gone
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    method = request.method
+    metrics = current_app.extensions['aedem_metrics']
+
+    def record(measures, size):
+        metrics.observe(route, method, response.status_code, measures, size)
+
+    if response.is_streamed:
+        # statements issued while the body is streamed count as well
+        response.response = _CountingIterable(response.response, measures, record)
+    else:
+        _requests.current = None
+        record(measures, response.calculate_content_length() or 0)
+    return response
+
+def metrics_view():
+    return Response(current_app.extensions['aedem_metrics'].render(),
+        content_type = 'text/plain; version=0.0.4; charset=utf-8')
+
+def init_metrics(app) -> None:
+    """Record the metrics of the requests of app and expose them at /metrics"""
+    app.extensions['aedem_metrics'] = Metrics(app.config['METRICS_BUCKETS'])
+    app.before_request(_begin_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,142 @@
+import datetime
+import importlib
+import pkgutil
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, text
+
+# applied migrations are recorded apart from the models, which they create
+metadata = MetaData()
+
+schema_migrations = Table('schema_migrations', metadata,
+    Column('version', String,
+        primary_key = True),
+    Column('description', String),
+    Column('applied_at', DateTime,
+        nullable = False,
+        default = datetime.datetime.now)
+)
+
+# key of the advisory lock held while migrations are applied, so that
+# processes started together do not apply the same migration twice
+_LOCK_KEY = 4613
+
+class Migration(object):
+    """Schema change kept in a `vNNNN_name` module of this package
+
+    Modules define `upgrade(connection)`. Those which set `transactional`
+    to False, such as the ones building indexes concurrently, are applied
+    in autocommit mode and must therefore be safe to run again.
+    """
+    def __init__(self, module) -> None:
+        self.version = module.__name__.rsplit('.', 1)[1].split('_', 1)[0]
+        self.description = (module.__doc__ or '').strip()
+        self.transactional = getattr(module, 'transactional', True)
+        self.upgrade = module.upgrade
+
+    def __repr__(self) -> str:
+        return "<Migration '{version}'>".format(version = self.version)
+
+def migrations() -> list:
+    """Every migration of this package, in version order"""
+    names = sorted(name for _, name, _ in pkgutil.iter_modules(__path__)
+        if name.startswith('v'))
+    return [Migration(importlib.import_module(__name__ + '.' + name))
+        for name in names]
+
+def applied_versions(connection) -> set:
+    """Versions of the migrations already applied to the database"""
+    if not connection.dialect.has_table(connection, schema_migrations.name):
+        return set()
+    return set(row.version for row in
+        connection.execute(schema_migrations.select()))
+
+def pending_migrations(connection) -> list:
+    """Migrations not yet applied to the database, in version order"""
+    applied = applied_versions(connection)
+    return [migration for migration in migrations()
+        if migration.version not in applied]
+
+def upgrade(engine, echo = None) -> list:
+    """Apply the pending migrations, returning the ones applied
+
+    echo, when given, is called with each migration before it is applied.
+    """
+    with engine.connect() as connection:
+        postgresql = connection.dialect.name == 'postgresql'
+        if postgresql:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), key = _LOCK_KEY)
+        try:
+            metadata.create_all(connection)
+
+            applied = []
+            for migration in pending_migrations(connection):
+                if echo is not None:
+                    echo(migration)
+
+                if migration.transactional:
+                    with connection.begin():
+                        migration.upgrade(connection)
+                        _record(connection, migration)
+                else:
+                    with engine.connect() as autocommit:
+                        migration.upgrade(autocommit.execution_options(
+                            isolation_level = 'AUTOCOMMIT'))
+                    with connection.begin():
+                        _record(connection, migration)
+                applied.append(migration)
+            return applied
+        finally:
+            if postgresql:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), key = _LOCK_KEY)
+
+def _record(connection, migration) -> None:
+    connection.execute(schema_migrations.insert().values(
+        version = migration.version,
+        description = migration.description))
+
+def create_index(connection, name, table, *columns, where = None, using = None) -> None:
+    """Build an index without blocking writes to table
+
+    On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY, which
+    cannot run inside a transaction. A concurrent build which failed leaves
+    an invalid index behind, which is dropped and built again.
+    """
+    columns = '{}({}){}'.format('USING {} '.format(using) if using else '',
+        ', '.join(columns), ' WHERE {}'.format(where) if where else '')
+    if connection.dialect.name != 'postgresql':
+        connection.execute(text('CREATE INDEX IF NOT EXISTS {} ON {} {}'.format(
+            name, table, columns)))
+        return
+
+    valid = connection.execute(text(
+        "SELECT pg_index.indisvalid FROM pg_index "
+        "JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name "
+        "AND pg_class.relnamespace = current_schema()::regnamespace"),
+        name = name).scalar()
+    if valid:
+        return
+    if valid is not None:
+        connection.execute(text('DROP INDEX CONCURRENTLY {}'.format(name)))
+
+    connection.execute(text('CREATE INDEX CONCURRENTLY {} ON {} {}'.format(
+        name, table, columns)))
+
+def drop_index(connection, name) -> None:
+    """Drop an index without blocking writes to its table"""
+    if connection.dialect.name != 'postgresql':
+        connection.execute(text('DROP INDEX IF EXISTS {}'.format(name)))
+        return
+    connection.execute(text('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name)))
+
+def add_column(connection, table, name, definition) -> bool:
+    """Add a column to table unless it exists, returning whether it was added
+
+    Tables created from the models by the first migration already have the
+    columns added by later ones.
+    """
+    if name in [column['name'] for column in inspect(connection).get_columns(table)]:
+        return False
+    connection.execute(text('ALTER TABLE {} ADD COLUMN {} {}'.format(
+        table, name, definition)))
+    return True
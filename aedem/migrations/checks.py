@@ -0,0 +1,77 @@
+import json
+
+from sqlalchemy import text
+
+# hot queries of the API and the index each of them must be planned with
+HOT_QUERIES = (
+    ('ix_reports_user_id',
+        "SELECT * FROM reports WHERE user_id = :uuid"),
+    ('ix_attachments_report_id',
+        "SELECT * FROM attachments WHERE report_id IN (1, 2, 3)"),
+    ('ix_attachments_user_id',
+        "SELECT * FROM attachments WHERE user_id = :uuid"),
+    ('ix_replies_report_id',
+        "SELECT * FROM replies WHERE report_id = 1"),
+    ('ix_replies_user_id',
+        "SELECT * FROM replies WHERE user_id = :uuid"),
+    ('ix_notifications_user_created_at',
+        "SELECT * FROM notifications WHERE user_id = :uuid "
+        "ORDER BY created_at, id LIMIT 51"),
+    ('ix_users_location',
+        "SELECT id FROM users WHERE state_abbr = 'ES' AND city_name = 'Vitória'"),
+    ('ix_users_flag_id',
+        "SELECT * FROM users WHERE flag_id = 'user'"),
+    ('ix_flags_privileges_flag_identifier',
+        "SELECT * FROM flags_privileges WHERE flag_identifier IN ('user', 'moderator')"),
+    ('ix_reports_location',
+        "SELECT * FROM reports WHERE state_abbr = 'ES' AND city_name = 'Vitória' "
+        "AND area = 'Centro'"),
+    ('ix_reports_open_created_at',
+        "SELECT * FROM reports WHERE status = true "
+        "ORDER BY created_at, id LIMIT 51"),
+    ('ix_reports_created_at_id',
+        "SELECT * FROM reports ORDER BY created_at, id LIMIT 51"),
+    ('ix_users_created_at_id',
+        "SELECT * FROM users ORDER BY created_at, id LIMIT 51"),
+    ('ix_notifications_created_at_id',
+        "SELECT * FROM notifications ORDER BY created_at, id LIMIT 51"),
+    ('ix_replies_created_at_id',
+        "SELECT * FROM replies ORDER BY created_at, id LIMIT 51"),
+    ('ix_news_search_vector',
+        "SELECT id FROM news WHERE search_vector @@ "
+        "websearch_to_tsquery('portuguese', 'dengue vacinação')"),
+    ('ix_news_created_at_id',
+        "SELECT * FROM news ORDER BY created_at, id LIMIT 51"),
+)
+
+def _index_names(plan) -> set:
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for subplan in plan.get('Plans', ()):
+        names |= _index_names(subplan)
+    return names
+
+def check_indexes(connection) -> list:
+    """EXPLAIN every hot query, returning (index, query, indexes used) of the misplanned ones
+
+    Sequential scans are disabled while planning, since the planner rightly
+    prefers them on the small tables of development databases; a query is
+    misplanned when its index cannot serve it at all, for instance because
+    the index is missing or the query no longer matches its columns.
+    Requires PostgreSQL.
+    """
+    failures = []
+    with connection.begin() as transaction:
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        for index, query in HOT_QUERIES:
+            plan = connection.execute(text('EXPLAIN (FORMAT JSON) ' + query),
+                uuid = '00000000-0000-0000-0000-000000000000').scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            used = _index_names(plan[0]['Plan'])
+            if index not in used:
+                failures.append((index, query, used))
+        transaction.rollback()
+    return failures
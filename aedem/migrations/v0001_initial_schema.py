@@ -0,0 +1,5 @@
+"""Create the tables of every model"""
+
+def upgrade(connection) -> None:
+    from aedem.models import Base
+    Base.metadata.create_all(connection)
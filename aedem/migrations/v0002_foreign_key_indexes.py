@@ -0,0 +1,15 @@
+"""Index the foreign keys relationships are loaded through"""
+from aedem.migrations import create_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    create_index(connection, 'ix_reports_user_id', 'reports', 'user_id')
+    create_index(connection, 'ix_attachments_report_id', 'attachments', 'report_id')
+    create_index(connection, 'ix_attachments_user_id', 'attachments', 'user_id')
+    create_index(connection, 'ix_replies_report_id', 'replies', 'report_id')
+    create_index(connection, 'ix_replies_user_id', 'replies', 'user_id')
+    create_index(connection, 'ix_notifications_user_id', 'notifications', 'user_id')
+    create_index(connection, 'ix_users_flag_id', 'users', 'flag_id')
+    create_index(connection, 'ix_flags_privileges_flag_identifier',
+        'flags_privileges', 'flag_identifier')
@@ -0,0 +1,17 @@
+"""Index report location filters and the pagination order of every list"""
+from aedem.migrations import create_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    create_index(connection, 'ix_reports_location', 'reports',
+        'state_abbr', 'city_name', 'area')
+
+    # open reports are listed far more often than closed ones
+    create_index(connection, 'ix_reports_open_created_at', 'reports',
+        'created_at', 'id', where = 'status')
+
+    # lists are paginated by (created_at, primary key)
+    for table in ('reports', 'users', 'notifications', 'replies', 'news'):
+        create_index(connection, 'ix_{}_created_at_id'.format(table), table,
+            'created_at', 'id')
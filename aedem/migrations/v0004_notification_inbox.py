@@ -0,0 +1,16 @@
+"""Track read notifications and the unread count of each user"""
+from sqlalchemy import text
+
+from aedem.migrations import add_column
+
+def upgrade(connection) -> None:
+    add_column(connection, 'notifications', 'read_at', 'TIMESTAMP WITHOUT TIME ZONE')
+
+    if add_column(connection, 'users', 'unread_notifications',
+            'INTEGER NOT NULL DEFAULT 0'):
+        # notifications sent so far are all unread
+        connection.execute(text(
+            "UPDATE users SET unread_notifications = counts.unread "
+            "FROM (SELECT user_id, count(*) AS unread FROM notifications "
+            "WHERE read_at IS NULL GROUP BY user_id) AS counts "
+            "WHERE users.id = counts.user_id"))
@@ -0,0 +1,11 @@
+"""Index the notifications of each user in pagination order"""
+from aedem.migrations import create_index, drop_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    create_index(connection, 'ix_notifications_user_created_at', 'notifications',
+        'user_id', 'created_at', 'id')
+
+    # the index above serves every lookup by user_id
+    drop_index(connection, 'ix_notifications_user_id')
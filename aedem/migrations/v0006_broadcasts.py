@@ -0,0 +1,5 @@
+"""Record notification broadcasts and their progress"""
+
+def upgrade(connection) -> None:
+    from aedem.models.broadcasts import Broadcast
+    Broadcast.__table__.create(connection, checkfirst = True)
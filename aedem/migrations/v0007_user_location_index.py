@@ -0,0 +1,8 @@
+"""Index the location users are targeted by"""
+from aedem.migrations import create_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    create_index(connection, 'ix_users_location', 'users',
+        'state_abbr', 'city_name', 'area')
@@ -0,0 +1,14 @@
+"""Keep a weighted Portuguese search vector of the title and content of news"""
+from sqlalchemy import text
+
+def upgrade(connection) -> None:
+    # other databases are searched through aedem.search.InvertedIndex
+    if connection.dialect.name != 'postgresql':
+        return
+
+    connection.execute(text(
+        "ALTER TABLE news ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('portuguese', coalesce(content, '')), 'B')"
+        ") STORED"))
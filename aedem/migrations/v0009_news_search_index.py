@@ -0,0 +1,11 @@
+"""Index the search vector of news"""
+from aedem.migrations import create_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    if connection.dialect.name != 'postgresql':
+        return
+
+    create_index(connection, 'ix_news_search_vector', 'news', 'search_vector',
+        using = 'gin')
@@ -0,0 +1,39 @@
+"""Delete the reports, replies, attachments and notifications of deleted users and reports with them"""
+from sqlalchemy import inspect, text
+
+transactional = False
+
+# foreign keys given ON DELETE CASCADE, as (table, column, referred table)
+CASCADES = (
+    ('reports', 'user_id', 'users'),
+    ('attachments', 'report_id', 'reports'),
+    ('attachments', 'user_id', 'users'),
+    ('replies', 'report_id', 'reports'),
+    ('replies', 'user_id', 'users'),
+    ('notifications', 'user_id', 'users'),
+)
+
+def upgrade(connection) -> None:
+    # SQLite cannot alter constraints, its tables are created from the models
+    if connection.dialect.name != 'postgresql':
+        return
+
+    inspector = inspect(connection)
+    for table, column, referred in CASCADES:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['constrained_columns'] != [column]:
+                continue
+
+            name = foreign_key['name']
+            if (foreign_key['options'].get('ondelete') or '').upper() != 'CASCADE':
+                # replaced in a single statement, so rows are never left
+                # unchecked; NOT VALID skips scanning the rows already there
+                connection.execute(text(
+                    'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+                    'ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+                    'REFERENCES {referred} (id) ON DELETE CASCADE NOT VALID'.format(
+                        table = table, name = name, column = column, referred = referred)))
+
+            # scans the rows without blocking writes to table
+            connection.execute(text('ALTER TABLE {} VALIDATE CONSTRAINT {}'.format(
+                table, name)))
@@ -0,0 +1,58 @@
+"""Store report coordinates as numbers, along with their geohash"""
+from sqlalchemy import Float, inspect, text
+
+from aedem import geo
+from aedem.migrations import add_column
+
+transactional = False
+
+# reports given a geohash per statement, each batch committed on its own
+BATCH_SIZE = 1000
+
+# coordinates stored as text which can be read as numbers; others are cleared
+_NUMBER = r'^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$'
+
+def upgrade(connection) -> None:
+    # SQLite cannot alter column types, its tables are created from the models
+    if connection.dialect.name == 'postgresql':
+        columns = dict((column['name'], column['type'])
+            for column in inspect(connection).get_columns('reports'))
+        convert = [name for name in ('geolatitude', 'geolongitude')
+            if not isinstance(columns[name], Float)]
+        if convert:
+            # both columns are rewritten together, in a single pass over the table
+            connection.execute(text('ALTER TABLE reports {}'.format(', '.join(
+                "ALTER COLUMN {name} TYPE double precision USING "
+                "CASE WHEN {name} ~ '{number}' "
+                "THEN trim({name})::double precision END".format(
+                    name = name, number = _NUMBER)
+                for name in convert))))
+
+    add_column(connection, 'reports', 'geohash', 'VARCHAR(12)')
+
+    # reports are given their geohash in batches, so that the rows of
+    # each batch are only locked briefly and an interrupted run resumes
+    last_id = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, geolatitude, geolongitude FROM reports "
+            "WHERE id > :last_id AND geohash IS NULL "
+            "AND geolatitude IS NOT NULL AND geolongitude IS NOT NULL "
+            "ORDER BY id LIMIT :limit"),
+            last_id = last_id, limit = BATCH_SIZE).fetchall()
+        if not rows:
+            break
+
+        geohashes = []
+        for row in rows:
+            try:
+                latitude, longitude = float(row.geolatitude), float(row.geolongitude)
+            except ValueError:
+                continue
+            if -90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0:
+                geohashes.append({"id": row.id,
+                    "geohash": geo.encode(latitude, longitude)})
+        if geohashes:
+            connection.execute(text(
+                "UPDATE reports SET geohash = :geohash WHERE id = :id"), geohashes)
+        last_id = rows[-1].id
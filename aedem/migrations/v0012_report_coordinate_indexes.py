@@ -0,0 +1,13 @@
+"""Index the coordinates and geohash of reports searched by location"""
+from aedem.migrations import create_index
+
+transactional = False
+
+def upgrade(connection) -> None:
+    create_index(connection, 'ix_reports_coordinates', 'reports',
+        'geolatitude', 'geolongitude')
+
+    # geohash prefixes are matched with LIKE, whatever the collation
+    create_index(connection, 'ix_reports_geohash', 'reports',
+        'geohash varchar_pattern_ops' if connection.dialect.name == 'postgresql'
+        else 'geohash')
@@ -0,0 +1,22 @@
+"""Count the reports created before the report aggregates were maintained"""
+from sqlalchemy import text
+
+def upgrade(connection) -> None:
+    # the aggregates are recomputed as a whole, in the transaction of the
+    # migration, so reports counted incrementally are not counted twice;
+    # on PostgreSQL, the table is locked against the incremental updates
+    # first, so those of reports committed meanwhile wait for the new
+    # counts instead of being lost with the old ones
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("LOCK TABLE report_stats IN EXCLUSIVE MODE"))
+        connection.execute(text("TRUNCATE report_stats"))
+    else:
+        connection.execute(text("DELETE FROM report_stats"))
+    connection.execute(text(
+        "INSERT INTO report_stats "
+        "(state_abbr, city_name, area, day, open_count, closed_count) "
+        "SELECT state_abbr, city_name, coalesce(area, ''), date(created_at), "
+        "sum(CASE WHEN status THEN 1 ELSE 0 END), "
+        "sum(CASE WHEN status THEN 0 ELSE 1 END) "
+        "FROM reports "
+        "GROUP BY state_abbr, city_name, coalesce(area, ''), date(created_at)"))
@@ -0,0 +1,6 @@
+"""Record the progress of broadcasts, so that interrupted ones resume"""
+from aedem.migrations import add_column
+
+def upgrade(connection) -> None:
+    add_column(connection, 'broadcasts', 'last_user_id',
+        'UUID' if connection.dialect.name == 'postgresql' else 'CHAR(36)')
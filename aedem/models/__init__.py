@@ -1,22 +1,136 @@
-from flask import current_app
+import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker
-
-engine = create_engine('{dialect}://{user}:{pwd}@{host}:{port}/{dbname}'.format(
-    dialect = current_app.config['DB_DIALECT'],
-    user = current_app.config['DB_USERNAME'],
-    pwd = current_app.config['DB_PASSWORD'],
-    host = current_app.config['DB_HOST'],
-    port = current_app.config['DB_PORT'],
-    dbname = current_app.config['DB_NAME']
-))
-
-Session = scoped_session(sessionmaker())
+from sqlalchemy.orm import Session as BaseSession, scoped_session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+
+from aedem.models.pool import InstrumentedQueuePool
+from aedem.metrics import instrument_engine
+
+# database settings given to configure_database
+_config = None
+
+# engine of the current process, see get_engine
+_engine = None
+_engine_pid = None
+
+# read replica engines of the current process, see get_replica_engines
+_replicas = None
+_replicas_pid = None
+
+# engines inherited from a parent process; they are kept referenced so that
+# their connections, which belong to the parent, are never closed from here
+_inherited_engines = []
+
+def configure_database(config) -> None:
+    """Set up the database settings, without connecting to the database"""
+    global _config, _engine, _replicas
+    _config = config
+    _engine = None
+    _replicas = None
+
+def get_engine():
+    """Engine of the current process, created on first use
+
+    Engines are never created while the application is built, so that
+    WSGI servers can fork it into workers which each open their own
+    connections.
+    """
+    global _engine, _engine_pid
+    if _engine is not None and _engine_pid == os.getpid():
+        return _engine
+
+    if _config is None:
+        raise RuntimeError("Database has not been configured")
+    if _engine is not None:
+        _inherited_engines.append(_engine)
+
+    url = _config['DB_URL'] or '{dialect}://{user}:{pwd}@{host}:{port}/{dbname}'.format(
+        dialect = _config['DB_DIALECT'],
+        user = _config['DB_USERNAME'],
+        pwd = _config['DB_PASSWORD'],
+        host = _config['DB_HOST'],
+        port = _config['DB_PORT'],
+        dbname = _config['DB_NAME']
+    )
+
+    _engine = _create_engine(url)
+    _engine_pid = os.getpid()
+    return _engine
+
+def get_replica_engines() -> list:
+    """Engines of the read replicas of the current process, created on first use
+
+    Replicas are given by their URLs in DB_REPLICA_URLS, and are not used
+    unless a session is routed to them, see RoutingSession.
+    """
+    global _replicas, _replicas_pid
+    if _replicas is not None and _replicas_pid == os.getpid():
+        return _replicas
+
+    if _config is None:
+        raise RuntimeError("Database has not been configured")
+    if _replicas is not None:
+        _inherited_engines.extend(_replicas)
+
+    _replicas = [_create_engine(url) for url in _config['DB_REPLICA_URLS']]
+    _replicas_pid = os.getpid()
+    return _replicas
+
+def _create_engine(url):
+    # pooled SQLite connections are handed to any of the request threads
+    connect_args = {}
+    if url.startswith('sqlite'):
+        connect_args['check_same_thread'] = False
+
+    engine = create_engine(url,
+        connect_args = connect_args,
+        poolclass = InstrumentedQueuePool,
+        pool_size = _config['DB_POOL_SIZE'],
+        max_overflow = _config['DB_MAX_OVERFLOW'],
+        pool_timeout = _config['DB_POOL_TIMEOUT'],
+        pool_recycle = _config['DB_POOL_RECYCLE'],
+        pool_pre_ping = _config['DB_POOL_PRE_PING']
+    )
+    if url.startswith('sqlite'):
+        event.listen(engine, 'connect', _enable_foreign_keys)
+    instrument_engine(engine)
+    return engine
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and their cascades, when asked to
+    dbapi_connection.execute('PRAGMA foreign_keys = ON')
+
+@compiles(UUID, 'sqlite')
+def _compile_uuid(type_, compiler, **kwargs):
+    # SQLite, the local stand-in of the benchmarks, stores UUIDs as text
+    return 'CHAR(36)'
+
+class RoutingSession(BaseSession):
+    """Session bound to the engines of the current process
+
+    Sessions use the primary database, unless a read replica engine is set
+    in their info['replica'], see aedem.replicas; even then, flushes, other
+    writes and locking reads are sent to the primary.
+    """
+    def get_bind(self, mapper = None, clause = None):
+        replica = self.info.get('replica')
+        if replica is None or self._flushing or _writes(clause):
+            return get_engine()
+        return replica
+
+def _writes(clause) -> bool:
+    """Whether clause writes to, or locks rows of, the database"""
+    return isinstance(clause, UpdateBase) or \
+        getattr(clause, '_for_update_arg', None) is not None
+
+Session = scoped_session(sessionmaker(class_ = RoutingSession))
 Base = declarative_base()
 
 def initialize_database(engine):
-    Session.configure(bind = engine)
-    Base.metadata.bind = engine
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    """Bring the database schema up to date by applying pending migrations"""
+    from aedem.migrations import upgrade
+    return upgrade(engine)
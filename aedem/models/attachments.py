@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import Column, String, Integer, Date, DateTime, text, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, DateTime, func, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -13,21 +13,21 @@ class Attachment(Base):
 	id 				= Column(Integer, 
 						primary_key = True)
 	user_id 		= Column(UUID(as_uuid = True), 
-	 					ForeignKey('users.id'))
+	 					ForeignKey('users.id', ondelete = 'CASCADE'))
 	user 			= relationship("User", 
 	 					back_populates="attachments")
 	report_id 		= Column(Integer, 
-						ForeignKey('reports.id'))
+						ForeignKey('reports.id', ondelete = 'CASCADE'))
 	report 			= relationship("Report", 
 						back_populates="attachments")
 	attachment_addr = Column(String, 
 						nullable = False)
 	last_updated 	= Column(DateTime, 
-						server_default = text('NOW()'), 
+						server_default = func.now(), 
 						onupdate = datetime.datetime.now)
 	created_at 		= Column(DateTime, 
 						nullable = False, 
-						server_default = text('NOW()'))
+						server_default = func.now())
 
 	def __init__(self, attachment_addr) -> None:
 		self.attachment_addr = attachment_addr
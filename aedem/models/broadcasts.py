@@ -0,0 +1,53 @@
+import datetime
+
+from sqlalchemy import Column, String, DateTime, Integer, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from aedem.models import Base
+
+class Broadcast(Base):
+    __tablename__ = 'broadcasts'
+
+    id              = Column(Integer,
+                        primary_key = True)
+    # users are targeted by every filter which is set
+    state_abbr      = Column(String)
+    city_name       = Column(String)
+    area            = Column(String)
+    flag_id         = Column(String)
+    notiftype       = Column(String,
+                        nullable = False)
+    content         = Column(String,
+                        nullable = False)
+    # pending, running, done or failed; running broadcasts whose progress
+    # stalled are resumed, see aedem.inbox.resume_broadcasts
+    status          = Column(String,
+                        nullable = False,
+                        default = 'pending')
+    total           = Column(Integer)
+    sent            = Column(Integer,
+                        nullable = False,
+                        default = 0)
+    # greatest id of the users notified so far, committed with each batch,
+    # so that an interrupted broadcast resumes after it
+    last_user_id    = Column(UUID(as_uuid = True))
+    error           = Column(String)
+    last_updated    = Column(DateTime,
+                        nullable = False,
+                        server_default = func.now(),
+                        onupdate = datetime.datetime.now)
+    created_at      = Column(DateTime,
+                        nullable = False,
+                        server_default = func.now())
+
+    def __init__(self, notiftype, content, state_abbr = None, city_name = None,
+                area = None, flag_id = None) -> None:
+        self.notiftype = notiftype
+        self.content = content
+        self.state_abbr = state_abbr
+        self.city_name = city_name
+        self.area = area
+        self.flag_id = flag_id
+
+    def __repr__(self) -> str:
+        return "<Broadcast '{id}'>".format(id = self.id)
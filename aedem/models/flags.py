@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Column, String, DateTime, text, Table, ForeignKey
+from sqlalchemy import Column, String, DateTime, func, Table, ForeignKey
 from sqlalchemy.orm import relationship
 
 from aedem.models import Base
@@ -13,6 +13,8 @@ flags_privileges_association = Table(
 
 class Flag(Base):
     __tablename__ = 'flags'
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('title', 'description')
     
     identifier      = Column(String,
                         nullable = False,
@@ -25,11 +27,11 @@ class Flag(Base):
                         secondary = flags_privileges_association)
     last_updated    = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'),
+                        server_default = func.now(),
                         onupdate = datetime.datetime.now)
     created_at      = Column(DateTime, 
                         nullable = False,
-                        server_default = text('NOW()'))
+                        server_default = func.now())
 
     def __init__(self, identifier, title, description = None) -> None:
         self.identifier = identifier
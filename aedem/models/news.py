@@ -1,10 +1,15 @@
 import datetime
-from sqlalchemy import Column, String, DateTime, Integer, text
+from sqlalchemy import Column, String, DateTime, Integer, func
 from aedem.models import Base
 
 class News(Base):
     
     __tablename__ = 'news'
+    # left out of listings unless asked for, see aedem.fieldsets
+    __deferred_columns__ = ('content',)
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('title', 'content', 'source', 'published_at',
+        'external_link', 'state_abbr', 'city_name')
     id              = Column(Integer,
                         nullable = False, 
                         primary_key = True)
@@ -24,10 +29,10 @@ class News(Base):
                         nullable = False)    
     created_at      = Column(DateTime, 
                         nullable = False, 
-                        server_default = text('NOW()'))    
+                        server_default = func.now())    
     last_updated    = Column(DateTime,
                         nullable = False, 
-                        server_default = text('NOW()'), 
+                        server_default = func.now(), 
                         onupdate = datetime.datetime.now)
     def __init__(self, title, content, source, published_at, external_link, state_abbr, city_name)-> None:
         self.title = title
@@ -1,30 +1,35 @@
 import datetime
 
-from sqlalchemy import Column, String, DateTime, text, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, func, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from aedem.models import Base
 
 class Notification(Base):
     __tablename__ = 'notifications'
+    __mapper_args__ = {'eager_defaults': True}
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('content', 'notiftype')
     
     id              = Column(Integer,
                         primary_key = True)
     user_id         = Column(UUID(as_uuid = True),
-                        ForeignKey('users.id'))
+                        ForeignKey('users.id', ondelete = 'CASCADE'))
     user            = relationship("User",
                         back_populates = "notifications")
     content         = Column(String,
                         nullable = False)
     notiftype       = Column(String,
                         nullable = False)
+    # notifications are unread until read_at is set
+    read_at         = Column(DateTime)
     last_updated    = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'),
+                        server_default = func.now(),
                         onupdate = datetime.datetime.now)
     created_at      = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'))
+                        server_default = func.now())
 
     def __init__(self, notiftype, content) -> None:
         self.notiftype = notiftype
@@ -1,11 +1,13 @@
 import datetime
 
-from sqlalchemy import Column, String, DateTime, Boolean, text
+from sqlalchemy import Column, String, DateTime, Boolean, func
 
 from aedem.models import Base
 
 class Privilege(Base):
     __tablename__ = 'privileges'
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('assignable',)
     
     identifier      = Column(String,
                         unique = True,
@@ -16,11 +18,11 @@ class Privilege(Base):
                         default = True)
     last_updated    = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'),
+                        server_default = func.now(),
                         onupdate = datetime.datetime.now)
     created_at      = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'))
+                        server_default = func.now())
 
     def __init__(self, identifier, assignable = True) -> None:
         self.identifier = identifier
@@ -1,32 +1,34 @@
 import datetime
 
-from sqlalchemy import Column, String, DateTime, text, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, func, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from aedem.models import Base
 
 class Reply(Base):
     __tablename__ = 'replies'
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('content',)
     
     id              = Column(Integer,
                         primary_key = True)
     user_id         = Column(UUID(as_uuid = True),
-                        ForeignKey('users.id'))
+                        ForeignKey('users.id', ondelete = 'CASCADE'))
     user            = relationship("User",
                         back_populates = "replies")
     report_id       = Column(Integer,
-                        ForeignKey('reports.id'))
+                        ForeignKey('reports.id', ondelete = 'CASCADE'))
     report          = relationship("Report",
                         back_populates = "replies")
     content         = Column(String,
                         nullable = False)
     last_updated    = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'),
+                        server_default = func.now(),
                         onupdate = datetime.datetime.now)
     created_at      = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'))
+                        server_default = func.now())
 
     def __init__(self, content) -> None:
         self.content = content
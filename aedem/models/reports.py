@@ -1,19 +1,32 @@
 import datetime
 import uuid
 
-from sqlalchemy import Column, String, Integer, Date, DateTime, text, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from flask import current_app
+
+from sqlalchemy import Column, String, Integer, Date, DateTime, func, ForeignKey, Boolean, Float, Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.dialects.postgresql import UUID
 
+from aedem import geo
 from aedem.models import Base
 # relations with User and IPRecord are not yet defined
 class Report(Base):
 	__tablename__ = 'reports'
+	__table_args__ = (
+		Index('ix_reports_coordinates', 'geolatitude', 'geolongitude'),
+		Index('ix_reports_geohash', 'geohash',
+			postgresql_ops = {'geohash': 'varchar_pattern_ops'}),
+	)
+	# fetch server generated columns on insert, they key report statistics
+	__mapper_args__ = {'eager_defaults': True}
+	# written by PATCH requests, see aedem.patches; coordinates are left out,
+	# since the geohash is computed from both of them
+	__patchable_columns__ = ('status', 'state_abbr', 'city_name', 'area', 'description')
 
 	id 				= Column(Integer, 
 						primary_key = True)
 	user_id 		= Column(UUID(as_uuid = True),
-						ForeignKey('users.id'))
+						ForeignKey('users.id', ondelete = 'CASCADE'))
 	user 			= relationship("User", 
 						back_populates="reports")
 	status 			= Column(Boolean,
@@ -25,26 +38,34 @@ class Report(Base):
 						nullable = False)
 	area 			= Column(String, 
 						nullable = True)
-	geolatitude 	= Column(String, 
+	geolatitude 	= Column(Float, 
+						nullable = True)
+	geolongitude 	= Column(Float, 
 						nullable = True)
-	geolongitude 	= Column(String, 
+	geohash 		= Column(String(12),
 						nullable = True)
 	last_updated 	= Column(DateTime, 
-						server_default = text('NOW()'), 
+						server_default = func.now(), 
 						onupdate = datetime.datetime.now)
 	created_at 		= Column(DateTime, 
 						nullable = False, 
-						server_default = text('NOW()'))
+						server_default = func.now())
 	# id_ipaddr 	= Column(Integer, 
 	# 					ForeignKey('ip_records.id'))
 	# ipdarr 		= relationship("IPRecord", 
 	# 					back_populates="reports")
 	description 	= Column(String, 
 						nullable = True)
+	# children are deleted by the database, ON DELETE CASCADE, without
+	# being loaded
 	attachments 	= relationship('Attachment', 
-						back_populates = 'report')
+						back_populates = 'report',
+						cascade = 'all',
+						passive_deletes = True)
 	replies 		= relationship('Reply',
-						back_populates = 'report')
+						back_populates = 'report',
+						cascade = 'all',
+						passive_deletes = True)
 
 	def __init__(self, state_abbr, city_name, area, geolatitude, geolongitude, 
 				description) -> None:
@@ -55,5 +76,38 @@ class Report(Base):
 		self.geolongitude = geolongitude
 		self.description = description
 
+	@validates('status')
+	def validate_status(self, key, value):
+		"""Accept the textual booleans given in query strings"""
+		if isinstance(value, str):
+			return value.strip().lower() in ('true', 't', 'yes', '1', 'on')
+		return value
+
+	@validates('geolatitude', 'geolongitude')
+	def validate_coordinates(self, key, value):
+		"""Store coordinates as numbers and keep the geohash in sync"""
+		value = float(value) if value not in (None, '') else None
+		if key == 'geolatitude':
+			latitude, longitude = value, self.geolongitude
+			if value is not None and not -90.0 <= value <= 90.0:
+				raise ValueError("Latitude out of range")
+		else:
+			latitude, longitude = self.geolatitude, value
+			if value is not None and not -180.0 <= value <= 180.0:
+				raise ValueError("Longitude out of range")
+
+		if latitude is not None and longitude is not None:
+			self.geohash = geo.encode(latitude, longitude)
+		else:
+			self.geohash = None
+		return value
+
 	def __repr__(self) -> str:
 		return "<Report '{id}'>".format(id = self.id)
+
+# spatial index used when reports are searched through PostGIS
+event.listen(Report.__table__, 'after_create', DDL(
+	"CREATE INDEX ix_reports_geography ON reports USING gist "
+	"(geography(ST_MakePoint(geolongitude, geolatitude)))"
+).execute_if(callable_ = lambda *args, **kwargs:
+	current_app.config['GEO_BACKEND'] == 'postgis'))
@@ -0,0 +1,44 @@
+import datetime
+
+from sqlalchemy import Column, String, Integer, Date, DateTime, func
+
+from aedem.models import Base
+
+class ReportStats(Base):
+    __tablename__ = 'report_stats'
+
+    state_abbr      = Column(String,
+                        primary_key = True)
+    city_name       = Column(String,
+                        primary_key = True)
+    # reports without area are counted under an empty area
+    area            = Column(String,
+                        primary_key = True)
+    day             = Column(Date,
+                        primary_key = True)
+    open_count      = Column(Integer,
+                        nullable = False,
+                        default = 0)
+    closed_count    = Column(Integer,
+                        nullable = False,
+                        default = 0)
+    last_updated    = Column(DateTime,
+                        nullable = False,
+                        server_default = func.now(),
+                        onupdate = datetime.datetime.now)
+    created_at      = Column(DateTime,
+                        nullable = False,
+                        server_default = func.now())
+
+    def __init__(self, state_abbr, city_name, area, day, open_count = 0,
+                closed_count = 0) -> None:
+        self.state_abbr = state_abbr
+        self.city_name = city_name
+        self.area = area
+        self.day = day
+        self.open_count = open_count
+        self.closed_count = closed_count
+
+    def __repr__(self) -> str:
+        return "<ReportStats '{city}/{area}/{day}'>".format(
+            city = self.city_name, area = self.area, day = self.day)
@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, text, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, DateTime, Boolean, text, func, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -9,6 +9,11 @@ from aedem.models import Base
 
 class User(Base):
     __tablename__ = 'users'
+    # never sent to clients
+    __private_columns__ = ('passhash', 'salt')
+    # written by PATCH requests, see aedem.patches
+    __patchable_columns__ = ('name', 'email', 'phone', 'birthday', 'zip_code',
+        'state_abbr', 'city_name', 'city_number', 'area')
 
     id              = Column(UUID(as_uuid = True),
                         unique = True,
@@ -41,21 +46,36 @@ class User(Base):
     flag_id         = Column(String,
                         ForeignKey('flags.identifier', ondelete = 'CASCADE'))
     flag            = relationship('Flag', backref = 'users')
+    # children are deleted by the database, ON DELETE CASCADE, without
+    # being loaded
     notifications   = relationship("Notification",
-                        back_populates = "user")
+                        back_populates = "user",
+                        cascade = 'all',
+                        passive_deletes = True)
     reports         = relationship('Report',
-                        back_populates = 'user')
+                        back_populates = 'user',
+                        cascade = 'all',
+                        passive_deletes = True)
     attachments     = relationship('Attachment',
-                        back_populates = 'user')
+                        back_populates = 'user',
+                        cascade = 'all',
+                        passive_deletes = True)
     replies         = relationship('Reply',
-                        back_populates = 'user')
+                        back_populates = 'user',
+                        cascade = 'all',
+                        passive_deletes = True)
+    # maintained along with notifications, see aedem.inbox
+    unread_notifications = Column(Integer,
+                        nullable = False,
+                        default = 0,
+                        server_default = text('0'))
     last_updated    = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'), 
+                        server_default = func.now(), 
                         onupdate = datetime.datetime.now)
     created_at      = Column(DateTime,
                         nullable = False,
-                        server_default = text('NOW()'))
+                        server_default = func.now())
 
     def __init__(self, name, passhash, salt, email, phone, birthday, zip_code,
                 state_abbr, city_name, city_number, area) -> None:
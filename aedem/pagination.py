@@ -0,0 +1,69 @@
+import base64
+import datetime
+import json
+import uuid
+
+from flask import current_app, request
+from flask_restplus import abort
+
+from sqlalchemy import Integer, tuple_
+from sqlalchemy.dialects.postgresql import UUID
+
+def encode_cursor(created_at, key) -> str:
+    """Encode the (created_at, primary key) position of a row as an opaque cursor"""
+    if not isinstance(key, int):
+        key = str(key)
+
+    payload = json.dumps([created_at.isoformat(), key])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor, column) -> tuple:
+    """Decode a cursor generated by encode_cursor into a (created_at, key) pair"""
+    created_at, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    created_at = datetime.datetime.fromisoformat(created_at)
+
+    # coerce key back to the type of the primary key column
+    if isinstance(column.type, Integer):
+        key = int(key)
+    elif isinstance(column.type, UUID):
+        key = uuid.UUID(key)
+    else:
+        key = str(key)
+
+    return created_at, key
+
+def page_size() -> int:
+    """Read the page size from the `limit` query parameter"""
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type = int)
+    return max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+
+def paginate(query, model) -> tuple:
+    """Fetch a page of rows ordered by (created_at, primary key)
+
+    Page size and position are read from the `limit` and `cursor` query
+    parameters. Returns the rows of the page and the cursor of the next
+    page, which is None when there are no rows left.
+    """
+    limit = page_size()
+
+    key = model.__mapper__.primary_key[0]
+    ordering = (model.created_at, key)
+
+    # seek past the last row of the previous page
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            position = decode_cursor(cursor, key)
+        except (ValueError, TypeError):
+            abort(400, 'Invalid pagination cursor')
+        query = query.filter(tuple_(*ordering) > position)
+
+    # fetch one extra row to find out whether there is a next page
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, getattr(rows[-1], key.key))
+
+    return rows, next_cursor
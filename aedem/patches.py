@@ -0,0 +1,90 @@
+import datetime
+import numbers
+
+from flask import request
+from flask_restplus import abort, fields
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String
+
+def patchable_columns(model) -> tuple:
+    """Columns of model listed in its `__patchable_columns__`"""
+    return tuple(model.__table__.columns[key]
+        for key in getattr(model, '__patchable_columns__', ()))
+
+def _convert(column, value):
+    """Check value against the type of column, converting dates from ISO 8601 strings"""
+    if value is None:
+        if not column.nullable:
+            raise ValueError("cannot be null")
+        return None
+    if isinstance(column.type, Boolean):
+        if not isinstance(value, bool):
+            raise ValueError("expected a boolean")
+        return value
+    if isinstance(column.type, Integer):
+        if isinstance(value, bool) or not isinstance(value, numbers.Integral):
+            raise ValueError("expected an integer")
+        return value
+    if isinstance(column.type, Float):
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise ValueError("expected a number")
+        return float(value)
+    if isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError("expected a date and time, as YYYY-MM-DDTHH:MM:SS")
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        if not isinstance(value, str):
+            raise ValueError("expected a date, as YYYY-MM-DD")
+        return datetime.date.fromisoformat(value)
+    if isinstance(column.type, String):
+        if not isinstance(value, str):
+            raise ValueError("expected a string")
+        return value
+    return value
+
+def patch_values(model) -> dict:
+    """Column values given in the JSON body of a PATCH request for model
+
+    Only the columns listed in the `__patchable_columns__` of the model can
+    be given, each with a value of the type of the column; the request is
+    aborted with 400 Bad Request otherwise. The returned values can be
+    written with a single UPDATE, see Repository.update.
+    """
+    data = request.get_json(silent = True)
+    if not isinstance(data, dict) or not data:
+        abort(400, 'Expected a JSON object with the columns to update')
+
+    columns = dict((column.key, column) for column in patchable_columns(model))
+    unknown = [key for key in data if key not in columns]
+    if unknown:
+        abort(400, 'Columns cannot be updated: {}; updatable columns are {}'.format(
+            ', '.join(unknown), ', '.join(columns)))
+
+    values = {}
+    for key, value in data.items():
+        try:
+            values[key] = _convert(columns[key], value)
+        except ValueError as error:
+            abort(400, 'Invalid value of {}: {}'.format(key, error))
+    return values
+
+def _field(column):
+    if isinstance(column.type, Boolean):
+        return fields.Boolean
+    if isinstance(column.type, Integer):
+        return fields.Integer
+    if isinstance(column.type, Float):
+        return fields.Float
+    if isinstance(column.type, DateTime):
+        return fields.DateTime
+    if isinstance(column.type, Date):
+        return fields.Date
+    return fields.String
+
+def patch_model(namespace, model, name):
+    """Documentation model of the JSON body of PATCH requests for model"""
+    return namespace.model(name, dict(
+        (column.key, _field(column)(
+            description = "Novo valor de {}".format(column.key),
+            required = False))
+        for column in patchable_columns(model)))
@@ -0,0 +1,155 @@
+import abc
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy import select as select_statement
+
+from aedem.models import RoutingSession, get_engine
+
+logger = logging.getLogger(__name__)
+
+# channel notifications are published on
+CHANNEL = 'aedem_notifications'
+
+# largest payload PostgreSQL delivers with NOTIFY, in bytes
+_MAX_PAYLOAD = 7999
+
+class Broker(abc.ABC):
+    """Routes published messages to the subscribers of each user
+
+    Messages are dicts carrying either the `user_id` they are meant for or
+    the `user_ids` they concern.
+    Subscribers receive them through a queue of their own, so any number
+    of them may wait without holding database connections.
+    """
+    def __init__(self) -> None:
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id) -> queue.Queue:
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(str(user_id), set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id), set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(str(user_id), None)
+
+    def dispatch(self, message) -> None:
+        with self._lock:
+            if 'user_id' in message:
+                targets = list(self._subscribers.get(message['user_id'], ()))
+            else:
+                targets = [subscriber
+                    for user_id in message['user_ids']
+                    for subscriber in self._subscribers.get(user_id, ())]
+        for subscriber in targets:
+            subscriber.put(message)
+
+    @abc.abstractmethod
+    def publish(self, session, message) -> None:
+        """Publish message once the transaction of session commits"""
+
+class LocalBroker(Broker):
+    """Broker reaching the subscribers of the current process only"""
+    def publish(self, session, message) -> None:
+        session.info.setdefault('pubsub', []).append((self, message))
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _dispatch_published(session) -> None:
+    for broker, message in session.info.pop('pubsub', ()):
+        broker.dispatch(message)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_published(session) -> None:
+    session.info.pop('pubsub', None)
+
+def payloads(message) -> list:
+    """NOTIFY payloads of message, split into several when it does not fit in one"""
+    payload = json.dumps(message, separators = (',', ':'))
+    if len(payload.encode()) <= _MAX_PAYLOAD:
+        return [payload]
+
+    user_ids = message.get('user_ids', ())
+    if len(user_ids) > 1:
+        half = len(user_ids) // 2
+        return payloads({"user_ids": user_ids[:half]}) + \
+            payloads({"user_ids": user_ids[half:]})
+
+    # subscribers fetch notifications that do not fit themselves
+    message = dict(message)
+    message.pop('notification', None)
+    return [json.dumps(message, separators = (',', ':'))]
+
+class PostgresBroker(Broker):
+    """Broker reaching the subscribers of every process through LISTEN/NOTIFY
+
+    Messages are sent with pg_notify inside the transaction which
+    published them, so PostgreSQL delivers them on commit only. Each
+    process listens on a single connection of its own, opened with the
+    first subscriber, whatever the number of subscribers.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._listener_pid = None
+
+    def publish(self, session, message) -> None:
+        # payloads too large for a single NOTIFY are sent together
+        session.execute(select_statement([func.pg_notify(CHANNEL, payload)
+            for payload in payloads(message)]))
+
+    def subscribe(self, user_id) -> queue.Queue:
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                self._listener_pid = os.getpid()
+                threading.Thread(target = self._listen, args = (get_engine(),),
+                    name = 'aedem-listener', daemon = True).start()
+        return super().subscribe(user_id)
+
+    def _listen(self, engine) -> None:
+        while True:
+            try:
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.connect(*cargs, **cparams)
+                try:
+                    connection.autocommit = True
+                    connection.cursor().execute('LISTEN {}'.format(CHANNEL))
+                    while True:
+                        select.select([connection], [], [], 60)
+                        connection.poll()
+                        while connection.notifies:
+                            notify = connection.notifies.pop(0)
+                            self.dispatch(json.loads(notify.payload))
+                finally:
+                    connection.close()
+            except Exception:
+                logger.exception("Lost the notification listener connection")
+                time.sleep(1)
+
+def create_broker(config):
+    """Create the publish/subscribe backend chosen by config"""
+    backend = config['PUBSUB_BACKEND']
+    if backend == 'local':
+        return LocalBroker()
+    if backend == 'postgres':
+        return PostgresBroker()
+    raise ValueError("Unknown publish/subscribe backend '{}'".format(backend))
+
+def init_pubsub(app) -> None:
+    """Attach the publish/subscribe backend configured for app"""
+    app.extensions['aedem_pubsub'] = create_broker(app.config)
+
+def get_broker():
+    """Publish/subscribe backend of the current application"""
+    return current_app.extensions['aedem_pubsub']
@@ -0,0 +1,38 @@
+import random
+
+from flask import current_app, request
+
+from aedem.models import Session, get_replica_engines
+
+# methods whose handlers only read, answered by the read replicas
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# cookie set on clients which have just written, reading from the primary
+STICKY_COOKIE = 'aedem_primary'
+
+def read_from_primary() -> None:
+    """Send the remaining queries of the current request to the primary database"""
+    Session().info.pop('replica', None)
+
+def _route_session() -> None:
+    if request.method not in SAFE_METHODS or request.cookies.get(STICKY_COOKIE):
+        return
+    replicas = get_replica_engines()
+    if replicas:
+        Session().info['replica'] = random.choice(replicas)
+
+def _stick_to_primary(response):
+    # replicas lag behind the primary, so writers read their own writes
+    # from it for a while
+    if request.method not in SAFE_METHODS:
+        response.set_cookie(STICKY_COOKIE, '1',
+            max_age = current_app.config['DB_REPLICA_STICKINESS'],
+            httponly = True)
+    return response
+
+def init_replicas(app) -> None:
+    """Answer the read-only requests of app from the read replicas, if any are configured"""
+    if not app.config['DB_REPLICA_URLS']:
+        return
+    app.before_request(_route_session)
+    app.after_request(_stick_to_primary)
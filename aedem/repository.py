@@ -0,0 +1,154 @@
+import uuid
+
+from flask_restplus import abort
+from sqlalchemy import Integer, delete, exists, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm.util import identity_key
+
+from aedem.models import Session
+
+class Repository(object):
+    """Access to the rows of model by primary key
+
+    Rows are looked up through the identity map of the session first, so
+    that rows already loaded while handling the request cost no query, and
+    with a single query otherwise. Keys given as strings, such as the ones
+    of URLs, are converted to the type of the primary key; keys which
+    cannot be converted match no row.
+    """
+    def __init__(self, model, session = Session) -> None:
+        self.model = model
+        self.session = session
+        self.key = model.__mapper__.primary_key[0]
+
+    def coerce(self, key):
+        """Convert key to the type of the primary key, raising ValueError if it cannot be"""
+        try:
+            if isinstance(self.key.type, UUID) and not isinstance(key, uuid.UUID):
+                return uuid.UUID(str(key))
+            if isinstance(self.key.type, Integer):
+                return int(key)
+        except (TypeError, AttributeError):
+            raise ValueError("Invalid key {!r}".format(key))
+        return key
+
+    def cached(self, key):
+        """Row of key already loaded by the session, without querying the database"""
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return None
+        return self.session.identity_map.get(identity_key(self.model, key))
+
+    def get(self, key, *options):
+        """Row of key, or None if there is none
+
+        options are loader options applied when the row is not loaded yet.
+        """
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return None
+        return self.session.query(self.model).options(*options).get(key)
+
+    def get_or_404(self, key, *options):
+        """Row of key, aborting the request with 404 Not Found if there is none"""
+        row = self.get(key, *options)
+        if row is None:
+            abort(404)
+        return row
+
+    def get_many(self, keys, *options) -> dict:
+        """Rows of keys by key, loaded together in a single query; missing keys are left out"""
+        rows = {}
+        missing = set()
+        for key in keys:
+            try:
+                key = self.coerce(key)
+            except ValueError:
+                continue
+            row = self.session.identity_map.get(identity_key(self.model, key))
+            if row is not None:
+                rows[key] = row
+            else:
+                missing.add(key)
+
+        if missing:
+            for row in self.session.query(self.model).options(*options) \
+                    .filter(self.key.in_(missing)):
+                rows[getattr(row, self.key.key)] = row
+        return rows
+
+    def exists(self, key) -> bool:
+        """Whether there is a row of key"""
+        if self.cached(key) is not None:
+            return True
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return False
+        return self.session.query(exists().where(self.key == key)).scalar()
+
+    def columns(self, key, *columns):
+        """Given columns of the row of key as a plain row, or None if there is none"""
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return None
+        return self.session.query(*columns).filter(self.key == key).first()
+
+    def columns_or_404(self, key, *columns):
+        """Given columns of the row of key, aborting with 404 Not Found if there is none"""
+        row = self.columns(key, *columns)
+        if row is None:
+            abort(404)
+        return row
+
+    def update(self, key, values, *columns):
+        """Write values to the row of key in a single statement
+
+        Returns the given columns of the updated row, or None if there is
+        none. The columns are read back with UPDATE ... RETURNING on
+        PostgreSQL, with another query on other databases. Values are
+        written as they are, without the validators of the model.
+        """
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return None
+
+        statement = update(self.model.__table__).where(self.key == key).values(values)
+        if self.session.get_bind(self.model.__mapper__).dialect.name == 'postgresql':
+            return self.session.execute(statement.returning(*columns)).first()
+
+        if self.session.execute(statement).rowcount == 0:
+            return None
+        return self.columns(key, *columns)
+
+    def delete(self, key, *columns):
+        """Delete the row of key in a single statement
+
+        Returns the given columns of the deleted row, or None if there was
+        none, see delete_where.
+        """
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            return None
+        rows = self.delete_where(self.key == key, *columns)
+        return rows[0] if rows else None
+
+    def delete_where(self, clause, *columns) -> list:
+        """Delete the rows matching clause, returning their given columns
+
+        Rows are deleted with DELETE ... RETURNING on PostgreSQL, and read
+        beforehand on other databases. Their children are deleted by the
+        database, through ON DELETE CASCADE, without ever being loaded.
+        """
+        statement = delete(self.model.__table__).where(clause)
+        if self.session.get_bind(self.model.__mapper__).dialect.name == 'postgresql':
+            return self.session.execute(statement.returning(*columns)).fetchall()
+
+        rows = self.session.query(*columns).filter(clause).all()
+        self.session.execute(statement)
+        return rows
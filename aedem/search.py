@@ -0,0 +1,236 @@
+import base64
+import collections
+import html
+import json
+import math
+import re
+import threading
+import unicodedata
+
+from sqlalchemy import Float, and_, cast, func, literal_column, or_
+
+from aedem.serializers import serializer_for
+from aedem.models.news import News
+
+# text search configuration of the news search vector, see migration v0008
+LANGUAGE = 'portuguese'
+
+# tags wrapped around the matched words of snippets
+HIGHLIGHT = ('<b>', '</b>')
+
+_HEADLINE_OPTIONS = 'StartSel={}, StopSel={}, MaxWords=35, MinWords=15, MaxFragments=2'.format(
+    *HIGHLIGHT)
+
+# characters escaped in snippets, as html.escape does, ampersand first
+_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;'))
+
+def encode_position(position) -> str:
+    """Encode the (rank, id) position of a search result as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+def decode_position(cursor) -> tuple:
+    """Decode a cursor generated by encode_position"""
+    rank, identifier = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(rank), int(identifier)
+
+def search_news(session, text, limit, after = None, state_abbr = None, city_name = None,
+        serializer = None) -> tuple:
+    """Rank the news matching text, best matches first
+
+    Returns a page of at most limit news serialized by serializer, each
+    along with its `rank` and a highlighted `snippet` of its content, and
+    the (rank, id) position of its last item when there are more matches,
+    which is given back as after to fetch the following page.
+    """
+    if serializer is None:
+        serializer = serializer_for(News)
+
+    if session.get_bind(News.__mapper__).dialect.name == 'postgresql':
+        search = _search_postgresql
+    else:
+        search = _search_fallback
+    rows = search(session, serializer, text, limit + 1, after, state_abbr, city_name)
+
+    next_position = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_position = (rows[-1]['rank'], rows[-1]['id'])
+    return rows, next_position
+
+def _search_postgresql(session, serializer, text, limit, after, state_abbr, city_name) -> list:
+    """Search the GIN-indexed search vector of news"""
+    vector = literal_column('news.search_vector')
+    query = func.websearch_to_tsquery(LANGUAGE, text)
+
+    # rank as double precision, so positions survive their JSON round trip
+    rank = cast(func.ts_rank(vector, query), Float)
+
+    # rank the matches first, then fetch columns and snippets of the page only
+    matches = session.query(News.id, rank.label('rank')).filter(vector.op('@@')(query))
+    if state_abbr is not None:
+        matches = matches.filter(News.state_abbr == state_abbr)
+    if city_name is not None:
+        matches = matches.filter(News.city_name == city_name)
+    if after is not None:
+        after_rank, after_id = after
+        matches = matches.filter(or_(rank < after_rank,
+            and_(rank == after_rank, News.id > after_id)))
+    page = matches.order_by(rank.desc(), News.id).limit(limit).subquery()
+
+    # escape the content before highlighting it, so that only the
+    # highlighting tags are markup in snippets
+    content = News.content
+    for character, entity in _ESCAPES:
+        content = func.replace(content, character, entity)
+
+    rows = session.query(*serializer.columns, page.c.rank,
+            func.ts_headline(LANGUAGE, content, query,
+                _HEADLINE_OPTIONS).label('snippet')) \
+        .join(page, page.c.id == News.id) \
+        .order_by(page.c.rank.desc(), News.id)
+
+    results = []
+    for row in rows:
+        result = serializer.dump_row(row[:len(serializer.columns)])
+        result['rank'] = row.rank
+        result['snippet'] = row.snippet
+        results.append(result)
+    return results
+
+# words left out of the fallback index, as the Portuguese configuration does
+_STOPWORDS = frozenset('''
+    a ao aos as até com como da das de dela delas dele deles depois do dos e
+    ela elas ele eles em entre era essa essas esse esses esta estas este estes
+    eu foi for foram há isso isto já lhe mais mas me mesmo meu minha muito na
+    nas nem no nos nossa nosso num numa o os ou para pela pelas pelo pelos por
+    qual quando que quem se sem ser seu seus só sua suas também te tem ter
+    um uma umas uns você
+'''.split())
+
+def _normalize(word) -> str:
+    """Lowercase word without accents"""
+    word = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in word if not unicodedata.combining(char))
+
+def tokenize(text) -> list:
+    """Normalized words of text, without stopwords"""
+    return [token for token in map(_normalize, re.findall(r'\w+', text or ''))
+        if token not in _STOPWORDS]
+
+class InvertedIndex(object):
+    """In-memory inverted index of news, for databases without full-text search
+
+    Matches news containing every word of the query, ignoring case and
+    accents but without stemming, and ranks them with BM25, counting title
+    words twice.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents = ()) -> None:
+        self._postings = collections.defaultdict(dict)
+        self._lengths = {}
+        for identifier, title, content in documents:
+            self.add(identifier, title, content)
+
+    def add(self, identifier, title, content) -> None:
+        tokens = tokenize(title) * 2 + tokenize(content)
+        self._lengths[identifier] = len(tokens)
+        for token, frequency in collections.Counter(tokens).items():
+            self._postings[token][identifier] = frequency
+
+    def search(self, text) -> list:
+        """(identifier, score) of the documents matching text, best first"""
+        terms = set(tokenize(text))
+        if not terms or not self._lengths:
+            return []
+
+        postings = [self._postings.get(term, {}) for term in terms]
+        matches = set.intersection(*(set(posting) for posting in postings))
+
+        count = len(self._lengths)
+        average = sum(self._lengths.values()) / count
+        scores = []
+        for identifier in matches:
+            score = 0.0
+            length = self._lengths[identifier]
+            for posting in postings:
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                frequency = posting[identifier]
+                score += idf * frequency * (self.K1 + 1) / (frequency +
+                    self.K1 * (1 - self.B + self.B * length / average))
+            scores.append((identifier, score))
+
+        scores.sort(key = lambda match: (-match[1], match[0]))
+        return scores
+
+def highlight(content, text, words = 35) -> str:
+    """Snippet of content around the first word of text, with matched words highlighted
+
+    The snippet is HTML: content is escaped, and only the highlighting tags
+    are markup.
+    """
+    terms = set(tokenize(text))
+    tokens = list(re.finditer(r'\w+', content or ''))
+    positions = [index for index, token in enumerate(tokens)
+        if _normalize(token.group()) in terms]
+    if not tokens:
+        return ''
+
+    first = max(0, (positions[0] if positions else 0) - words // 3)
+    window = tokens[first:first + words]
+    start = window[0].start()
+
+    snippet = []
+    position = start
+    for token in window:
+        snippet.append(html.escape(content[position:token.start()]))
+        if _normalize(token.group()) in terms:
+            snippet.append(HIGHLIGHT[0] + html.escape(token.group()) + HIGHLIGHT[1])
+        else:
+            snippet.append(html.escape(token.group()))
+        position = token.end()
+    return ''.join(snippet)
+
+# fallback index of the current process, rebuilt when the news table changes
+_fallback_lock = threading.Lock()
+_fallback_signature = None
+_fallback_index = None
+
+def _fallback(session) -> InvertedIndex:
+    global _fallback_signature, _fallback_index
+    signature = tuple(session.query(func.count(News.id), func.max(News.id),
+        func.max(News.last_updated)).one())
+    with _fallback_lock:
+        if signature != _fallback_signature:
+            _fallback_index = InvertedIndex(
+                session.query(News.id, News.title, News.content))
+            _fallback_signature = signature
+        return _fallback_index
+
+def _search_fallback(session, serializer, text, limit, after, state_abbr, city_name) -> list:
+    """Search news through an in-memory inverted index"""
+    matches = _fallback(session).search(text)
+    if after is not None:
+        matches = [(identifier, score) for identifier, score in matches
+            if (-score, identifier) > (-after[0], after[1])]
+
+    # fetch candidates in rank order until the page is filled by the filters
+    results = []
+    while matches and len(results) < limit:
+        candidates, matches = matches[:limit], matches[limit:]
+        scores = dict(candidates)
+
+        query = session.query(*serializer.columns, News.content.label('snippet_source')) \
+            .filter(News.id.in_(scores))
+        if state_abbr is not None:
+            query = query.filter(News.state_abbr == state_abbr)
+        if city_name is not None:
+            query = query.filter(News.city_name == city_name)
+
+        for row in sorted(query, key = lambda row: (-scores[row.id], row.id)):
+            result = serializer.dump_row(row)
+            result['rank'] = scores[row.id]
+            result['snippet'] = highlight(row.snippet_source, text)
+            results.append(result)
+    return results[:limit]
@@ -0,0 +1,121 @@
+import datetime
+import functools
+import json
+import operator
+
+from sqlalchemy import Date, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+# compiled serializers, indexed by model class
+serializers = {}
+
+# shared encoder, configured as Flask's jsonify without pretty printing
+_encoder = json.JSONEncoder(separators = (',', ':'))
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = (None, "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug",
+    "Sep", "Oct", "Nov", "Dec")
+
+@functools.lru_cache(maxsize = 4096)
+def _encode_datetime(value) -> str:
+    """Format value as an HTTP date, like werkzeug.http.http_date"""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return "{}, {:02d} {} {:04d} {:02d}:{:02d}:{:02d} GMT".format(
+        _WEEKDAYS[value.weekday()], value.day, _MONTHS[value.month],
+        value.year, value.hour, value.minute, value.second)
+
+def _encode_date(value) -> str:
+    return _encode_datetime(datetime.datetime(value.year, value.month, value.day))
+
+def _converter(column):
+    """Pick the function that turns values of column into JSON types"""
+    if isinstance(column.type, DateTime):
+        return _encode_datetime
+    if isinstance(column.type, Date):
+        return _encode_date
+    if isinstance(column.type, UUID):
+        return str
+    return None
+
+class Serializer(object):
+    """Encoder compiled once for the columns of a model
+
+    Dates and UUIDs are converted to the same strings Flask's JSON encoder
+    produces, so payloads keep their format while jsonify no longer has to
+    special-case them. Columns listed in the `__private_columns__` of the
+    model, such as password hashes, are never serialized.
+    """
+    def __init__(self, model, columns = None) -> None:
+        self.model = model
+        if columns is None:
+            private = getattr(model, '__private_columns__', ())
+            columns = [column for column in model.__table__.columns
+                if column.key not in private]
+        self.columns = tuple(columns)
+        self.keys = tuple(column.key for column in self.columns)
+        self._projections = {}
+
+        # keep only the columns which need conversion
+        self._conversions = tuple(
+            (index, converter)
+            for index, converter in enumerate(map(_converter, self.columns))
+            if converter is not None)
+
+        getter = operator.attrgetter(*self.keys)
+        if len(self.keys) == 1:
+            self._getter = lambda row: (getter(row),)
+        else:
+            self._getter = getter
+
+    def project(self, keys) -> 'Serializer':
+        """Serializer of a subset of the columns of this one
+
+        The primary key and creation date, which rows are located and
+        paginated by, are always kept.
+        """
+        keys = frozenset(keys).union(
+            column.key for column in self.columns
+            if column.primary_key or column.key == 'created_at')
+
+        projection = self._projections.get(keys)
+        if projection is None:
+            projection = self._projections[keys] = Serializer(self.model,
+                [column for column in self.columns if column.key in keys])
+        return projection
+
+    def dump(self, row) -> dict:
+        """Serialize a mapped object"""
+        return self.dump_row(self._getter(row))
+
+    def dump_row(self, values) -> dict:
+        """Serialize a result tuple selected from self.columns"""
+        values = list(values)
+        for index, converter in self._conversions:
+            if values[index] is not None:
+                values[index] = converter(values[index])
+        return dict(zip(self.keys, values))
+
+    def encode_row(self, values) -> str:
+        """Encode a result tuple selected from self.columns as JSON text"""
+        return _encoder.encode(self.dump_row(values))
+
+    def iterencode(self, rows):
+        """Stream result tuples as the chunks of a JSON array, in bytes"""
+        separator = b'['
+        for values in rows:
+            yield separator + self.encode_row(values).encode()
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+def compile_serializers(base) -> None:
+    """Compile the serializers of every model declared on base"""
+    for model in base.__subclasses__():
+        serializers[model] = Serializer(model)
+
+def serializer_for(model) -> Serializer:
+    """Look up the serializer of model, compiling it if needed"""
+    serializer = serializers.get(model)
+    if serializer is None:
+        serializer = serializers[model] = Serializer(model)
+    return serializer
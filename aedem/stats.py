@@ -0,0 +1,222 @@
+import datetime
+import functools
+
+from sqlalchemy import bindparam, case, false, func, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.util import LRUCache
+
+from aedem.models.reports import Report
+from aedem.models.stats import ReportStats
+from aedem.repository import Repository
+
+def report_key(report) -> tuple:
+    """Aggregate a report is counted in: (state, city, area, day, status)"""
+    return (report.state_abbr, report.city_name, report.area or '',
+        report.created_at.date(), bool(report.status))
+
+def update_report_stats(session, deltas) -> None:
+    """Add deltas, a mapping of report_key to report counts, to the aggregates
+
+    Runs inside the transaction of session, so the aggregates are committed
+    together with the reports that changed them.
+    """
+    # merge the open and closed deltas of each aggregate
+    rows = {}
+    for (state_abbr, city_name, area, day, status), delta in deltas.items():
+        if delta == 0:
+            continue
+
+        row = rows.setdefault((state_abbr, city_name, area, day), {
+            "state_abbr": state_abbr,
+            "city_name": city_name,
+            "area": area,
+            "day": day,
+            "open_count": 0,
+            "closed_count": 0
+        })
+        row['open_count' if status else 'closed_count'] += delta
+
+    if not rows:
+        return
+
+    if session.get_bind(ReportStats.__mapper__).dialect.name == 'postgresql':
+        # upsert every changed aggregate in a single statement
+        table = ReportStats.__table__
+        statement = insert(table).values(list(rows.values()))
+        session.execute(statement.on_conflict_do_update(
+            index_elements = table.primary_key.columns,
+            set_ = {
+                "open_count": table.c.open_count + statement.excluded.open_count,
+                "closed_count": table.c.closed_count + statement.excluded.closed_count,
+                "last_updated": func.now()
+            }))
+        return
+
+    for key, row in rows.items():
+        stats = session.query(ReportStats).get(key)
+        if stats is None:
+            session.add(ReportStats(**row))
+        else:
+            stats.open_count += row['open_count']
+            stats.closed_count += row['closed_count']
+
+def _stats_key(table, delta) -> list:
+    """Aggregate of the reports of table, and the delta of its counts"""
+    return [
+        table.c.state_abbr,
+        table.c.city_name,
+        func.coalesce(table.c.area, '').label('area'),
+        func.date(table.c.created_at).label('day'),
+        case([(table.c.status == True, delta)], else_ = 0).label('open_count'),
+        case([(table.c.status == True, 0)], else_ = delta).label('closed_count')
+    ]
+
+def _move_stats(*moves):
+    """Statement adding the count deltas selected by moves to the aggregates, as a CTE
+
+    Each of moves selects the _stats_key of reports; the deltas of each
+    aggregate are added up, and aggregates whose counts do not change are
+    left alone.
+    """
+    moves = union_all(*moves).alias('moves') if len(moves) > 1 else moves[0].alias('moves')
+    deltas = select([
+            moves.c.state_abbr,
+            moves.c.city_name,
+            moves.c.area,
+            moves.c.day,
+            func.sum(moves.c.open_count),
+            func.sum(moves.c.closed_count)]) \
+        .group_by(moves.c.state_abbr, moves.c.city_name, moves.c.area, moves.c.day) \
+        .having(or_(func.sum(moves.c.open_count) != 0, func.sum(moves.c.closed_count) != 0))
+
+    stats = ReportStats.__table__
+    statement = insert(stats).from_select(
+        ['state_abbr', 'city_name', 'area', 'day', 'open_count', 'closed_count'], deltas)
+    return statement.on_conflict_do_update(
+            index_elements = stats.primary_key.columns,
+            set_ = {
+                "open_count": stats.c.open_count + statement.excluded.open_count,
+                "closed_count": stats.c.closed_count + statement.excluded.closed_count,
+                "last_updated": func.now()
+            }) \
+        .returning(stats.c.day).cte('moved')
+
+def _select_changed(changed, moved, columns):
+    # statements of WITH clauses always run, joining moved only makes it part of the query
+    return select([changed.c[key] for key in columns]) \
+        .select_from(changed.outerjoin(moved, false()))
+
+@functools.lru_cache(maxsize = 256)
+def _report_update(keys, columns):
+    """Statement writing the columns keys of a report, returning columns, on PostgreSQL"""
+    # the report before the update, locked until the transaction ends
+    table = Report.__table__
+    old = select([table]).where(table.c.id == bindparam('report_id')) \
+        .with_for_update().cte('old')
+    # onupdate defaults are not applied to statements nested in WITH clauses
+    values = dict((key, bindparam('value_' + key, type_ = table.c[key].type))
+        for key in keys + ('last_updated',))
+    updated = table.update().where(table.c.id == old.c.id).values(values) \
+        .returning(*table.columns).cte('updated')
+
+    # count the report out of its old aggregate and into its new one
+    moved = _move_stats(select(_stats_key(old, -1)), select(_stats_key(updated, 1)))
+    return _select_changed(updated, moved, columns)
+
+@functools.lru_cache(maxsize = 256)
+def _report_delete(column, columns):
+    """Statement deleting the reports whose column is in keys, returning columns, on PostgreSQL"""
+    table = Report.__table__
+    deleted = table.delete() \
+        .where(table.c[column].in_(bindparam('keys', expanding = True))) \
+        .returning(*table.columns).cte('deleted')
+
+    # count the reports out of their aggregates
+    moved = _move_stats(select(_stats_key(deleted, -1)))
+    return _select_changed(deleted, moved, columns)
+
+# compiled forms of the statements of _report_update and _report_delete,
+# reused across requests
+_compiled_statements = LRUCache(256)
+
+def update_report(session, key, values, columns):
+    """Write values to the report of key, moving it between aggregates if needed
+
+    Returns the given columns of the updated report, or None if there is
+    none. On PostgreSQL the report is updated, its columns returned and the
+    aggregates it leaves and joins updated by a single statement, so that
+    closing a report takes one round trip; other databases update the
+    report through the ORM, in the transaction of session.
+    """
+    if session.get_bind(Report.__mapper__).dialect.name != 'postgresql':
+        report = Repository(Report, session).get(key)
+        if report is None:
+            return None
+        old_key = report_key(report)
+        for datafield, value in values.items():
+            setattr(report, datafield, value)
+        new_key = report_key(report)
+        if new_key != old_key:
+            update_report_stats(session, {old_key: -1, new_key: 1})
+        session.flush()
+        return Repository(Report, session).columns(report.id, *columns)
+
+    try:
+        key = Repository(Report, session).coerce(key)
+    except ValueError:
+        return None
+
+    statement = _report_update(tuple(sorted(values)),
+        tuple(column.key for column in columns))
+    params = dict(('value_' + datafield, value) for datafield, value in values.items())
+    params.update(report_id = key, value_last_updated = datetime.datetime.now())
+
+    connection = session.connection(mapper = Report.__mapper__) \
+        .execution_options(compiled_cache = _compiled_statements)
+    return connection.execute(statement, params).first()
+
+def delete_reports(session, column, keys, columns) -> list:
+    """Delete the reports whose column is one of keys, counting them out of their aggregates
+
+    Returns the given columns of the deleted reports. Their attachments and
+    replies are deleted by the database, through ON DELETE CASCADE, without
+    being loaded. On PostgreSQL the reports are deleted and the aggregates
+    updated by a single statement, whatever the number of reports; other
+    databases read the reports first, in the transaction of session.
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    if session.get_bind(Report.__mapper__).dialect.name != 'postgresql':
+        clause = column.in_(keys)
+        deltas = {}
+        for report in session.query(Report.state_abbr, Report.city_name, Report.area,
+                Report.created_at, Report.status).filter(clause):
+            deltas[report_key(report)] = deltas.get(report_key(report), 0) - 1
+        update_report_stats(session, deltas)
+        return Repository(Report, session).delete_where(clause, *columns)
+
+    statement = _report_delete(column.key, tuple(returned.key for returned in columns))
+    connection = session.connection(mapper = Report.__mapper__) \
+        .execution_options(compiled_cache = _compiled_statements)
+    return connection.execute(statement, keys = keys).fetchall()
+
+def rebuild_report_stats(session) -> None:
+    """Recompute every aggregate from the reports table"""
+    area = func.coalesce(Report.area, '')
+    day = func.date(Report.created_at)
+
+    totals = session.query(
+            Report.state_abbr,
+            Report.city_name,
+            area,
+            day,
+            func.sum(case([(Report.status == True, 1)], else_ = 0)),
+            func.sum(case([(Report.status == True, 0)], else_ = 1))) \
+        .group_by(Report.state_abbr, Report.city_name, area, day)
+
+    session.query(ReportStats).delete()
+    session.execute(ReportStats.__table__.insert().from_select(
+        ['state_abbr', 'city_name', 'area', 'day', 'open_count', 'closed_count'],
+        totals.statement))
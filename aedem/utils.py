@@ -1,3 +1,31 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from aedem.serializers import serializer_for
+
 def dictionarize(row) -> dict:
     """Transform SQLAlchemy objects into dicts"""
-    return dict((col, getattr(row, col)) for col in row.__table__.columns.keys())
+    return serializer_for(type(row)).dump(row)
+
+@contextmanager
+def count_queries(engine):
+    """Record the SQL statements issued through engine inside the block
+
+    Yields the list the statements are appended to, so that callers can
+    assert how many round trips a handler makes:
+
+        with count_queries(get_engine()) as statements:
+            client.get('/api/v1/reports')
+        assert len(statements) == 2
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
@@ -1,3 +1,6 @@
 from aedem import create_app
 
-app = create_app()
\ No newline at end of file
+app = create_app()
+
+if __name__ == '__main__':
+    app.run(debug = app.config['DEBUG'])
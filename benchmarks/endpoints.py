@@ -0,0 +1,299 @@
+"""Benchmark of the CRUD endpoints of every namespace through the Flask test client
+
+A database is seeded through the models (see benchmarks.seed), by default
+in a temporary SQLite file standing in for PostgreSQL, so that no server
+nor network is needed. Each endpoint is then requested in turn, reporting
+its latency percentiles, SQL statements and memory allocated per request.
+
+Usage:
+
+    $ python -m benchmarks.endpoints --users 500 --output results.json
+    $ python -m benchmarks.endpoints --users 500 --baseline results.json --threshold 0.5
+
+Results are saved as JSON; given a baseline, the run fails when an
+endpoint got slower or allocates more than threshold allows, or issues
+more SQL statements per request.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# latency differences below this many milliseconds are noise, not regressions
+NOISE_MS = 1.0
+
+class Case(object):
+    """Endpoint benchmarked with the requests built by request(index)
+
+    request returns the (path, JSON body) of the index-th request; created,
+    when given, receives each response of the endpoint.
+    """
+    def __init__(self, name, method, route, request, created = None) -> None:
+        self.name = name
+        self.method = method
+        self.route = route
+        self.request = request
+        self.created = created
+
+def crud_cases(ids, prefix) -> list:
+    """Cases of the CRUD endpoints of every namespace, over the seeded ids"""
+    created = dict((name, []) for name in ids)
+
+    def pick(name):
+        return lambda index: ids[name][index * 7919 % len(ids[name])]
+
+    def creator(name, key):
+        return lambda response: created[name].append(key(response['response']))
+
+    def taker(name):
+        return lambda index: created[name].pop()
+
+    user, report = pick('users'), pick('reports')
+
+    def namespace(name, create, key, update, patch):
+        item = pick(name)
+        cases = [
+            Case(name + '.list', 'GET', prefix + '/' + name,
+                lambda index: ('/{}?limit=50'.format(name), None)),
+            Case(name + '.create', 'POST', prefix + '/' + name,
+                lambda index: ('/' + name, create(index)),
+                creator(name, key)),
+            Case(name + '.get', 'GET', prefix + '/' + name + '/<id>',
+                lambda index: ('/{}/{}'.format(name, item(index)), None)),
+            Case(name + '.update', 'PUT', prefix + '/' + name + '/<id>',
+                lambda index: ('/{}/{}?{}'.format(name, item(index), update(index)), None)),
+            Case(name + '.patch', 'PATCH', prefix + '/' + name + '/<id>',
+                lambda index: ('/{}/{}'.format(name, item(index)), patch(index))),
+            Case(name + '.delete', 'DELETE', prefix + '/' + name + '/<id>',
+                lambda index: ('/{}/{}'.format(name, taker(name)(index)), None)),
+        ]
+        if update is None:
+            cases.pop(3)
+        return cases
+
+    return namespace('privileges',
+            lambda index: {"identifier": "bench-privilege-{}".format(index),
+                "assignable": True},
+            lambda response: response['identifier'],
+            # query strings cannot carry the only updatable column, a boolean
+            None,
+            lambda index: {"assignable": index % 2 == 0}) + \
+        namespace('flags',
+            lambda index: {"identifier": "bench-flag-{}".format(index),
+                "title": "Flag", "description": "Benchmark",
+                "privileges": ids['privileges'][:3]},
+            lambda response: response['flag']['identifier'],
+            lambda index: 'title=Flag+{}'.format(index),
+            lambda index: {"title": "Flag {}".format(index)}) + \
+        namespace('users',
+            lambda index: {"name": "Benchmark", "passhash": "hash", "salt": "salt",
+                "email": "bench{}@example.com".format(index), "phone": "28{:09d}".format(index),
+                "birthday": "1990-01-01", "zip_code": "29000000",
+                "state_abbr": "ES", "city_name": "Vitória", "city_number": 3205309,
+                "area": "Centro"},
+            lambda response: response['id'],
+            lambda index: 'area=Goiabeiras',
+            lambda index: {"area": "Goiabeiras"}) + \
+        namespace('reports',
+            lambda index: {"state_abbr": "ES", "city_name": "Vitória", "area": "Centro",
+                "geolatitude": -20.3, "geolongitude": -40.3,
+                "description": "Benchmark", "user": user(index),
+                "attachments": ["https://example.com/bench.jpg"]},
+            lambda response: response['report']['id'],
+            lambda index: 'description=Atualizada',
+            # moves the report between the open and closed aggregates
+            lambda index: {"status": index % 2 == 0}) + \
+        namespace('replies',
+            lambda index: {"content": "Benchmark", "user": user(index),
+                "report": report(index)},
+            lambda response: response['id'],
+            lambda index: 'content=Atualizada',
+            lambda index: {"content": "Atualizada"}) + \
+        namespace('notifications',
+            lambda index: {"user_id": user(index), "notiftype": "info",
+                "content": "Benchmark"},
+            lambda response: response['id'],
+            lambda index: 'content=Atualizada',
+            lambda index: {"content": "Atualizada"}) + \
+        namespace('news',
+            lambda index: {"title": "Benchmark", "content": "Dengue " * 50,
+                "source": "Benchmark", "published_at": "2020-01-01",
+                "external_link": "https://example.com", "state_abbr": "ES",
+                "city_name": "Vitória"},
+            lambda response: response['id'],
+            lambda index: 'title=Atualizada',
+            lambda index: {"title": "Atualizada"})
+
+def percentile(values, fraction) -> float:
+    """Nearest-rank percentile of values"""
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+def run_case(client, engine, prefix, case, requests, warmup, allocations) -> dict:
+    """Request case warmup + requests + allocations times, measuring each phase"""
+    from aedem.utils import count_queries
+
+    latencies, queries, allocated = [], [], []
+    errors = 0
+    for index in range(warmup + requests + allocations):
+        path, body = case.request(index)
+        measured = index >= warmup
+        traced = index >= warmup + requests
+
+        with count_queries(engine) as statements:
+            if traced:
+                tracemalloc.start()
+                tracemalloc.clear_traces()
+            started = time.perf_counter()
+            response = client.open(prefix + path, method = case.method, json = body)
+            data = response.get_data()
+            elapsed = time.perf_counter() - started
+            if traced:
+                allocated.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+        # handlers answer errors with HTTP 200 and an error envelope as well
+        payload = json.loads(data) if response.is_json else None
+        failed = response.status_code >= 400 or \
+            (isinstance(payload, dict) and payload.get('error'))
+        if failed:
+            errors += 1
+        elif case.created is not None:
+            case.created(payload)
+
+        if measured and not traced:
+            latencies.append(elapsed * 1000)
+            queries.append(len(statements))
+
+    return {
+        "method": case.method,
+        "route": case.route,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "queries": sum(queries) / len(queries),
+        "max_queries": max(queries),
+        "allocated_kib": percentile(allocated, 0.50) / 1024 if allocated else None
+    }
+
+def compare(results, baseline, threshold) -> list:
+    """Regressions of results against baseline, as readable strings"""
+    regressions = []
+    for name, base in sorted(baseline['results'].items()):
+        current = results['results'].get(name)
+        if current is None:
+            continue
+        # medians, since the tail of a short run varies too much between runs
+        if current['p50_ms'] > base['p50_ms'] * (1 + threshold) and \
+                current['p50_ms'] - base['p50_ms'] > NOISE_MS:
+            regressions.append("{}: p50 {:.2f} ms, was {:.2f} ms".format(
+                name, current['p50_ms'], base['p50_ms']))
+        if current['queries'] > base['queries'] + 0.01:
+            regressions.append("{}: {:.2f} queries per request, was {:.2f}".format(
+                name, current['queries'], base['queries']))
+        if current['allocated_kib'] is not None and base['allocated_kib'] is not None and \
+                current['allocated_kib'] > base['allocated_kib'] * (1 + threshold):
+            regressions.append("{}: {:.1f} KiB allocated, was {:.1f} KiB".format(
+                name, current['allocated_kib'], base['allocated_kib']))
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--users', type = int, default = 200,
+        help = "seeded users; other rows are generated in proportion")
+    parser.add_argument('--requests', type = int, default = 100,
+        help = "measured requests per endpoint")
+    parser.add_argument('--warmup', type = int, default = 10)
+    parser.add_argument('--allocations', type = int, default = 5,
+        help = "requests per endpoint traced for allocations")
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--database', default = None,
+        help = "database URL, a temporary SQLite file by default")
+    parser.add_argument('--only', default = None,
+        help = "benchmark the endpoints whose name starts with this prefix only")
+    parser.add_argument('--output', default = None,
+        help = "file the JSON results are saved to")
+    parser.add_argument('--baseline', default = None,
+        help = "JSON results to compare with")
+    parser.add_argument('--threshold', type = float, default = 0.5,
+        help = "tolerated slowdown and allocation growth, as a fraction")
+    args = parser.parse_args()
+
+    os.environ.setdefault('FLASK_ENV', 'testing')
+
+    directory = None
+    database = args.database
+    if database is None:
+        directory = tempfile.mkdtemp(prefix = 'aedem-benchmark-')
+        database = 'sqlite:///' + os.path.join(directory, 'aedem.db')
+
+    try:
+        from aedem import create_app
+        from aedem.models import Session, configure_database, get_engine, initialize_database
+        from benchmarks.seed import seed
+
+        app = create_app()
+        app.config['DB_URL'] = database
+        configure_database(app.config)
+
+        with app.app_context():
+            engine = get_engine()
+            initialize_database(engine)
+            ids = seed(Session(), args.users, args.seed)
+            Session.remove()
+
+            client = app.test_client()
+            prefix = app.config['BASE_URL']
+            results = {
+                "database": engine.dialect.name,
+                "users": args.users,
+                "seed": args.seed,
+                "python": platform.python_version(),
+                "results": {}
+            }
+
+            print("{:<22} {:>9} {:>9} {:>9} {:>8} {:>10} {:>7}".format(
+                "endpoint", "p50 ms", "p95 ms", "p99 ms", "queries", "alloc KiB", "errors"))
+            for case in crud_cases(ids, prefix):
+                if args.only and not case.name.startswith(args.only):
+                    continue
+                result = run_case(client, engine, prefix, case,
+                    args.requests, args.warmup, args.allocations)
+                results['results'][case.name] = result
+                print("{:<22} {:>9.2f} {:>9.2f} {:>9.2f} {:>8.2f} {:>10.1f} {:>7}".format(
+                    case.name, result['p50_ms'], result['p95_ms'], result['p99_ms'],
+                    result['queries'], result['allocated_kib'] or 0, result['errors']))
+            engine.dispose()
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors = True)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent = 2, sort_keys = True)
+
+    failures = ["{}: {} failed requests".format(name, result['errors'])
+        for name, result in sorted(results['results'].items()) if result['errors']]
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if (baseline['database'], baseline['users']) != (results['database'], results['users']):
+            print("warning: baseline ran on {} with {} users".format(
+                baseline['database'], baseline['users']))
+        failures += compare(results, baseline, args.threshold)
+
+    for failure in failures:
+        print("FAIL " + failure)
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
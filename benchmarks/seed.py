@@ -0,0 +1,176 @@
+"""Seed a database with generated data through the models of the API
+
+Usage:
+
+    $ FLASK_ENV=development python -m benchmarks.seed --users 1000
+"""
+import argparse
+import datetime
+import random
+import uuid
+
+# rows generated for each user
+REPORTS_PER_USER = 5
+ATTACHMENTS_PER_REPORT = 2
+REPLIES_PER_REPORT = 1
+NOTIFICATIONS_PER_USER = 5
+NEWS_PER_USER = 1
+
+PRIVILEGES = 20
+FLAGS = 5
+
+LOCATIONS = (
+    ("ES", "Vitória", ("Centro", "Goiabeiras", "Jardim Camburi", "Praia do Canto")),
+    ("ES", "Vila Velha", ("Centro", "Itapoã", "Praia da Costa")),
+    ("RJ", "Rio de Janeiro", ("Centro", "Tijuca", "Copacabana", "Madureira")),
+    ("SP", "São Paulo", ("Sé", "Pinheiros", "Mooca", "Santana")),
+)
+
+WORDS = (
+    "dengue foco água parada caixa pneu vacinação mosquito aedes aegypti "
+    "larvas calha quintal terreno baldio piscina vaso planta garrafa lixo "
+    "chuva bairro agentes prefeitura campanha casos sintomas febre"
+).split()
+
+def sentence(rng, words) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def seed(session, users, seed = 0) -> dict:
+    """Generate and commit a database of the given number of users
+
+    Rows are generated by a random generator seeded with seed, so that
+    databases seeded alike hold the same data. Returns the identifiers of
+    the generated rows by model name.
+    """
+    from aedem.models.privileges import Privilege
+    from aedem.models.flags import Flag
+    from aedem.models.users import User
+    from aedem.models.reports import Report
+    from aedem.models.attachments import Attachment
+    from aedem.models.notifications import Notification
+    from aedem.models.replies import Reply
+    from aedem.models.news import News
+
+    rng = random.Random(seed)
+    identifiers = dict((name, []) for name in ('privileges', 'flags', 'users',
+        'reports', 'attachments', 'replies', 'notifications', 'news'))
+
+    privileges = [Privilege(identifier = "privilege-{}".format(index),
+            assignable = index % 2 == 0)
+        for index in range(PRIVILEGES)]
+    flags = []
+    for index in range(FLAGS):
+        flag = Flag(identifier = "flag-{}".format(index),
+            title = "Flag {}".format(index),
+            description = sentence(rng, 8))
+        flag.privileges = rng.sample(privileges, 4)
+        flags.append(flag)
+    session.add_all(privileges + flags)
+    session.commit()
+    identifiers['privileges'] = [privilege.identifier for privilege in privileges]
+    identifiers['flags'] = [flag.identifier for flag in flags]
+
+    # commit in chunks, so that seeding large databases keeps memory bounded
+    for first in range(0, users, 500):
+        rows = []
+        for index in range(first, min(first + 500, users)):
+            state_abbr, city_name, areas = rng.choice(LOCATIONS)
+            user = User(
+                name = "Usuário {}".format(index),
+                passhash = uuid.UUID(int = rng.getrandbits(128)).hex,
+                salt = uuid.UUID(int = rng.getrandbits(128)).hex[:16],
+                email = "usuario{}@example.com".format(index),
+                phone = "27{:09d}".format(index),
+                birthday = datetime.date(1950, 1, 1) + datetime.timedelta(days = rng.randrange(20000)),
+                zip_code = "{:08d}".format(rng.randrange(10 ** 8)),
+                state_abbr = state_abbr,
+                city_name = city_name,
+                city_number = rng.randrange(1, 6000),
+                area = rng.choice(areas)
+            )
+            user.id = uuid.UUID(int = rng.getrandbits(128), version = 4)
+            user.flag = rng.choice(flags)
+            user.unread_notifications = NOTIFICATIONS_PER_USER
+            rows.append(user)
+
+            for _ in range(REPORTS_PER_USER):
+                report = Report(
+                    state_abbr = state_abbr,
+                    city_name = city_name,
+                    area = rng.choice(areas),
+                    geolatitude = rng.uniform(-23.6, -20.2),
+                    geolongitude = rng.uniform(-46.7, -40.2),
+                    description = sentence(rng, 12)
+                )
+                report.status = rng.random() < 0.7
+                report.user = user
+                for number in range(ATTACHMENTS_PER_REPORT):
+                    attachment = Attachment("https://example.com/{}/{}.jpg".format(
+                        user.id, number))
+                    attachment.user = user
+                    report.attachments.append(attachment)
+                for _ in range(REPLIES_PER_REPORT):
+                    reply = Reply(sentence(rng, 10))
+                    reply.user = user
+                    report.replies.append(reply)
+                rows.append(report)
+
+            for _ in range(NOTIFICATIONS_PER_USER):
+                notification = Notification(notiftype = rng.choice(("info", "alert")),
+                    content = sentence(rng, 10))
+                notification.user = user
+                rows.append(notification)
+
+            for _ in range(NEWS_PER_USER):
+                rows.append(News(
+                    title = sentence(rng, 6),
+                    content = " ".join(sentence(rng, 15) + "." for _ in range(8)),
+                    source = "Secretaria de Saúde",
+                    published_at = "2020-{:02d}-{:02d}".format(rng.randrange(1, 13),
+                        rng.randrange(1, 29)),
+                    external_link = "https://example.com/news/{}".format(index),
+                    state_abbr = state_abbr,
+                    city_name = city_name
+                ))
+
+        # identifiers are assigned on flush, and expired again on commit
+        session.add_all(rows)
+        session.flush()
+
+        for row in rows:
+            if isinstance(row, User):
+                identifiers['users'].append(str(row.id))
+            elif isinstance(row, Report):
+                identifiers['reports'].append(row.id)
+                identifiers['attachments'].extend(attachment.id
+                    for attachment in row.attachments)
+                identifiers['replies'].extend(reply.id for reply in row.replies)
+            elif isinstance(row, Notification):
+                identifiers['notifications'].append(row.id)
+            elif isinstance(row, News):
+                identifiers['news'].append(row.id)
+        session.commit()
+        session.expunge_all()
+
+    return identifiers
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--users', type = int, default = 1000)
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    from aedem import create_app
+    from aedem.models import Session, get_engine, initialize_database
+
+    app = create_app()
+    with app.app_context():
+        initialize_database(get_engine())
+        identifiers = seed(Session(), args.users, args.seed)
+        Session.remove()
+
+    for name, rows in identifiers.items():
+        print("{:<14} {:>9}".format(name, len(rows)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Microbenchmark of the compiled serializers against dictionarize + jsonify
+
+Usage:
+
+    $ python -m benchmarks.serializers --rows 10000 --repeat 5
+"""
+import argparse
+import datetime
+import timeit
+import uuid
+
+from flask import Flask, jsonify
+
+def legacy_dictionarize(row) -> dict:
+    """dictionarize as implemented before the compiled serializers"""
+    return dict((col, getattr(row, col)) for col in row.__table__.columns.keys())
+
+def make_reports(count) -> list:
+    """Build transient reports filled the way the database would fill them"""
+    from aedem.models.reports import Report
+
+    now = datetime.datetime.now()
+    user_id = uuid.uuid4()
+    reports = []
+    for index in range(count):
+        report = Report(
+            state_abbr = "ES",
+            city_name = "Vitória",
+            area = "Goiabeiras",
+            geolatitude = "-20.2776",
+            geolongitude = "-40.3035",
+            description = "Foco de água parada #{}".format(index)
+        )
+        report.id = index
+        report.user_id = user_id
+        report.status = True
+        report.created_at = now
+        report.last_updated = now
+        reports.append(report)
+    return reports
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--rows', type = int, default = 10000)
+    parser.add_argument('--repeat', type = int, default = 5)
+    args = parser.parse_args()
+
+    # jsonify encodes within an application context
+    app = Flask('aedem')
+    app.config.from_object('config.development.Config')
+    app.app_context().push()
+
+    from aedem.models import Base
+    from aedem.models.privileges import Privilege
+    from aedem.models.flags import Flag
+    from aedem.models.users import User
+    from aedem.models.reports import Report
+    from aedem.models.attachments import Attachment
+    from aedem.models.notifications import Notification
+    from aedem.models.replies import Reply
+    from aedem.models.news import News
+    from aedem.serializers import compile_serializers, serializer_for
+    compile_serializers(Base)
+
+    serializer = serializer_for(Report)
+    reports = make_reports(args.rows)
+    rows = [tuple(getattr(report, key) for key in serializer.keys)
+        for report in reports]
+
+    cases = [
+        ("dictionarize + jsonify (legacy)", lambda: jsonify(
+            {"response": [legacy_dictionarize(r) for r in reports]}).get_data()),
+        ("Serializer.dump + jsonify", lambda: jsonify(
+            {"response": [serializer.dump(r) for r in reports]}).get_data()),
+        ("Serializer.dump_row + jsonify", lambda: jsonify(
+            {"response": [serializer.dump_row(r) for r in rows]}).get_data()),
+        ("Serializer.iterencode", lambda: b''.join(serializer.iterencode(rows))),
+    ]
+
+    print("{} reports, best of {} runs".format(args.rows, args.repeat))
+    baseline = None
+    for name, case in cases:
+        best = min(timeit.repeat(case, number = 1, repeat = args.repeat))
+        baseline = baseline or best
+        print("{:<34} {:>9.2f} ms {:>7.2f}x".format(
+            name, best * 1000, baseline / best))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""Throughput of the API served by gunicorn, with thread and with gevent workers
+
+A database is seeded as in benchmarks.endpoints, by default in a temporary
+SQLite file; use --database to measure against PostgreSQL, the only
+database gevent workers wait for cooperatively. The API is then served by
+gunicorn once per worker class, each time under the same load: concurrent
+clients repeatedly requesting the detail and list endpoints, optionally
+while --streams notification streams are held open, as connected apps do.
+
+Usage:
+
+    $ python -m benchmarks.throughput --database postgresql://localhost/aedem \\
+        --concurrency 64 --streams 16 --output throughput.json
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.endpoints import percentile
+
+# worker classes compared, see gunicorn.conf.py and gunicorn.gevent.conf.py
+MODES = ('gthread', 'gevent')
+
+def serve(mode, database, port, workers, threads) -> None:
+    """Serve the API on port with gunicorn workers of class mode, until terminated"""
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', '127.0.0.1:{}'.format(port))
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', mode)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_connections', 1000)
+            self.cfg.set('loglevel', 'warning')
+
+        def load(self):
+            # created by each worker, after gevent patched the standard library
+            from aedem import create_app
+            from aedem.models import configure_database
+
+            app = create_app()
+            app.config['DB_URL'] = database
+            configure_database(app.config)
+            return app
+
+    Server().run()
+
+def free_port() -> int:
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        return listener.getsockname()[1]
+
+def wait_until_serving(process, port, timeout = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited with status {}".format(process.returncode))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout = 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Server did not start in {} seconds".format(timeout))
+
+def open_streams(port, paths) -> list:
+    """Open a notification stream on each of paths, without ever reading from them"""
+    streams = []
+    for path in paths:
+        stream = socket.create_connection(('127.0.0.1', port))
+        stream.sendall('GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n'.format(path).encode())
+        streams.append(stream)
+    return streams
+
+def load(port, paths, concurrency, duration) -> dict:
+    """Request paths from concurrency clients for duration seconds, measuring each request
+
+    Requests left unanswered by the end of the run are counted as errors.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout = duration)
+        measured, failed = [], 0
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += concurrency
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                body = response.read()
+                # handlers answer errors with HTTP 200 and an error envelope as well
+                ok = response.status == 200 and not json.loads(body).get('error')
+            except (OSError, http.client.HTTPException, ValueError):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout = duration)
+                ok = False
+            if ok:
+                measured.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(measured)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target = client, args = (index,))
+        for index in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) if latencies else None
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument('--users', type = int, default = 200,
+        help = "seeded users; other rows are generated in proportion")
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--database', default = None,
+        help = "database URL, a temporary SQLite file by default")
+    parser.add_argument('--modes', nargs = '+', choices = MODES, default = list(MODES),
+        help = "gunicorn worker classes compared")
+    parser.add_argument('--workers', type = int, default = 1,
+        help = "gunicorn worker processes")
+    parser.add_argument('--threads', type = int, default = 4,
+        help = "threads of each gthread worker")
+    parser.add_argument('--concurrency', type = int, default = 32,
+        help = "clients requesting at the same time")
+    parser.add_argument('--streams', type = int, default = 0,
+        help = "notification streams held open during the run")
+    parser.add_argument('--duration', type = float, default = 10,
+        help = "seconds each mode is measured for")
+    parser.add_argument('--output', default = None,
+        help = "file the JSON results are saved to")
+    parser.add_argument('--serve', choices = MODES, help = argparse.SUPPRESS)
+    parser.add_argument('--port', type = int, help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault('FLASK_ENV', 'testing')
+
+    if args.serve:
+        serve(args.serve, args.database, args.port, args.workers, args.threads)
+        return
+
+    directory = None
+    database = args.database
+    if database is None:
+        directory = tempfile.mkdtemp(prefix = 'aedem-benchmark-')
+        database = 'sqlite:///' + os.path.join(directory, 'aedem.db')
+
+    try:
+        from aedem import create_app
+        from aedem.models import Session, configure_database, get_engine, initialize_database
+        from benchmarks.seed import seed
+
+        app = create_app()
+        app.config['DB_URL'] = database
+        configure_database(app.config)
+
+        with app.app_context():
+            engine = get_engine()
+            initialize_database(engine)
+            ids = seed(Session(), args.users, args.seed)
+            Session.remove()
+            engine.dispose()
+
+        prefix = app.config['BASE_URL']
+        paths = []
+        for index in range(100):
+            paths.append('{}/users/{}'.format(prefix, ids['users'][index * 7919 % len(ids['users'])]))
+            paths.append('{}/reports/{}'.format(prefix, ids['reports'][index * 7919 % len(ids['reports'])]))
+        paths += ['{}/reports?limit=20'.format(prefix), '{}/news?limit=20'.format(prefix)]
+        stream_paths = ['{}/users/{}/notifications/stream'.format(prefix, ids['users'][index % len(ids['users'])])
+            for index in range(args.streams)]
+
+        results = {
+            "database": engine.dialect.name,
+            "users": args.users,
+            "workers": args.workers,
+            "threads": args.threads,
+            "concurrency": args.concurrency,
+            "streams": args.streams,
+            "results": {}
+        }
+
+        print("{:<10} {:>10} {:>9} {:>9} {:>9} {:>7}".format(
+            "mode", "req/s", "p50 ms", "p99 ms", "requests", "errors"))
+        for mode in args.modes:
+            port = free_port()
+            process = subprocess.Popen([sys.executable, '-m', 'benchmarks.throughput',
+                '--serve', mode, '--port', str(port), '--database', database,
+                '--workers', str(args.workers), '--threads', str(args.threads)])
+            try:
+                wait_until_serving(process, port)
+                streams = open_streams(port, stream_paths)
+                try:
+                    result = load(port, paths, args.concurrency, args.duration)
+                finally:
+                    for stream in streams:
+                        stream.close()
+            finally:
+                process.terminate()
+                process.wait()
+
+            results['results'][mode] = result
+            print("{:<10} {:>10.1f} {:>9} {:>9} {:>9} {:>7}".format(
+                mode, result['throughput'],
+                '-' if result['p50_ms'] is None else '{:.2f}'.format(result['p50_ms']),
+                '-' if result['p99_ms'] is None else '{:.2f}'.format(result['p99_ms']),
+                result['requests'], result['errors']))
+    finally:
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors = True)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent = 2, sort_keys = True)
+
+if __name__ == '__main__':
+    main()
@@ -20,4 +20,87 @@ class BaseConfig(object):
     DB_PORT         = 5432
     DB_NAME         = "aedem"
     DB_USERNAME     = ""
-    DB_PASSWORD     = ""
\ No newline at end of file
+    DB_PASSWORD     = ""
+    # (DB_URL, quando definida, substitui as configurações acima, por exemplo
+    #  "sqlite:///aedem.db" para usar um banco de dados local)
+    DB_URL          = None
+
+    # Configurações de réplicas de leitura
+    # (URLs dos bancos de dados réplicas do primário; requisições GET são
+    #  respondidas por uma delas, escolhida ao acaso, exceto para os clientes
+    #  que escreveram há menos de DB_REPLICA_STICKINESS segundos, que leem do
+    #  primário e veem as suas próprias alterações)
+    DB_REPLICA_URLS       = ()
+    DB_REPLICA_STICKINESS = 5
+
+    # Configurações do pool de conexões ao banco de dados
+    # (cada processo da aplicação mantém até DB_POOL_SIZE + DB_MAX_OVERFLOW
+    #  conexões; DB_POOL_TIMEOUT e DB_POOL_RECYCLE são dados em segundos)
+    DB_POOL_SIZE        = 5
+    DB_MAX_OVERFLOW     = 10
+    DB_POOL_TIMEOUT     = 30
+    DB_POOL_RECYCLE     = 1800
+    DB_POOL_PRE_PING    = True
+
+    # Configurações de paginação
+    # (quantidade padrão e máxima de itens por página nas listagens)
+    PAGE_SIZE       = 50
+    PAGE_SIZE_MAX   = 500
+
+    # Configurações de cache das respostas
+    # (CACHE_BACKEND pode ser "redis", compartilhado entre processos, "local",
+    #  mantido em cada processo, ou "memory", que simula o redis em memória;
+    #  com mais de um processo do gunicorn, use o "redis": nos demais, uma
+    #  alteração invalida as respostas guardadas apenas no processo que a
+    #  recebeu, e os outros continuam respondendo com as antigas por até
+    #  CACHE_TTL segundos)
+    CACHE_BACKEND   = "redis"
+    CACHE_TTL       = 300
+    CACHE_MAXSIZE   = 1024
+    CACHE_REDIS_URL = "redis://localhost:6379/0"
+
+    # Configurações de envio em lote
+    # (quantidade máxima de denúncias enviadas em uma única requisição)
+    BATCH_MAX_SIZE  = 1000
+
+    # Configurações de exportação
+    # (quantidade de denúncias lidas do banco de dados por vez)
+    EXPORT_BATCH_SIZE = 1000
+
+    # Configurações de geolocalização
+    # (GEO_BACKEND pode ser "geohash", que funciona em qualquer banco de
+    #  dados, ou "postgis", caso a extensão esteja instalada)
+    GEO_BACKEND     = "geohash"
+    GEO_MAX_RADIUS  = 50
+
+    # Configurações de tarefas em segundo plano
+    # (cada processo da aplicação executa até JOB_WORKERS tarefas ao mesmo
+    #  tempo; notificações em massa são enviadas em lotes de
+    #  BROADCAST_BATCH_SIZE usuários, e são retomadas de onde pararam quando
+    #  ficam BROADCAST_STALE_AFTER segundos sem progresso, como ao reiniciar
+    #  o processo que as enviava)
+    JOB_WORKERS     = 2
+    BROADCAST_BATCH_SIZE = 5000
+    BROADCAST_STALE_AFTER = 120
+
+    # Configurações de notificações em tempo real
+    # (PUBSUB_BACKEND pode ser "postgres", que usa LISTEN/NOTIFY e alcança
+    #  todos os processos, ou "local", restrito a um único processo;
+    #  STREAM_KEEPALIVE e STREAM_TIMEOUT são dados em segundos)
+    PUBSUB_BACKEND  = "postgres"
+    STREAM_KEEPALIVE = 15
+    STREAM_TIMEOUT  = 300
+
+    # Configurações de compressão das respostas
+    # (algoritmos em ordem de preferência, usados quando aceitos pelo
+    #  cliente; "br" e "zstd" exigem os pacotes brotli e zstandard; respostas
+    #  menores que COMPRESSION_MIN_SIZE bytes não são comprimidas)
+    COMPRESSION_ALGORITHMS  = ("br", "zstd", "gzip")
+    COMPRESSION_LEVELS      = {"br": 5, "zstd": 3, "gzip": 6}
+    COMPRESSION_MIN_SIZE    = 1024
+    COMPRESSION_MIMETYPES   = ("application/json", "application/x-ndjson", "text/csv")
+
+    # Configurações de métricas
+    # (limites dos intervalos do histograma de latência das requisições,
+    #  em segundos; as métricas são expostas em /metrics)
+    METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
\ No newline at end of file
@@ -13,3 +13,7 @@ class Config(BaseConfig):
     DB_NAME         = "aedem"
     DB_USERNAME     = ""
     DB_PASSWORD     = ""
+
+    # Configurações de cache das respostas
+    # (o servidor de desenvolvimento roda em um único processo)
+    CACHE_BACKEND   = "local"
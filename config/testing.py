@@ -13,4 +13,10 @@ class Config(BaseConfig):
     DB_PORT         = 5432
     DB_NAME         = "aedem-test"
     DB_USERNAME     = ""
-    DB_PASSWORD     = ""
\ No newline at end of file
+    DB_PASSWORD     = ""
+
+    # Configurações de cache das respostas
+    CACHE_BACKEND   = "memory"
+
+    # Configurações de notificações em tempo real
+    PUBSUB_BACKEND  = "local"
\ No newline at end of file
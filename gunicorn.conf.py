@@ -0,0 +1,14 @@
+# Configuração do gunicorn para rodar a API em produção, veja README.md
+import multiprocessing
+
+bind = "0.0.0.0:8000"
+
+# um processo por núcleo, cada um com algumas threads para as requisições
+# que aguardam o banco de dados
+workers = multiprocessing.cpu_count()
+worker_class = "gthread"
+threads = 4
+
+# a aplicação é criada uma única vez, antes dos processos serem separados;
+# cada processo abre as suas próprias conexões ao banco de dados
+preload_app = True
@@ -0,0 +1,17 @@
+# Configuração do gunicorn com processos gevent, veja README.md
+# (use com gunicorn -c gunicorn.gevent.conf.py app:app)
+import multiprocessing
+
+bind = "0.0.0.0:8000"
+
+# um processo por núcleo, cada um atendendo até worker_connections
+# requisições ao mesmo tempo; uma requisição aguardando o banco de dados ou
+# um stream de notificações ocioso ocupa apenas um greenlet
+workers = multiprocessing.cpu_count()
+worker_class = "gevent"
+worker_connections = 1000
+
+# a aplicação é criada em cada processo, depois do gevent adaptar a
+# biblioteca padrão; criada antes, as sessões do banco de dados seriam
+# compartilhadas entre as requisições de um mesmo processo
+preload_app = False
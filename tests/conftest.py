@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+@pytest.fixture
+def app(tmp_path):
+    """Application on a SQLite database of its own, with the schema up to date"""
+    from aedem import create_app
+    from aedem.models import Session, configure_database, get_engine, initialize_database
+
+    app = create_app()
+    app.config['DB_URL'] = 'sqlite:///' + str(tmp_path / 'aedem.db')
+    configure_database(app.config)
+    with app.app_context():
+        initialize_database(get_engine())
+        yield app
+        Session.remove()
+        get_engine().dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def create_user(client, index = 0, **values) -> str:
+    data = {"name": "Usuário", "passhash": "hash", "salt": "salt",
+        "email": "usuario{}@example.com".format(index), "phone": "28{:09d}".format(index),
+        "birthday": "1990-01-01", "zip_code": "29000000", "state_abbr": "ES",
+        "city_name": "Vitória", "city_number": 3205309, "area": "Centro"}
+    data.update(values)
+    return client.post('/api/v1/users', json = data).get_json()['response']['id']
+
+def create_report(client, user, **values) -> dict:
+    data = {"state_abbr": "ES", "city_name": "Vitória", "area": "Centro",
+        "geolatitude": -20.3, "geolongitude": -40.3, "description": "Denúncia",
+        "user": user, "attachments": ["https://example.com/foto.jpg"]}
+    data.update(values)
+    return client.post('/api/v1/reports', json = data).get_json()['response']['report']
@@ -0,0 +1,49 @@
+import datetime
+import uuid
+
+from aedem.inbox import resume_broadcasts, send_broadcast
+from aedem.models import Session
+from aedem.models.broadcasts import Broadcast
+from aedem.models.notifications import Notification
+from tests.conftest import create_user
+
+def create_broadcast(session, **values) -> int:
+    broadcast = Broadcast(notiftype = "info", content = "Mutirão de limpeza",
+        city_name = "Vitória")
+    for datafield, value in values.items():
+        setattr(broadcast, datafield, value)
+    session.add(broadcast)
+    session.commit()
+    return broadcast.id
+
+def notified(session) -> list:
+    return sorted(str(row.user_id) for row in session.query(Notification.user_id))
+
+def test_interrupted_broadcast_resumes_after_its_last_batch(client):
+    users = sorted(create_user(client, index) for index in range(5))
+    session = Session()
+
+    # a process stopped after notifying the first two users
+    broadcast_id = create_broadcast(session, status = 'running', total = 5, sent = 2,
+        last_user_id = uuid.UUID(users[1]))
+    session.query(Broadcast).update({Broadcast.last_updated:
+        datetime.datetime.now() - datetime.timedelta(minutes = 10)},
+        synchronize_session = False)
+    session.commit()
+
+    assert resume_broadcasts(session, 120) == [broadcast_id]
+    send_broadcast(broadcast_id, 2, 120)
+
+    session = Session()
+    broadcast = session.query(Broadcast).get(broadcast_id)
+    assert (broadcast.status, broadcast.sent) == ('done', 5)
+    assert notified(session) == users[2:]
+
+def test_running_broadcast_is_not_sent_twice(client):
+    create_user(client)
+    session = Session()
+    broadcast_id = create_broadcast(session, status = 'running')
+
+    assert resume_broadcasts(session, 120) == []
+    send_broadcast(broadcast_id, 100, 120)
+    assert notified(Session()) == []
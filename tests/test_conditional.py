@@ -0,0 +1,16 @@
+from tests.conftest import create_user
+
+def test_list_is_modified_once_a_row_of_its_page_is_deleted(client):
+    first, second = create_user(client, 1), create_user(client, 2)
+    response = client.get('/api/v1/users')
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+
+    fresh = client.get('/api/v1/users', headers = {"If-None-Match": etag})
+    assert fresh.status_code == 304
+
+    client.delete('/api/v1/users/{}'.format(second))
+    response = client.get('/api/v1/users',
+        headers = {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+    assert [user['id'] for user in response.get_json()['response']] == [first]
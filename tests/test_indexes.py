@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+# the hot queries are planned by PostgreSQL, checked only when a test
+# database is given, as in
+# TEST_DATABASE_URL=postgresql://localhost/aedem_test python -m pytest
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL', '')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL.startswith('postgresql'),
+    reason = "TEST_DATABASE_URL is not a PostgreSQL database")
+
+@pytest.fixture
+def engine():
+    """Engine of the PostgreSQL test database, with the schema up to date"""
+    from aedem import create_app
+    from aedem.models import Session, configure_database, get_engine, initialize_database
+
+    app = create_app()
+    app.config['DB_URL'] = TEST_DATABASE_URL
+    configure_database(app.config)
+    with app.app_context():
+        initialize_database(get_engine())
+        yield get_engine()
+        Session.remove()
+        get_engine().dispose()
+
+def test_hot_queries_use_their_indexes(engine):
+    from aedem.migrations.checks import check_indexes
+
+    with engine.connect() as connection:
+        assert check_indexes(connection) == []
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+def test_greenlets_share_the_shard_of_their_thread():
+    pytest.importorskip('gevent')
+
+    # the standard library is patched in a process of its own, as in gevent workers
+    script = textwrap.dedent('''
+        from gevent import monkey
+        monkey.patch_all()
+        import gevent
+
+        from aedem.metrics import Metrics, RequestMetrics
+
+        metrics = Metrics((0.1, 1.0))
+        gevent.joinall([gevent.spawn(metrics.observe, '/api/v1/users', 'GET', 200,
+            RequestMetrics(), 100) for _ in range(1000)])
+
+        assert len(metrics._shards) == 1, len(metrics._shards)
+        assert sum(metrics.collect()[('/api/v1/users', 'GET')].buckets) == 1000
+    ''')
+    completed = subprocess.run([sys.executable, '-c', script],
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+    assert completed.returncode == 0, completed.stderr.decode()
@@ -0,0 +1,46 @@
+import json
+
+from tests.conftest import create_user
+
+def test_stream_of_an_uppercase_user_id_receives_new_notifications(client):
+    user = create_user(client)
+    response = client.get('/api/v1/users/{}/notifications/stream'.format(user.upper()),
+        buffered = False)
+    events = iter(response.response)
+    assert next(events).startswith(b'retry:')
+
+    client.post('/api/v1/notifications', json = {"user_id": user,
+        "notiftype": "info", "content": "Nova denúncia perto de você"})
+    event = next(events)
+    assert b'event: notification' in event
+    data = json.loads(event.decode().split('data: ', 1)[1])
+    assert data['content'] == 'Nova denúncia perto de você'
+    response.close()
+
+def notify(client, user):
+    client.post('/api/v1/notifications', json = {"user_id": user,
+        "notiftype": "info", "content": "Nova denúncia perto de você"})
+
+def test_notifications_of_an_uppercase_user_id_are_listed(client):
+    user = create_user(client)
+    notify(client, user)
+
+    response = client.get('/api/v1/users/{}/notifications'.format(user.upper())).get_json()
+    assert [item['content'] for item in response['response']] == ['Nova denúncia perto de você']
+
+def test_notifications_of_an_uppercase_user_id_are_marked_read(client):
+    user = create_user(client)
+    notify(client, user)
+
+    response = client.post('/api/v1/users/{}/notifications/read'.format(user.upper()),
+        json = {}).get_json()
+    assert response['response'] == {"marked": 1, "unread": 0}
+
+def test_marking_read_with_a_list_body_is_a_bad_request(client):
+    user = create_user(client)
+    notify(client, user)
+
+    response = client.post('/api/v1/users/{}/notifications/read'.format(user), json = [1])
+    assert response.status_code == 400
+    response = client.get('/api/v1/users/{}/notifications/unread'.format(user)).get_json()
+    assert response['response'] == {"unread": 1}
@@ -0,0 +1,22 @@
+import json
+import uuid
+
+from aedem.pubsub import _MAX_PAYLOAD, LocalBroker, payloads
+
+def test_dispatch_wakes_the_subscribers_of_the_notified_users_only():
+    broker = LocalBroker()
+    notified, other = str(uuid.uuid4()), str(uuid.uuid4())
+    subscriber, bystander = broker.subscribe(notified), broker.subscribe(other)
+
+    broker.dispatch({"user_ids": [notified]})
+    assert subscriber.get_nowait() == {"user_ids": [notified]}
+    assert bystander.empty()
+
+def test_payloads_of_a_large_batch_fit_in_notify():
+    user_ids = [str(uuid.uuid4()) for _ in range(5000)]
+    split = payloads({"user_ids": user_ids})
+
+    assert len(split) > 1
+    assert all(len(payload.encode()) <= _MAX_PAYLOAD for payload in split)
+    assert [user_id for payload in split
+        for user_id in json.loads(payload)['user_ids']] == user_ids
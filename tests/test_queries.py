@@ -0,0 +1,93 @@
+import pytest
+
+from aedem.utils import count_queries
+
+# list endpoints, requested with pages large enough for every seeded row
+LISTS = ('privileges', 'flags', 'users', 'reports', 'replies', 'notifications', 'news')
+
+def list_queries(tmp_path, users) -> dict:
+    """Statements issued by the first request to each list, over a database seeded with users"""
+    from aedem import create_app
+    from aedem.models import Session, configure_database, get_engine, initialize_database
+    from benchmarks.seed import seed
+
+    app = create_app()
+    app.config['DB_URL'] = 'sqlite:///' + str(tmp_path / 'aedem-{}.db'.format(users))
+    configure_database(app.config)
+
+    queries = {}
+    with app.app_context():
+        engine = get_engine()
+        initialize_database(engine)
+        seed(Session(), users)
+        Session.remove()
+
+        client = app.test_client()
+        for name in LISTS:
+            with count_queries(engine) as statements:
+                response = client.get('/api/v1/{}?limit=500'.format(name))
+            assert response.get_json()['status'] == 200, name
+            queries[name] = len(statements)
+        Session.remove()
+        engine.dispose()
+    return queries
+
+def test_list_queries_do_not_grow_with_rows(tmp_path):
+    assert list_queries(tmp_path, 10) == list_queries(tmp_path, 20)
+
+# statements issued by each handler on SQLite, by benchmark case name;
+# PostgreSQL answers PATCH and DELETE with fewer, through RETURNING
+HANDLER_QUERIES = {
+    "privileges.list": 1, "privileges.get": 1, "privileges.patch": 2,
+    "privileges.delete": 2,
+    "flags.list": 2, "flags.get": 1, "flags.update": 2, "flags.patch": 2,
+    "flags.delete": 4,
+    "users.list": 2, "users.get": 1, "users.update": 3, "users.patch": 2,
+    "users.delete": 5,
+    "reports.list": 3, "reports.get": 1, "reports.update": 4, "reports.patch": 2,
+    "reports.delete": 7,
+    "replies.list": 2, "replies.get": 1, "replies.update": 3, "replies.patch": 2,
+    "replies.delete": 2,
+    "notifications.list": 2, "notifications.get": 1, "notifications.update": 4,
+    "notifications.patch": 2, "notifications.delete": 3,
+    "news.list": 2, "news.get": 1, "news.update": 3, "news.patch": 2,
+    "news.delete": 2,
+}
+
+@pytest.fixture(scope = 'module')
+def handler_queries(tmp_path_factory) -> dict:
+    """Statements issued by the first request of each benchmark case, over a seeded database"""
+    from aedem import create_app
+    from aedem.models import Session, configure_database, get_engine, initialize_database
+    from benchmarks.endpoints import crud_cases
+    from benchmarks.seed import seed
+
+    app = create_app()
+    app.config['DB_URL'] = 'sqlite:///' + str(tmp_path_factory.mktemp('queries') / 'aedem.db')
+    configure_database(app.config)
+
+    queries = {}
+    with app.app_context():
+        engine = get_engine()
+        initialize_database(engine)
+        ids = seed(Session(), 5)
+        Session.remove()
+
+        # cases are requested in order, deletes remove the rows created before
+        client = app.test_client()
+        prefix = app.config['BASE_URL']
+        for case in crud_cases(ids, prefix):
+            path, body = case.request(0)
+            with count_queries(engine) as statements:
+                response = client.open(prefix + path, method = case.method, json = body)
+            payload = response.get_json()
+            if case.created is not None:
+                case.created(payload)
+            queries[case.name] = (payload['status'], len(statements))
+        Session.remove()
+        engine.dispose()
+    return queries
+
+@pytest.mark.parametrize('name', sorted(HANDLER_QUERIES))
+def test_handler_query_count(handler_queries, name):
+    assert handler_queries[name] == (200, HANDLER_QUERIES[name])
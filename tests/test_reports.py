@@ -0,0 +1,65 @@
+import uuid
+
+from tests.conftest import create_report, create_user
+
+def stats(client):
+    return client.get('/api/v1/reports/stats').get_json()['response']
+
+def test_patch_keeping_the_aggregate_leaves_stats_unchanged(client):
+    report = create_report(client, create_user(client))
+    before = stats(client)
+
+    response = client.patch('/api/v1/reports/{}'.format(report['id']),
+        json = {"description": "Atualizada"}).get_json()
+    assert response['status'] == 200
+    assert stats(client) == before
+
+def test_patch_closing_a_report_moves_it_between_counts(client):
+    report = create_report(client, create_user(client))
+    assert [(group['open'], group['closed']) for group in stats(client)] == [(1, 0)]
+
+    client.patch('/api/v1/reports/{}'.format(report['id']), json = {"status": False})
+    assert [(group['open'], group['closed']) for group in stats(client)] == [(0, 1)]
+
+def test_create_with_invalid_coordinates_is_a_bad_request(client):
+    user = create_user(client)
+    response = client.post('/api/v1/reports', json = {"state_abbr": "ES",
+        "city_name": "Vitória", "area": "Centro", "geolatitude": "abc",
+        "geolongitude": -40.3, "description": "Denúncia", "user": user,
+        "attachments": []})
+    assert response.status_code == 400
+    assert stats(client) == []
+
+def test_update_with_coordinates_out_of_range_is_a_bad_request(client):
+    report = create_report(client, create_user(client))
+    response = client.put('/api/v1/reports/{}?geolatitude=999'.format(report['id']))
+    assert response.status_code == 400
+
+    response = client.get('/api/v1/reports/{}'.format(report['id'])).get_json()
+    assert response['response']['report']['geolatitude'] == -20.3
+
+def nearby(client, **args):
+    query = '&'.join('{}={}'.format(key, value) for key, value in
+        dict({"lat": -20.3, "lon": -40.3, "radius": 5}, **args).items())
+    return client.get('/api/v1/reports/nearby?' + query).get_json()['response']
+
+def test_nearby_returns_the_closest_reports_within_the_limit(client):
+    user = create_user(client)
+    ids = [create_report(client, user, geolatitude = -20.3 + offset)['id']
+        for offset in (0.02, 0.0, 0.01, 0.03, 0.1)]
+
+    response = nearby(client, limit = 3)
+    assert [item['report']['id'] for item in response] == [ids[1], ids[2], ids[0]]
+    assert [item['distance'] for item in response] == sorted(
+        item['distance'] for item in response)
+
+def test_nearby_skips_reports_deleted_meanwhile(client, monkeypatch):
+    from aedem.controllers import reports
+
+    report = create_report(client, create_user(client))
+    found = reports.nearby_geohash
+    monkeypatch.setattr(reports, 'nearby_geohash',
+        lambda *args: [(0.0, str(uuid.uuid4()))] + found(*args))
+
+    response = nearby(client)
+    assert [item['report']['id'] for item in response] == [report['id']]
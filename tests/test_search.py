@@ -0,0 +1,17 @@
+from aedem.search import highlight
+
+def test_highlight_escapes_content():
+    snippet = highlight('Mutirão <script>alert("dengue")</script> & limpeza', 'dengue')
+    assert snippet == ('Mutirão &lt;script&gt;alert(&quot;<b>dengue</b>&quot;)'
+        '&lt;/script&gt; &amp; limpeza')
+
+def test_search_snippets_escape_news_content(client):
+    client.post('/api/v1/news', json = {"title": "Mutirão contra a dengue",
+        "content": "Aviso <img src=x onerror=alert(1)> Mutirão contra a dengue",
+        "source": "Prefeitura", "published_at": "2020-01-01",
+        "external_link": "https://example.com", "state_abbr": "ES",
+        "city_name": "Vitória"})
+
+    response = client.get('/api/v1/news/search?q=dengue').get_json()['response']
+    assert [item['snippet'] for item in response] == [
+        'Aviso &lt;img src=x onerror=alert(1)&gt; Mutirão contra a <b>dengue</b>']